@@ -21,6 +21,11 @@ from shared.helpers.redis import get_redis_connection
 from celery_task_router import route_task
 from helpers.clock import get_utc_now_as_iso_format
 from helpers.health_check import get_health_check_interval_seconds
+from services.report.raw_upload_processor import (
+    is_parallel_parsing_enabled,
+    shutdown_parsing_pool,
+    start_parsing_pool,
+)
 
 log = logging.getLogger(__name__)
 
@@ -49,6 +54,19 @@ def initialize_cache(**kwargs):
     cache.configure(redis_cache_backend)
 
 
+@signals.worker_process_init.connect
+def start_parallel_parsing_pool(**kwargs):
+    # the pool is forked while the worker process is not running any other threads
+    if is_parallel_parsing_enabled():
+        start_parsing_pool()
+        log.info("Started parallel parsing pool")
+
+
+@signals.worker_process_shutdown.connect
+def shutdown_parallel_parsing_pool(**kwargs):
+    shutdown_parsing_pool()
+
+
 hourly_check_task_name = "app.cron.hourly_check.HourlyCheckTask"
 daily_plan_manager_task_name = "app.cron.daily.PlanManagerTask"
 
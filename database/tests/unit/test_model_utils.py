@@ -137,3 +137,32 @@ class TestArchiveField(object):
         assert test_class.archive_field == some_json
         # Cache is updated on write
         assert mock_read_file.call_count == 0
+
+    def test_archive_setter_serialized(self, sqlalchemy_db, mocker):
+        commit = CommitFactory()
+        test_class = self.ClassWithArchiveField(commit, "db_value", None, True)
+        mock_write_file = mocker.MagicMock(return_value="path/to/written/object")
+        mock_archive_service = mocker.patch("database.utils.ArchiveService")
+        mock_archive_service.return_value.write_json_data_to_storage = mock_write_file
+
+        field = type(test_class).archive_field
+        field.set_serialized(test_class, b'{"some": "data"}')
+
+        # the serialized data is written as-is
+        assert mock_write_file.call_args.kwargs["data"] == b'{"some": "data"}'
+        assert test_class._archive_field is None
+        assert test_class._archive_field_storage_path == "path/to/written/object"
+        # and decoded on demand, without reading it back from storage
+        assert test_class.archive_field == {"some": "data"}
+        mock_archive_service.return_value.read_file.assert_not_called()
+
+    def test_archive_setter_serialized_db_field(self, sqlalchemy_db, mocker):
+        commit = CommitFactory()
+        test_class = self.ClassWithArchiveField(commit, "db_value", None, False)
+        mock_archive_service = mocker.patch("database.utils.ArchiveService")
+
+        type(test_class).archive_field.set_serialized(test_class, b'{"some": "data"}')
+
+        mock_archive_service.assert_not_called()
+        assert test_class._archive_field == {"some": "data"}
+        assert test_class.archive_field == {"some": "data"}
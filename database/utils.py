@@ -90,6 +90,7 @@ class ArchiveField:
         self.db_field_name = "_" + name
         self.archive_field_name = "_" + name + "_storage_path"
         self.cached_value_property_name = f"__{self.public_name}_cached_value"
+        self.serialized_value_property_name = f"__{self.public_name}_serialized_value"
 
     def _get_value_from_archive(self, obj):
         repository = obj.get_repository()
@@ -148,9 +149,18 @@ class ArchiveField:
         return self.default_value_class()
 
     def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
         cached_value = getattr(obj, self.cached_value_property_name, None)
         if cached_value:
             return cached_value
+        serialized_value = getattr(obj, self.serialized_value_property_name, None)
+        if serialized_value is not None:
+            # the value was written using `set_serialized`, and is decoded on demand
+            value = self.rehydrate_fn(obj, orjson.loads(serialized_value))
+            setattr(obj, self.serialized_value_property_name, None)
+            setattr(obj, self.cached_value_property_name, value)
+            return value
         db_field = getattr(obj, self.db_field_name)
         if db_field is not None:
             value = self.rehydrate_fn(obj, db_field)
@@ -162,22 +172,43 @@ class ArchiveField:
     def __set__(self, obj, value):
         # Set the new value
         if self.should_write_to_storage_fn(obj):
-            repository = obj.get_repository()
-            archive_service = ArchiveService(repository=repository)
-            old_file_path = getattr(obj, self.archive_field_name)
-            table_name = obj.__tablename__
-            path = archive_service.write_json_data_to_storage(
-                commit_id=obj.get_commitid(),
-                table=table_name,
-                field=self.public_name,
-                external_id=obj.external_id,
-                data=value,
-                encoder=self.json_encoder,
-            )
-            if old_file_path is not None and path != old_file_path:
-                archive_service.delete_file(old_file_path)
-            setattr(obj, self.archive_field_name, path)
-            setattr(obj, self.db_field_name, None)
+            self._write_to_archive(obj, value)
         else:
             setattr(obj, self.db_field_name, value)
+        setattr(obj, self.serialized_value_property_name, None)
         setattr(obj, self.cached_value_property_name, value)
+
+    def set_serialized(self, obj, serialized_value: bytes):
+        """
+        Sets the value of the field from its already serialized JSON.
+
+        When writing to storage, `serialized_value` is uploaded as-is, and it is
+        only decoded once the value is being accessed, avoiding a needless
+        decode / encode roundtrip of the whole value.
+
+        Usage: `Commit.report_json.set_serialized(commit, report_json)`
+        """
+        if self.should_write_to_storage_fn(obj):
+            self._write_to_archive(obj, serialized_value)
+            setattr(obj, self.cached_value_property_name, None)
+            setattr(obj, self.serialized_value_property_name, serialized_value)
+        else:
+            self.__set__(obj, orjson.loads(serialized_value))
+
+    def _write_to_archive(self, obj, data):
+        repository = obj.get_repository()
+        archive_service = ArchiveService(repository=repository)
+        old_file_path = getattr(obj, self.archive_field_name)
+        table_name = obj.__tablename__
+        path = archive_service.write_json_data_to_storage(
+            commit_id=obj.get_commitid(),
+            table=table_name,
+            field=self.public_name,
+            external_id=obj.external_id,
+            data=data,
+            encoder=self.json_encoder,
+        )
+        if old_file_path is not None and path != old_file_path:
+            archive_service.delete_file(old_file_path)
+        setattr(obj, self.archive_field_name, path)
+        setattr(obj, self.db_field_name, None)
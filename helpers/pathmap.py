@@ -1,8 +1,25 @@
+import os.path
 from difflib import SequenceMatcher
-from os.path import relpath
 from typing import Sequence
 
 
+def relpath(path: str) -> str:
+    """
+    Same as `os.path.relpath(path)`.
+
+    Relative paths that do not start with `..` once normalized are relative to
+    the current directory already, so `relpath` only has to normalize them,
+    without resolving the current directory twice per call.
+    """
+    if path and not os.path.isabs(path):
+        normalized = os.path.normpath(path)
+        if normalized != os.path.pardir and not normalized.startswith(
+            os.path.pardir + os.path.sep
+        ):
+            return normalized
+    return os.path.relpath(path)
+
+
 def _clean_path(path):
     path = relpath(
         path.strip()
@@ -27,13 +44,51 @@ def _check_ancestors(path, match, ancestors):
     return ml.endswith("/".join(pl.split("/")[(ancestors + 1) * -1 :]))
 
 
+# Ties in the ranking of `_get_best_match` are broken with a `SequenceMatcher`
+# only up to this many candidates, as it is quadratic in the path length.
+MAX_SEQUENCE_MATCHER_CANDIDATES = 16
+
+
+def _shared_trailing_components(components: list[str], other: list[str]) -> int:
+    shared = 0
+    for component, other_component in zip(reversed(components), reversed(other)):
+        if component != other_component:
+            break
+        shared += 1
+    return shared
+
+
 def _get_best_match(path: str, possibilities: list[str]) -> str:
     """
     Given a `path`, return the most similar one out of `possibilities`.
+
+    The possibilities are ranked by the number of trailing path components they
+    share with `path` (case-sensitively, as the possibilities of a lookup are the
+    same case-insensitively), and then by the length of their common prefix.
+    Only the possibilities tied for the best rank are compared character by
+    character, and among equally good ones, the first one wins.
     """
+    components = path.split("/")
+    best_rank = (-1, -1)
+    best_matches: list[str] = []
+    for possibility in dict.fromkeys(possibilities):
+        rank = (
+            _shared_trailing_components(components, possibility.split("/")),
+            len(os.path.commonprefix([path, possibility])),
+        )
+        if rank > best_rank:
+            best_rank = rank
+            best_matches = [possibility]
+        elif rank == best_rank:
+            best_matches.append(possibility)
+
+    if not best_matches:
+        return ""
+    if len(best_matches) == 1 or len(best_matches) > MAX_SEQUENCE_MATCHER_CANDIDATES:
+        return best_matches[0]
 
     best_match = (-1.0, "")
-    for possibility in possibilities:
+    for possibility in best_matches:
         match = SequenceMatcher(None, path, possibility).ratio()
         if match > best_match[0]:
             best_match = (match, possibility)
@@ -42,6 +97,8 @@ def _get_best_match(path: str, possibilities: list[str]) -> str:
 
 
 class Node:
+    __slots__ = ("full_paths", "children")
+
     full_paths: list[str]
     """
     The full paths terminating in this node.
@@ -158,7 +215,9 @@ class Tree:
             if not end and match:
                 next_path = self._drill(node)
                 if next_path:
-                    results.extend(next_path)
+                    # `results` might be the `full_paths` of a node,
+                    # which must not be modified
+                    results = [*results, *next_path]
             return results
 
     def lookup(self, path: str, ancestors=None) -> str | None:
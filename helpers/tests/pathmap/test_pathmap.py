@@ -1,4 +1,8 @@
-from helpers.pathmap import Tree, _check_ancestors, _clean_path
+import os.path
+
+import pytest
+
+from helpers.pathmap import Tree, _check_ancestors, _clean_path, relpath
 
 
 def test_clean_path():
@@ -12,6 +16,23 @@ def test_clean_path():
     assert _clean_path(path) == "ms/style/directory"
 
 
+@pytest.mark.parametrize(
+    "path",
+    [
+        "a/b/c.py",
+        "./a//b/./c.py",
+        "a/../b.py",
+        "a/../../b.py",
+        "..",
+        "../tests/pathmap",
+        "/abs/path/../file.py",
+        ".",
+    ],
+)
+def test_relpath(path):
+    assert relpath(path) == os.path.relpath(path)
+
+
 def test_resolve_path():
     tree = Tree(["src/components/login.js"])
 
@@ -8,6 +8,16 @@ def test_get_best_match():
     assert _get_best_match(path, possibilities) == "c/bB.py"
 
 
+def test_get_best_match_many_possibilities():
+    path = "apps/web/src/index.ts"
+    possibilities = [f"packages/pkg_{i}/src/index.ts" for i in range(10000)]
+    possibilities.append("apps/site/src/index.ts")
+
+    assert _get_best_match(path, possibilities) == "apps/site/src/index.ts"
+    assert _get_best_match(path, ["a/SRC/index.ts"] * 1000) == "a/SRC/index.ts"
+    assert _get_best_match(path, []) == ""
+
+
 def test_drill():
     tree = Tree(["a/b/c"])
     assert tree._drill(tree.root) == ["a/b/c"]
@@ -41,3 +51,11 @@ def test_lookup():
     tree = Tree(["one/two/three.py"])
 
     assert tree.lookup("two/one/three.py") == "one/two/three.py"
+
+
+def test_lookup_does_not_modify_tree():
+    tree = Tree(["c", "a/b/c"])
+
+    assert tree.lookup("b/c") == "a/b/c"
+    assert tree.lookup("b/c") == "a/b/c"
+    assert tree.root.children["c"].full_paths == ["c"]
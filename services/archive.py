@@ -1,9 +1,14 @@
+import gzip
 import json
 import logging
+import tempfile
 from base64 import b16encode
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
 from hashlib import md5
+from typing import IO
 
 import sentry_sdk
 import shared.storage
@@ -14,9 +19,14 @@ from helpers.metrics import metrics
 
 log = logging.getLogger(__name__)
 
+# Compressed files are kept in memory up to this size, and spill to disk beyond it.
+SPOOLED_FILE_MAX_SIZE = 16 * 1024 * 1024
+GZIP_COMPRESSION_LEVEL = 9
+
 
 class MinioEndpoints(Enum):
     chunks = "{version}/repos/{repo_hash}/commits/{commitid}/{chunks_file_name}.txt"
+    chunks_shard = "{version}/repos/{repo_hash}/commits/{commitid}/{chunks_file_name}/shard-{shard_id}.txt"
     json_data = "{version}/repos/{repo_hash}/commits/{commitid}/json_data/{table}/{field}/{external_id}.json"
     json_data_no_commit = (
         "{version}/repos/{repo_hash}/json_data/{table}/{field}/{external_id}.json"
@@ -105,10 +115,14 @@ class ArchiveService(object):
         table: str,
         field: str,
         external_id: str,
-        data: dict,
+        data: dict | bytes,
         *,
         encoder=ReportEncoder,
     ):
+        """
+        Writes `data` as JSON to storage, returning its path.
+        `data` that is already serialized to JSON `bytes` is written as-is.
+        """
         if commit_id is None:
             # Some classes don't have a commit associated with them
             # For example Pull belongs to multiple commits.
@@ -128,11 +142,16 @@ class ArchiveService(object):
                 field=field,
                 external_id=external_id,
             )
-        stringified_data = json.dumps(data, cls=encoder)
+        if isinstance(data, bytes):
+            stringified_data = data
+        else:
+            stringified_data = json.dumps(data, cls=encoder)
         self.write_file(path, stringified_data)
         return path
 
-    def write_chunks(self, commit_sha, data, report_code=None) -> str:
+    def write_chunks(
+        self, commit_sha, data, report_code=None, *, is_already_gzipped=False
+    ) -> str:
         """
         Convenience method to write a chunks.txt file to storage.
         """
@@ -144,9 +163,19 @@ class ArchiveService(object):
             chunks_file_name=chunks_file_name,
         )
 
-        self.write_file(path, data)
+        self.write_file(path, data, is_already_gzipped=is_already_gzipped)
         return path
 
+    def get_chunks_shard_path(self, commit_sha, shard_id, report_code=None) -> str:
+        chunks_file_name = report_code if report_code is not None else "chunks"
+        return MinioEndpoints.chunks_shard.get_path(
+            version="v4",
+            repo_hash=self.storage_hash,
+            commitid=commit_sha,
+            chunks_file_name=chunks_file_name,
+            shard_id=shard_id,
+        )
+
     @sentry_sdk.trace
     def read_file(self, path: str) -> bytes:
         """
@@ -179,3 +208,20 @@ class ArchiveService(object):
         )
 
         return self.read_file(path).decode(errors="replace")
+
+
+@contextmanager
+def gzip_to_file(pieces: Iterable[bytes]) -> Iterator[IO[bytes]]:
+    """
+    Compresses the `pieces` incrementally into a temporary file, which is passed
+    to `ArchiveService.write_file` with `is_already_gzipped=True`.
+    Only a small buffer of the uncompressed data is ever held in memory.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOLED_FILE_MAX_SIZE) as buffer:
+        with gzip.GzipFile(
+            fileobj=buffer, mode="wb", compresslevel=GZIP_COMPRESSION_LEVEL
+        ) as gzip_file:
+            for piece in pieces:
+                gzip_file.write(piece)
+        buffer.seek(0)
+        yield buffer
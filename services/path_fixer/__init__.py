@@ -1,19 +1,62 @@
+import hashlib
 import logging
 import os.path
+import threading
+from collections import OrderedDict
 from pathlib import PurePosixPath, PureWindowsPath
-from typing import Sequence
+from typing import Iterable, Sequence
 
+import orjson
 import sentry_sdk
+from shared.config import get_config
 from shared.yaml import UserYaml
 
-from helpers.pathmap import Tree
+from helpers.pathmap import Tree, relpath
 from services.path_fixer.fixpaths import remove_known_bad_paths
 from services.path_fixer.user_path_fixes import UserPathFixes
-from services.path_fixer.user_path_includes import UserPathIncludes
+from services.path_fixer.user_path_includes import get_user_path_includes
 from services.yaml import read_yaml_field
 
 log = logging.getLogger(__name__)
 
+DEFAULT_TREE_CACHE_SIZE = 2
+
+# The `Tree`s of the most recently used tocs, keyed by a hash of the toc.
+_tree_cache: OrderedDict[str, Tree] = OrderedDict()
+_tree_cache_lock = threading.Lock()
+
+
+def get_toc_tree(toc: list[str]) -> Tree:
+    """
+    Returns the `Tree` of `toc`.
+
+    All the uploads of a commit usually carry the same toc, which is expensive
+    to build a `Tree` of, so the trees of the last few tocs are kept around.
+    """
+    cache_size = get_config(
+        "setup",
+        "upload_processing",
+        "toc_tree_cache_size",
+        default=DEFAULT_TREE_CACHE_SIZE,
+    )
+    if not cache_size:
+        return Tree(toc)
+
+    # paths in the toc are separated by newlines, so they can not contain any
+    key = hashlib.sha256("\n".join(toc).encode(errors="surrogateescape")).hexdigest()
+    with _tree_cache_lock:
+        tree = _tree_cache.get(key)
+        if tree is not None:
+            _tree_cache.move_to_end(key)
+            return tree
+
+    tree = Tree(toc)
+    with _tree_cache_lock:
+        _tree_cache[key] = tree
+        while len(_tree_cache) > cache_size:
+            _tree_cache.popitem(last=False)
+    return tree
+
 
 def invert_pattern(string: str) -> str:
     if string.startswith("!"):
@@ -83,17 +126,21 @@ class PathFixer(object):
         self.should_disable_default_pathfixes = should_disable_default_pathfixes
 
         self.custom_fixes = UserPathFixes(self.yaml_fixes)
-        self.path_matcher = UserPathIncludes(self.path_patterns)
+        self.path_matcher = get_user_path_includes(frozenset(self.path_patterns))
 
         if self.toc and not should_disable_default_pathfixes:
-            self.tree = Tree(self.toc)
+            self.tree = get_toc_tree(self.toc)
         else:
             self.tree = None
 
+        # the results of `clean_path`, shared by all the `BasePathAwarePathFixer`s
+        # of this path fixer, and thus by all the files of an upload
+        self._cleaned_paths: dict[str, str | None] = {}
+
     def clean_path(self, path: str | None) -> str | None:
         if not path:
             return None
-        path = os.path.relpath(path.replace("\\", "/").lstrip("./").lstrip("../"))
+        path = relpath(path.replace("\\", "/").lstrip("./").lstrip("../"))
         if self.yaml_fixes:
             # applies pre
             path = self.custom_fixes(path, False)
@@ -112,7 +159,34 @@ class PathFixer(object):
         return path
 
     def __call__(self, path: str, bases_to_try=None) -> str | None:
-        return self.clean_path(path)
+        if not path:
+            return None
+        try:
+            return self._cleaned_paths[path]
+        except KeyError:
+            result = self._cleaned_paths[path] = self.clean_path(path)
+            return result
+
+    def resolve_paths(
+        self, paths: Iterable[str], bases_to_try: Sequence[str] | None = None
+    ) -> dict[str, str | None]:
+        """
+        Fixes all the `paths` of a report in one go, returning a mapping of each
+        path to its fixed path, or `None` if it should not be included.
+        """
+        return {path: self(path, bases_to_try) for path in dict.fromkeys(paths)}
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hash of all the inputs that determine how paths are fixed.
+        """
+        inputs = [
+            self.yaml_fixes,
+            sorted(self.path_patterns),
+            self.toc,
+            bool(self.should_disable_default_pathfixes),
+        ]
+        return hashlib.sha256(orjson.dumps(inputs)).hexdigest()
 
     def get_relative_path_aware_pathfixer(self, base_path) -> "BasePathAwarePathFixer":
         return BasePathAwarePathFixer(original_path_fixer=self, base_path=base_path)
@@ -1,4 +1,9 @@
 import re
+from typing import Iterable
+
+# Backreferences and conditional groups refer to groups by their number or name,
+# which would change when combining the pattern with others.
+BACKREFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
 
 
 def regexp_match_one(regexp_patterns: list[re.Pattern], path: str) -> bool:
@@ -6,3 +11,39 @@ def regexp_match_one(regexp_patterns: list[re.Pattern], path: str) -> bool:
         if pattern.match(path):
             return True
     return False
+
+
+def compile_patterns(patterns: Iterable[str]) -> list[re.Pattern]:
+    """
+    Compiles the `patterns` for use with `regexp_match_one`.
+
+    Instead of one regex per pattern, the patterns are combined into a single
+    alternation, which matches if any of the patterns matches. Patterns which
+    can not be combined are compiled on their own, as are all of them if the
+    alternation is invalid (for example because of duplicate group names).
+    """
+    combinable, separate = [], []
+    for pattern in sorted(set(patterns)):
+        if BACKREFERENCE_RE.search(pattern) or not _is_nestable(pattern):
+            separate.append(pattern)
+        else:
+            combinable.append(pattern)
+
+    compiled = [re.compile(p) for p in separate]
+    if len(combinable) > 1:
+        try:
+            combined = re.compile("|".join(f"(?:{p})" for p in combinable))
+        except re.error:
+            pass
+        else:
+            return [combined, *compiled]
+    return [re.compile(p) for p in combinable] + compiled
+
+
+def _is_nestable(pattern: str) -> bool:
+    # some patterns (like ones with global flags) are not valid within a group
+    try:
+        re.compile(f"(?:{pattern})")
+    except re.error:
+        return False
+    return True
@@ -156,6 +156,22 @@ class TestBasePathAwarePathFixer(object):
             PureWindowsPath("C:\\windows_base_path")
         ]
 
+    def test_basepath_shares_resolved_paths(self, mocker):
+        toc = ["project/__init__.py", "tests/__init__.py", "tests/test_project.py"]
+        pf = PathFixer.init_from_user_yaml({}, toc, [])
+        clean_path = mocker.spy(pf, "clean_path")
+
+        for coverage_file in ["/first/coverage.xml", "/second/coverage.xml"]:
+            base_aware_pf = pf.get_relative_path_aware_pathfixer(coverage_file)
+            assert base_aware_pf.resolve_paths(
+                ["tests/__init__.py", "project/__init__.py", "tests/__init__.py"]
+            ) == {
+                "tests/__init__.py": "tests/__init__.py",
+                "project/__init__.py": "project/__init__.py",
+            }
+
+        assert clean_path.call_count == 2
+
 
 def test_ambiguous_paths():
     toc = [
@@ -177,3 +193,22 @@ def test_ambiguous_paths():
 
     assert pf(file_name) is None
     assert base_aware_pf(file_name, bases_to_try=bases_to_try) is None
+
+
+def test_toc_tree_is_cached(mock_configuration):
+    toc = ["project/__init__.py", "tests/__init__.py"]
+    pf = PathFixer.init_from_user_yaml({}, toc, [])
+    other_pf = PathFixer.init_from_user_yaml({}, list(toc), [])
+    assert other_pf.tree is pf.tree
+    assert other_pf("__init__.py") is None
+
+    # the least recently used trees are evicted
+    PathFixer.init_from_user_yaml({}, ["a.py"], [])
+    PathFixer.init_from_user_yaml({}, ["b.py"], [])
+    assert PathFixer.init_from_user_yaml({}, toc, []).tree is not pf.tree
+
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"toc_tree_cache_size": 0}}}
+    )
+    pf = PathFixer.init_from_user_yaml({}, toc, [])
+    assert PathFixer.init_from_user_yaml({}, toc, []).tree is not pf.tree
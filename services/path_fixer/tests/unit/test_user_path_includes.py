@@ -1,4 +1,7 @@
-from services.path_fixer.user_path_includes import UserPathIncludes
+from services.path_fixer.user_path_includes import (
+    UserPathIncludes,
+    get_user_path_includes,
+)
 from test_utils.base import BaseTestCase
 
 
@@ -28,3 +31,48 @@ class TestUserPathIncludes(BaseTestCase):
         assert upi("normal/sample/path/file.py")
         assert upi("normal/sample/path/file.pyc")
         assert not upi("any/to/file.cpp")
+
+    def test_user_path_many_patterns(self):
+        path_patterns = [f"!^src/generated_{i}/.*" for i in range(200)]
+        path_patterns += ["^src/.*", "^lib/(a|b)/\\1/.*", "!(?i)src/docs/.*"]
+        upi = UserPathIncludes(path_patterns)
+        # the patterns are combined, apart from the backreference and global flag
+        assert len(upi.includes) == 2
+        assert len(upi.excludes) == 2
+        assert upi("src/app/file.py")
+        assert not upi("src/generated_199/file.py")
+        assert upi("src/generated_200/file.py")
+        assert upi("lib/a/a/file.py")
+        assert not upi("lib/a/b/file.py")
+        assert not upi("src/DOCS/file.py")
+        assert not upi("any/to/file.cpp")
+        assert not upi("")
+
+    def test_user_path_duplicate_group_names(self):
+        upi = UserPathIncludes(["(?P<d>src)/.*", "(?P<d>lib)/.*"])
+        assert len(upi.includes) == 2
+        assert upi("src/file.py")
+        assert upi("lib/file.py")
+        assert not upi("any/to/file.cpp")
+
+    def test_user_path_conditional_group(self):
+        upi = UserPathIncludes(["^src/.*", "^(<)?lib/(?(1)>|a)/.*"])
+        # the conditional refers to group 1, which would change when combined
+        assert len(upi.includes) == 2
+        assert upi("src/file.py")
+        assert upi("lib/a/file.py")
+        assert upi("<lib/>/file.py")
+        assert not upi("<lib/a/file.py")
+        assert not upi("lib/>/file.py")
+
+    def test_user_path_decisions_are_memoized(self):
+        upi = UserPathIncludes(["!^src/.*"])
+        assert not upi("src/file.py")
+        upi.excludes = []
+        assert not upi("src/file.py")
+        assert upi("lib/file.py")
+
+    def test_get_user_path_includes(self):
+        upi = get_user_path_includes(frozenset(["!^src/.*"]))
+        assert get_user_path_includes(frozenset(["!^src/.*"])) is upi
+        assert not upi("src/file.py")
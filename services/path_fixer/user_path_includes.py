@@ -1,6 +1,10 @@
 import re
+from functools import lru_cache
 
-from services.path_fixer.match import regexp_match_one
+from services.path_fixer.match import compile_patterns, regexp_match_one
+
+# The maximum number of memoized decisions of a `UserPathIncludes`.
+MAX_MEMOIZED_DECISIONS = 20_000
 
 
 class UserPathIncludes:
@@ -29,6 +33,7 @@ class UserPathIncludes:
         self.include_all = False
         self.excludes = []
         self.exclude_all = False
+        self._decisions: dict[str, bool] = {}
 
         if not self.path_patterns:
             return
@@ -45,16 +50,27 @@ class UserPathIncludes:
             self.include_all = True
         else:
             self.include_all = False
-            self.includes = [re.compile(i) for i in includes]
+            self.includes = compile_patterns(includes)
 
         if "!.*" in self.path_patterns:
             self.exclude_all = False
         else:
-            self.excludes = [re.compile(e[1:]) for e in excludes]
+            self.excludes = compile_patterns(e[1:] for e in excludes)
 
     def __call__(self, value: str) -> bool:
         if not self.path_patterns:
             return True
+        try:
+            return self._decisions[value]
+        except KeyError:
+            pass
+        decision = self._decide(value)
+        if len(self._decisions) >= MAX_MEMOIZED_DECISIONS:
+            self._decisions.clear()
+        self._decisions[value] = decision
+        return decision
+
+    def _decide(self, value: str) -> bool:
         if value:
             if self.include_all:
                 # everything is included
@@ -72,3 +88,12 @@ class UserPathIncludes:
                     return True
             return False
         return False
+
+
+@lru_cache(maxsize=16)
+def get_user_path_includes(path_patterns: frozenset[str]) -> UserPathIncludes:
+    """
+    Returns the `UserPathIncludes` for `path_patterns`, reusing the compiled
+    patterns and memoized decisions for the same patterns across uploads.
+    """
+    return UserPathIncludes(set(path_patterns))
@@ -0,0 +1,233 @@
+"""
+A compact binary format for intermediate reports.
+
+Instead of the text `chunks` of `Report.serialize`, most lines of a report are
+stored in typed arrays, and decoded without going through any text:
+
+    header:   magic (4 bytes), format version (u8), metadata size (u32)
+    metadata: JSON of the report `sessions`, and per file its name,
+              the number of its simple lines and the size of its other lines
+    per file: the line numbers (i32), hits (i64), types (i8) and session ids (i32)
+              of its simple lines, followed by a JSON list of its other lines
+
+Simple lines are the ones with integer coverage and a single `LineSession`,
+without any branches, partials, complexity, messages or datapoints. All other
+lines are stored with all their fields in the JSON list.
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+import orjson
+from shared.reports.reportfile import ReportFile
+from shared.reports.resources import Report
+from shared.reports.types import CoverageDatapoint, LineSession, ReportLine
+from shared.utils.ReportEncoder import ReportEncoder
+
+MAGIC = b"CVIR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBI")
+
+# the line types stored as an index into this tuple
+SIMPLE_LINE_TYPES = (None, "b", "m")
+SIMPLE_LINE_TYPE_CODES = {
+    line_type: code for code, line_type in enumerate(SIMPLE_LINE_TYPES)
+}
+
+INT32_MAX = 2**31 - 1
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+def _is_simple_line(ln: int, line: ReportLine) -> bool:
+    if (
+        ln > INT32_MAX
+        or type(line.coverage) is not int
+        or not INT64_MIN <= line.coverage <= INT64_MAX
+        or line.type not in SIMPLE_LINE_TYPE_CODES
+        or line.messages is not None
+        or line.complexity is not None
+        or line.datapoints is not None
+        or not line.sessions
+        or len(line.sessions) != 1
+    ):
+        return False
+    session = line.sessions[0]
+    return (
+        type(session.id) is int
+        and 0 <= session.id <= INT32_MAX
+        and type(session.coverage) is int
+        and session.coverage == line.coverage
+        and session.branches is None
+        and session.partials is None
+        and session.complexity is None
+    )
+
+
+def _encode_line(ln: int, line: ReportLine) -> list:
+    return [
+        ln,
+        line.coverage,
+        line.type,
+        [
+            [s.id, s.coverage, s.branches, s.partials, s.complexity]
+            for s in line.sessions or []
+        ],
+        line.messages,
+        line.complexity,
+        [
+            [d.sessionid, d.coverage, d.coverage_type, d.label_ids]
+            for d in line.datapoints
+        ]
+        if line.datapoints is not None
+        else None,
+    ]
+
+
+def _decode_line(encoded: list) -> tuple[int, ReportLine]:
+    ln, coverage, line_type, sessions, messages, complexity, datapoints = encoded
+    return ln, ReportLine.create(
+        coverage=coverage,
+        type=line_type,
+        sessions=[
+            LineSession(
+                id=session_id,
+                coverage=session_coverage,
+                branches=branches,
+                partials=partials,
+                complexity=session_complexity,
+            )
+            for (
+                session_id,
+                session_coverage,
+                branches,
+                partials,
+                session_complexity,
+            ) in sessions
+        ],
+        messages=messages,
+        complexity=complexity,
+        datapoints=[
+            CoverageDatapoint(
+                sessionid=sessionid,
+                coverage=datapoint_coverage,
+                coverage_type=coverage_type,
+                label_ids=label_ids,
+            )
+            for sessionid, datapoint_coverage, coverage_type, label_ids in datapoints
+        ]
+        if datapoints is not None
+        else None,
+    )
+
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_report(report: Report) -> bytes:
+    """
+    Encodes `report` into the columnar format.
+
+    Raises a `TypeError` if any of the lines contains values that can not be
+    encoded as JSON.
+    """
+    files_metadata = []
+    body = []
+    for _file in report:
+        line_numbers, hits, types, session_ids = (
+            array("i"),
+            array("q"),
+            array("b"),
+            array("i"),
+        )
+        other_lines = []
+        for ln, line in _file.lines:
+            if _is_simple_line(ln, line):
+                line_numbers.append(ln)
+                hits.append(line.coverage)
+                types.append(SIMPLE_LINE_TYPE_CODES[line.type])
+                session_ids.append(line.sessions[0].id)
+            else:
+                other_lines.append(_encode_line(ln, line))
+
+        encoded_other_lines = orjson.dumps(other_lines)
+        files_metadata.append([_file.name, len(line_numbers), len(encoded_other_lines)])
+        body.extend(
+            (
+                _to_bytes(line_numbers),
+                _to_bytes(hits),
+                _to_bytes(types),
+                _to_bytes(session_ids),
+                encoded_other_lines,
+            )
+        )
+
+    metadata = json.dumps(
+        {"sessions": report.sessions, "files": files_metadata}, cls=ReportEncoder
+    ).encode()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata))
+    return b"".join((header, metadata, *body))
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def read(self, size: int) -> memoryview:
+        if self.offset + size > len(self.view):
+            raise ValueError("Columnar report is truncated")
+        chunk = self.view[self.offset : self.offset + size]
+        self.offset += size
+        return chunk
+
+    def read_array(self, typecode: str, count: int) -> array:
+        values = array(typecode)
+        values.frombytes(self.read(values.itemsize * count))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+
+def decode_report(data: bytes) -> Report:
+    """
+    Decodes a report encoded by `encode_report`.
+    """
+    reader = _Reader(data)
+    magic, version, metadata_size = HEADER.unpack(reader.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a columnar report")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar report version {version}")
+    metadata = orjson.loads(reader.read(metadata_size))
+
+    report = Report.from_chunks(chunks="", files={}, sessions=metadata["sessions"])
+    for name, simple_count, other_lines_size in metadata["files"]:
+        line_numbers = reader.read_array("i", simple_count)
+        hits = reader.read_array("q", simple_count)
+        types = reader.read_array("b", simple_count)
+        session_ids = reader.read_array("i", simple_count)
+        other_lines = orjson.loads(reader.read(other_lines_size))
+
+        _file = ReportFile(name)
+        for ln, coverage, type_code, session_id in zip(
+            line_numbers, hits, types, session_ids
+        ):
+            _file.append(
+                ln,
+                ReportLine.create(
+                    coverage=coverage,
+                    type=SIMPLE_LINE_TYPES[type_code],
+                    sessions=[LineSession(id=session_id, coverage=coverage)],
+                ),
+            )
+        for encoded_line in other_lines:
+            _file.append(*_decode_line(encoded_line))
+        report.append(_file)
+
+    return report
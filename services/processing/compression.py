@@ -0,0 +1,214 @@
+"""
+zstd compression of intermediate reports, using trained dictionaries.
+
+The `chunks` and `report_json` of different uploads share most of their
+structure, which a dictionary trained on sampled payloads captures much better
+than compressing each payload on its own. The dictionaries are trained with:
+
+    python -m services.processing.compression --samples 1000
+
+which stores them in the archive bucket, and prints their ids. They are then
+put to use per type of payload with:
+
+    setup:
+      upload_processing:
+        zstd_dictionaries:
+          chunks: 1234567890
+          report_json: 987654321
+
+Every compressed frame records the id of its dictionary in its header, so
+payloads are always decompressed with the dictionary they were compressed with,
+and dictionaries can be replaced at any time. Old dictionaries must be kept
+around for as long as payloads compressed with them might still be read.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from functools import lru_cache
+
+import shared.storage
+import zstandard
+from shared.config import get_config
+from shared.helpers.redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+DICTIONARY_PATH = "zstd-dictionaries/{dict_id}.zdict"
+DEFAULT_DICTIONARY_SIZE = 110 * 1024
+COMPRESSION_LEVEL = 3
+# How long to compress without a dictionary that failed to load, before trying again.
+DICTIONARY_RETRY_INTERVAL = 60
+
+# The dictionaries that failed to load, and when that happened.
+_failed_dictionaries: dict[int, float] = {}
+
+
+def _bucket() -> str:
+    return get_config("services", "minio", "bucket", default="archive")
+
+
+def dictionary_path(dict_id: int) -> str:
+    return DICTIONARY_PATH.format(dict_id=dict_id)
+
+
+@lru_cache(maxsize=16)
+def load_dictionary(dict_id: int) -> zstandard.ZstdCompressionDict:
+    storage = shared.storage.get_appropriate_storage_service()
+    dict_data = zstandard.ZstdCompressionDict(
+        storage.read_file(_bucket(), dictionary_path(dict_id))
+    )
+    dict_data.precompute_compress(level=COMPRESSION_LEVEL)
+    return dict_data
+
+
+def clear_dictionary_cache():
+    load_dictionary.cache_clear()
+    _failed_dictionaries.clear()
+
+
+def configured_dictionary(payload_type: str) -> zstandard.ZstdCompressionDict | None:
+    """
+    Returns the dictionary configured for `payload_type`, or `None` if there
+    is none, or it can not be loaded.
+
+    A dictionary that failed to load is not tried again for the next
+    `DICTIONARY_RETRY_INTERVAL` seconds, instead of hitting the storage for
+    every payload.
+    """
+    dict_id = get_config(
+        "setup", "upload_processing", "zstd_dictionaries", payload_type, default=None
+    )
+    if not dict_id:
+        return None
+    failed_at = _failed_dictionaries.get(dict_id)
+    if (
+        failed_at is not None
+        and time.monotonic() - failed_at < DICTIONARY_RETRY_INTERVAL
+    ):
+        return None
+    try:
+        dict_data = load_dictionary(dict_id)
+    except Exception:
+        log.warning(
+            "Failed to load zstd dictionary, compressing without it",
+            extra=dict(payload_type=payload_type, dict_id=dict_id),
+            exc_info=True,
+        )
+        _failed_dictionaries[dict_id] = time.monotonic()
+        return None
+    _failed_dictionaries.pop(dict_id, None)
+    return dict_data
+
+
+def compress(payload_type: str, data: bytes) -> tuple[bytes, bool]:
+    """
+    Compresses `data` with the dictionary configured for `payload_type`.
+
+    Returns the compressed data, and whether a dictionary was used.
+    """
+    dict_data = configured_dictionary(payload_type)
+    if dict_data is None:
+        return zstandard.compress(data, COMPRESSION_LEVEL), False
+    cctx = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dict_data)
+    return cctx.compress(data), True
+
+
+def compress_stream(payload_type: str, pieces: Iterable[bytes]) -> tuple[bytes, bool]:
+    """
+    Compresses the concatenation of `pieces` like `compress`, without ever
+    holding the uncompressed data in memory as a whole.
+    """
+    dict_data = configured_dictionary(payload_type)
+    cctx = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dict_data)
+    compressor = cctx.compressobj()
+    compressed = [compressor.compress(piece) for piece in pieces]
+    compressed.append(compressor.flush())
+    return b"".join(compressed), dict_data is not None
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompresses `data`, with the dictionary it was compressed with, if any.
+    """
+    frame_parameters = zstandard.get_frame_parameters(data)
+    if not frame_parameters.dict_id:
+        dctx = zstandard.ZstdDecompressor()
+    else:
+        dctx = zstandard.ZstdDecompressor(
+            dict_data=load_dictionary(frame_parameters.dict_id)
+        )
+    if frame_parameters.content_size == zstandard.CONTENTSIZE_UNKNOWN:
+        # frames written by `compress_stream` do not record their size
+        return dctx.decompressobj().decompress(data)
+    return dctx.decompress(data)
+
+
+def train_dictionary(
+    samples: list[bytes], dict_size: int = DEFAULT_DICTIONARY_SIZE
+) -> zstandard.ZstdCompressionDict:
+    return zstandard.train_dictionary(dict_size, samples, level=COMPRESSION_LEVEL)
+
+
+def save_dictionary(dict_data: zstandard.ZstdCompressionDict) -> int:
+    dict_id = dict_data.dict_id()
+    storage = shared.storage.get_appropriate_storage_service()
+    storage.write_file(_bucket(), dictionary_path(dict_id), dict_data.as_bytes())
+    return dict_id
+
+
+def sample_intermediate_reports(max_samples: int) -> dict[str, list[bytes]]:
+    """
+    Samples the payloads of up to `max_samples` of the intermediate reports
+    currently stored in redis, grouped by their type.
+    """
+    redis = get_redis_connection()
+    samples: dict[str, list[bytes]] = defaultdict(list)
+    for count, key in enumerate(
+        redis.scan_iter(match="intermediate-report/*", count=1000)
+    ):
+        if count >= max_samples:
+            break
+        for payload_type, data in redis.hgetall(key).items():
+            samples[payload_type.decode()].append(decompress(data))
+    return samples
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.processing.compression",
+        description="Trains zstd dictionaries on the current intermediate reports.",
+    )
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=DEFAULT_DICTIONARY_SIZE)
+    args = parser.parse_args(argv)
+
+    dictionaries = {}
+    for payload_type, samples in sample_intermediate_reports(args.samples).items():
+        try:
+            dict_data = train_dictionary(samples, args.size)
+        except zstandard.ZstdError:
+            log.warning(
+                "Failed to train zstd dictionary, not enough samples?",
+                extra=dict(payload_type=payload_type, samples=len(samples)),
+                exc_info=True,
+            )
+            continue
+        dictionaries[payload_type] = save_dictionary(dict_data)
+        log.info(
+            "Trained zstd dictionary",
+            extra=dict(
+                payload_type=payload_type,
+                dict_id=dictionaries[payload_type],
+                samples=len(samples),
+            ),
+        )
+    sys.stdout.write(json.dumps(dictionaries) + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
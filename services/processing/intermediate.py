@@ -1,60 +1,176 @@
+import logging
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import orjson
 import sentry_sdk
-import zstandard
+from shared.config import get_config
 from shared.helpers.redis import get_redis_connection
 from shared.reports.resources import Report
 
+from services.report.streaming import (
+    StreamingReportSerializer,
+    is_streaming_serialize_enabled,
+)
+
+from .columnar_report import decode_report, encode_report
+from .compression import compress, compress_stream, decompress
 from .metrics import INTERMEDIATE_REPORT_SIZE
-from .types import IntermediateReport
+from .types import IntermediateReport, ProcessingResult
+
+log = logging.getLogger(__name__)
 
 REPORT_TTL = 24 * 60 * 60
+DEFAULT_DECODE_THREADS = 4
 
 
 @sentry_sdk.trace
-def load_intermediate_reports(upload_ids: list[int]) -> list[IntermediateReport]:
+def load_intermediate_reports(upload_ids: list[int]) -> Iterator[IntermediateReport]:
+    """
+    Loads the intermediate reports of `upload_ids`, in order.
+
+    All the reports are fetched with a single redis pipeline. They are then
+    decompressed and parsed in a thread pool, a few reports ahead of the
+    consumer of the returned iterator, so that it can start merging the first
+    reports while later ones are still being decoded, and does not have to hold
+    all of them in memory at once.
+    """
     redis = get_redis_connection()
-    dctx = zstandard.ZstdDecompressor()
-    intermediate_reports: list[IntermediateReport] = []
-
-    for upload_id in upload_ids:
-        key = intermediate_report_key(upload_id)
-        report_dict: dict = redis.hgetall(key)
-        if not report_dict:
-            intermediate_reports.append(IntermediateReport(upload_id, Report()))
-            continue
-
-        # NOTE: our redis client is configured to return `bytes` everywhere,
-        # so the dict keys are `bytes` as well.
-        chunks = dctx.decompress(report_dict[b"chunks"]).decode(errors="replace")
-        report_json = orjson.loads(dctx.decompress(report_dict[b"report_json"]))
-
-        report = Report.from_chunks(
-            chunks=chunks,
-            files=report_json["files"],
-            sessions=report_json["sessions"],
-            totals=report_json.get("totals"),
-        )
-        intermediate_reports.append(IntermediateReport(upload_id, report))
-
-    return intermediate_reports
+    with redis.pipeline(transaction=False) as pipeline:
+        for upload_id in upload_ids:
+            pipeline.hgetall(intermediate_report_key(upload_id))
+        report_dicts: list[dict] = pipeline.execute()
+
+    threads = get_config(
+        "setup",
+        "upload_processing",
+        "intermediate_report_decode_threads",
+        default=DEFAULT_DECODE_THREADS,
+    )
+    if threads <= 0:
+        return map(_decode_intermediate_report, upload_ids, report_dicts)
+    return _decode_intermediate_reports(upload_ids, report_dicts, threads)
+
+
+def _decode_intermediate_reports(
+    upload_ids: list[int], report_dicts: list[dict], threads: int
+) -> Iterator[IntermediateReport]:
+    with ThreadPoolExecutor(
+        max_workers=threads, thread_name_prefix="intermediate-report"
+    ) as executor:
+        pending: deque[Future[IntermediateReport]] = deque()
+        for upload_id, report_dict in zip(upload_ids, report_dicts):
+            pending.append(
+                executor.submit(_decode_intermediate_report, upload_id, report_dict)
+            )
+            if len(pending) > threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _decode_intermediate_report(
+    upload_id: int, report_dict: dict
+) -> IntermediateReport:
+    if not report_dict:
+        return IntermediateReport(upload_id, Report())
+
+    # NOTE: our redis client is configured to return `bytes` everywhere,
+    # so the dict keys are `bytes` as well.
+    if columnar := report_dict.get(b"columnar"):
+        report = decode_report(decompress(columnar))
+        return IntermediateReport(upload_id, report)
+
+    chunks = decompress(report_dict[b"chunks"]).decode(errors="replace")
+    report_json = orjson.loads(decompress(report_dict[b"report_json"]))
+
+    report = Report.from_chunks(
+        chunks=chunks,
+        files=report_json["files"],
+        sessions=report_json["sessions"],
+        totals=report_json.get("totals"),
+    )
+    return IntermediateReport(upload_id, report)
 
 
 @sentry_sdk.trace
-def save_intermediate_report(upload_id: int, report: Report):
-    report_json, chunks, _totals = report.serialize(with_totals=False)
-    zstd_report_json, zstd_chunks = emit_size_metrics(report_json, chunks)
+def save_intermediate_report(upload_id: int, report: Report) -> int:
+    """
+    Stores the intermediate `report` of the upload.
+
+    Returns the uncompressed size of the stored report, which is a proxy for
+    how much memory it takes up once loaded again.
+    """
+    serialized = None
+    if get_config(
+        "setup", "upload_processing", "columnar_intermediate_reports", default=False
+    ):
+        serialized = _serialize_columnar(report)
+    if serialized is None and is_streaming_serialize_enabled():
+        serialized = _serialize_streaming(report)
+    if serialized is None:
+        report_json, chunks, _totals = report.serialize(with_totals=False)
+        zstd_report_json, zstd_chunks = emit_size_metrics(report_json, chunks)
+        mapping = {
+            "report_json": zstd_report_json,
+            "chunks": zstd_chunks,
+        }
+        report_size = len(report_json) + len(chunks)
+    else:
+        mapping, report_size = serialized
 
     report_key = intermediate_report_key(upload_id)
     redis = get_redis_connection()
-    mapping = {
-        "report_json": zstd_report_json,
-        "chunks": zstd_chunks,
-    }
     with redis.pipeline() as pipeline:
         pipeline.hmset(report_key, mapping)
         pipeline.expire(report_key, REPORT_TTL)
         pipeline.execute()
-    return
+    return report_size
+
+
+def _serialize_columnar(report: Report) -> tuple[dict[str, bytes], int] | None:
+    try:
+        columnar = encode_report(report)
+    except TypeError:
+        log.warning(
+            "Failed to encode columnar intermediate report, using chunks instead",
+            exc_info=True,
+        )
+        return None
+
+    zstd_columnar = _compress_with_metrics("columnar", columnar)
+    return {"columnar": zstd_columnar}, len(columnar)
+
+
+def _serialize_streaming(report: Report) -> tuple[dict[str, bytes], int]:
+    serializer = StreamingReportSerializer(report)
+    zstd_chunks = _compress_stream_with_metrics("chunks", serializer)
+    report_json = serializer.report_json(with_totals=False)
+    zstd_report_json = _compress_with_metrics("report_json", report_json)
+    mapping = {"report_json": zstd_report_json, "chunks": zstd_chunks}
+    return mapping, len(report_json) + serializer.size
+
+
+def save_processing_result(upload_id: int, result: ProcessingResult):
+    """
+    Stores the `ProcessingResult` of an upload, so that the upload can be merged
+    by the finisher of any batch, not only by the one it was processed for.
+    """
+    redis = get_redis_connection()
+    redis.set(processing_result_key(upload_id), orjson.dumps(result), ex=REPORT_TTL)
+
+
+def load_processing_results(upload_ids: list[int]) -> list[ProcessingResult]:
+    """
+    Loads the stored `ProcessingResult`s of `upload_ids`, skipping the uploads
+    without any.
+    """
+    if not upload_ids:
+        return []
+    redis = get_redis_connection()
+    results = redis.mget([processing_result_key(upload_id) for upload_id in upload_ids])
+    return [orjson.loads(result) for result in results if result]
 
 
 @sentry_sdk.trace
@@ -62,6 +178,7 @@ def cleanup_intermediate_reports(
     upload_ids: list[int],
 ):
     keys = [intermediate_report_key(upload_id) for upload_id in upload_ids]
+    keys.extend(processing_result_key(upload_id) for upload_id in upload_ids)
     redis = get_redis_connection()
     redis.delete(*keys)
     return
@@ -71,22 +188,35 @@ def intermediate_report_key(upload_id: int):
     return f"intermediate-report/{upload_id}"
 
 
+def processing_result_key(upload_id: int):
+    return f"processing-result/{upload_id}"
+
+
 def emit_size_metrics(report_json: bytes, chunks: bytes) -> tuple[bytes, bytes]:
-    INTERMEDIATE_REPORT_SIZE.labels(type="report_json", compression="none").observe(
-        len(report_json)
-    )
-    INTERMEDIATE_REPORT_SIZE.labels(type="chunks", compression="none").observe(
-        len(chunks)
-    )
+    zstd_report_json = _compress_with_metrics("report_json", report_json)
+    zstd_chunks = _compress_with_metrics("chunks", chunks)
+    return zstd_report_json, zstd_chunks
 
-    zstd_report_json = zstandard.compress(report_json)
-    zstd_chunks = zstandard.compress(chunks)
 
-    INTERMEDIATE_REPORT_SIZE.labels(type="report_json", compression="zstd").observe(
-        len(zstd_report_json)
+def _compress_with_metrics(payload_type: str, data: bytes) -> bytes:
+    INTERMEDIATE_REPORT_SIZE.labels(type=payload_type, compression="none").observe(
+        len(data)
     )
-    INTERMEDIATE_REPORT_SIZE.labels(type="chunks", compression="zstd").observe(
-        len(zstd_chunks)
+    compressed, used_dictionary = compress(payload_type, data)
+    INTERMEDIATE_REPORT_SIZE.labels(
+        type=payload_type, compression="zstd_dict" if used_dictionary else "zstd"
+    ).observe(len(compressed))
+    return compressed
+
+
+def _compress_stream_with_metrics(
+    payload_type: str, serializer: StreamingReportSerializer
+) -> bytes:
+    compressed, used_dictionary = compress_stream(payload_type, serializer.chunks())
+    INTERMEDIATE_REPORT_SIZE.labels(type=payload_type, compression="none").observe(
+        serializer.size
     )
-
-    return zstd_report_json, zstd_chunks
+    INTERMEDIATE_REPORT_SIZE.labels(
+        type=payload_type, compression="zstd_dict" if used_dictionary else "zstd"
+    ).observe(len(compressed))
+    return compressed
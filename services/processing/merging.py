@@ -1,10 +1,12 @@
 import functools
 import logging
+from collections.abc import Callable, Iterable
 from decimal import Decimal
 
 import sentry_sdk
 from shared.reports.enums import UploadState
 from shared.reports.resources import Report, ReportTotals
+from shared.utils.sessions import SessionType
 from shared.yaml import UserYaml
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session as DbSession
@@ -12,7 +14,10 @@ from sqlalchemy.orm import Session as DbSession
 from database.models.reports import Upload, UploadError, UploadLevelTotals
 from helpers.number import precise_round
 from services.report import delete_uploads_by_sessionid
-from services.report.raw_upload_processor import clear_carryforward_sessions
+from services.report.raw_upload_processor import (
+    PairwiseMerger,
+    clear_carryforward_sessions,
+)
 from services.yaml.reader import read_yaml_field
 
 from .types import IntermediateReport, MergeResult, ProcessingResult
@@ -24,21 +29,44 @@ log = logging.getLogger(__name__)
 def merge_reports(
     commit_yaml: UserYaml,
     master_report: Report,
-    intermediate_reports: list[IntermediateReport],
+    intermediate_reports: Iterable[IntermediateReport],
+    load_files: Callable[[Report, Iterable[str] | None], None] | None = None,
 ) -> tuple[Report, MergeResult]:
+    """
+    Merges the `intermediate_reports` into the `master_report`.
+
+    The `intermediate_reports` are consumed one by one, so they can be loaded
+    lazily. Consecutive `joined` reports are merged with each other as they
+    arrive, so only a logarithmic number of them is retained at any time.
+
+    If the `master_report` is only partially loaded, `load_files` is called to
+    load the given files (or all of them with `None`) into the `master_report`
+    before they are being merged into.
+    """
     session_mapping: dict[int, int] = dict()
     deleted_sessions: set[int] = set()
+    upload_totals: dict[int, ReportTotals] = dict()
+    # consecutive `joined` reports are merged with each other first, and only
+    # merged into the `master_report` once a non-`joined` report follows.
+    joined_reports = PairwiseMerger()
 
     for intermediate_report in intermediate_reports:
         report = intermediate_report.report
+        upload_totals[intermediate_report.upload_id] = report.totals
         if report.is_empty():
             continue
+        if load_files is not None:
+            load_files(master_report, report.files)
 
         old_sessionid = next(iter(report.sessions))
         new_sessionid = master_report.next_session_number()
         session_mapping[intermediate_report.upload_id] = new_sessionid
 
-        if master_report.is_empty() and old_sessionid == new_sessionid:
+        if (
+            master_report.is_empty()
+            and not joined_reports
+            and old_sessionid == new_sessionid
+        ):
             # if the master report is empty, we can avoid a costly merge operation
             master_report = report
             continue
@@ -52,15 +80,45 @@ def merge_reports(
 
         joined = True
         if flags := session.flags:
+            if load_files is not None and _has_carriedforward_sessions(
+                master_report, flags
+            ):
+                # clearing carried forward sessions touches all the files
+                load_files(master_report, None)
+            # this only ever removes carried forward sessions from the `master_report`,
+            # which the not yet merged `joined_reports` do not have any coverage for.
             session_adjustment = clear_carryforward_sessions(
                 master_report, report, flags, commit_yaml
             )
             deleted_sessions.update(session_adjustment.fully_deleted_sessions)
             joined = get_joined_flag(commit_yaml, flags)
 
+        if joined:
+            joined_reports.add(report)
+            continue
+
+        _merge_joined_reports(master_report, joined_reports)
         master_report.merge(report, joined)
 
-    return master_report, MergeResult(session_mapping, deleted_sessions)
+    _merge_joined_reports(master_report, joined_reports)
+
+    return master_report, MergeResult(session_mapping, deleted_sessions, upload_totals)
+
+
+def _has_carriedforward_sessions(report: Report, flags: list[str]) -> bool:
+    return any(
+        session.session_type == SessionType.carriedforward
+        and set(session.flags or []) & set(flags)
+        for session in report.sessions.values()
+    )
+
+
+def _merge_joined_reports(master_report: Report, reports: PairwiseMerger) -> None:
+    """
+    Merges the `joined` `reports` into the `master_report`, emptying the merger.
+    """
+    if report := reports.finish():
+        master_report.merge(report)
 
 
 @sentry_sdk.trace
@@ -68,7 +126,6 @@ def update_uploads(
     db_session: DbSession,
     commit_yaml: UserYaml,
     processing_results: list[ProcessingResult],
-    intermediate_reports: list[IntermediateReport],
     merge_result: MergeResult,
 ):
     """
@@ -94,8 +151,6 @@ def update_uploads(
     rounding: str = read_yaml_field(commit_yaml, ("coverage", "round"), "nearest")
     make_totals = functools.partial(make_upload_totals, precision, rounding)
 
-    reports = {ir.upload_id: ir.report for ir in intermediate_reports}
-
     # then, update all the `Upload`s with their state, and the final `order_number`,
     # as well as add a `UploadLevelTotals` or `UploadError`s where appropriate.
     all_errors: list[UploadError] = []
@@ -109,9 +164,9 @@ def update_uploads(
                 "state_id": UploadState.PROCESSED.db_id,
                 "state": "processed",
             }
-            report = reports.get(upload_id)
-            if report is not None:
-                all_totals.append(make_totals(upload_id, report.totals))
+            totals = merge_result.upload_totals.get(upload_id)
+            if totals is not None:
+                all_totals.append(make_totals(upload_id, totals))
         elif result["error"]:
             update = {
                 "state_id": UploadState.ERROR.db_id,
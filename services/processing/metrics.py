@@ -24,7 +24,7 @@ PYREPORT_CHUNKS_FILE_SIZE = Histogram(
 
 INTERMEDIATE_REPORT_SIZE = Histogram(
     "worker_intermediate_report_size",
-    "Size (in bytes) of a serialized intermediate report. The `type` can be `report_json` or `chunks`.",
+    "Size (in bytes) of a serialized intermediate report. The `type` can be `report_json`, `chunks` or `columnar`, and the `compression` can be `none`, `zstd` or `zstd_dict`.",
     ["type", "compression"],
     buckets=BYTE_SIZE_BUCKETS,
 )
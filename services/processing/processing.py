@@ -13,7 +13,7 @@ from services.archive import ArchiveService
 from services.report import ProcessingError, RawReportInfo, ReportService
 from services.report.parser.types import VersionOneParsedRawReport
 
-from .intermediate import save_intermediate_report
+from .intermediate import save_intermediate_report, save_processing_result
 from .state import ProcessingState
 from .types import ProcessingResult, UploadArguments
 
@@ -65,9 +65,11 @@ def process_upload(
             result["successful"] = True
         log.info("Finished processing upload", extra={"result": result})
 
+        report_size = None
         if processing_result.report:
-            save_intermediate_report(upload_id, processing_result.report)
-        state.mark_upload_as_processed(upload_id)
+            report_size = save_intermediate_report(upload_id, processing_result.report)
+        save_processing_result(upload_id, result)
+        state.mark_upload_as_processed(upload_id, report_size)
 
         rewrite_or_delete_upload(archive_service, commit_yaml, report_info)
 
@@ -16,17 +16,39 @@ meaning that:
   only happens once for a commit.
 - merging should happen in batches, as that involves loading a bunch of "intermediate report"s
   into memory, which should be bounded.
+  The batches are sized by the recorded sizes of the "intermediate report"s, so that many
+  small uploads are merged at once, while a few huge uploads do not exceed the memory budget.
 - (ideally in the future) an upload that has been processed into an "intermediate report"
   should be merged directly into the "master report" without doing a storage roundtrip for that
   "intermediate report".
+  In "direct merge" mode, the finisher holding the report lock keeps merging all the uploads
+  that finish processing in the meantime into the "master report" it has loaded, and only
+  writes it back to storage once.
 """
 
 from dataclasses import dataclass
 
+from shared.config import get_config
 from shared.helpers.redis import get_redis_connection
 from shared.metrics import Counter
 
+from helpers.metrics import MiB
+
 MERGE_BATCH_SIZE = 10
+"""
+The number of uploads merged in one batch, if their sizes are unknown.
+"""
+
+MAX_MERGE_BATCH_SIZE = 100
+"""
+The maximum number of uploads merged in one batch, no matter how small they are.
+"""
+
+DEFAULT_MERGE_MEMORY_BUDGET = 100 * MiB
+"""
+The default for the combined (serialized) size of the "intermediate report"s
+merged in one batch.
+"""
 
 CLEARED_UPLOADS = Counter(
     "worker_processing_cleared_uploads",
@@ -47,6 +69,21 @@ class UploadNumbers:
     and are waiting on being merged into the "master report".
     """
 
+    processed_size: int | None = None
+    """
+    The combined (estimated) size of the "intermediate report"s of the processed
+    uploads, if requested from `get_upload_numbers`.
+    """
+
+
+def get_merge_memory_budget() -> int:
+    return get_config(
+        "setup",
+        "upload_processing",
+        "merge_memory_budget",
+        default=DEFAULT_MERGE_MEMORY_BUDGET,
+    )
+
 
 def should_perform_merge(uploads: UploadNumbers) -> bool:
     """
@@ -54,8 +91,45 @@ def should_perform_merge(uploads: UploadNumbers) -> bool:
 
     This is the case when no more uploads are expected,
     or we reached the desired batch size for merging.
+    Without a `processed_size`, the batch size is a fixed number of uploads.
     """
-    return uploads.processing == 0 or uploads.processed >= MERGE_BATCH_SIZE
+    if uploads.processing == 0:
+        return True
+    if uploads.processed_size is None:
+        return uploads.processed >= MERGE_BATCH_SIZE
+    return (
+        uploads.processed_size >= get_merge_memory_budget()
+        or uploads.processed >= MAX_MERGE_BATCH_SIZE
+    )
+
+
+def _estimated_sizes(sizes: list[bytes | None], budget: int) -> list[int]:
+    # uploads without a recorded size are assumed to take up an equal share
+    # of a batch of `MERGE_BATCH_SIZE` uploads
+    unknown_size = budget // MERGE_BATCH_SIZE
+    return [int(size) if size is not None else unknown_size for size in sizes]
+
+
+def _split_into_batches(
+    upload_ids: list[int], sizes: list[int], budget: int
+) -> list[list[int]]:
+    """
+    Splits the `upload_ids` in order into batches whose combined size fits
+    into the memory budget, though every batch has at least one upload
+    so that huge uploads make progress as well.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    batch_size = 0
+    for upload_id, size in zip(upload_ids, sizes):
+        if batch and (batch_size + size > budget or len(batch) >= MAX_MERGE_BATCH_SIZE):
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append(upload_id)
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
 
 
 def should_trigger_postprocessing(uploads: UploadNumbers) -> bool:
@@ -75,10 +149,21 @@ class ProcessingState:
         self.repoid = repoid
         self.commitsha = commitsha
 
-    def get_upload_numbers(self):
+    def get_upload_numbers(self, with_size: bool = False):
+        """
+        Returns the number of processing and processed uploads.
+
+        `with_size` also sums up the recorded sizes of the processed uploads,
+        which is only needed when sizing merge batches.
+        """
         processing = self._redis.scard(self._redis_key("processing"))
-        processed = self._redis.scard(self._redis_key("processed"))
-        return UploadNumbers(processing, processed)
+        if not with_size:
+            processed = self._redis.scard(self._redis_key("processed"))
+            return UploadNumbers(processing, processed)
+
+        processed_uploads, sizes = self._get_processed_uploads_with_sizes()
+        processed_size = sum(_estimated_sizes(sizes, get_merge_memory_budget()))
+        return UploadNumbers(processing, len(processed_uploads), processed_size)
 
     def mark_uploads_as_processing(self, upload_ids: list[int]):
         self._redis.sadd(self._redis_key("processing"), *upload_ids)
@@ -92,7 +177,13 @@ class ProcessingState:
             # this to be triggered often, if at all.
             CLEARED_UPLOADS.inc(removed_uploads)
 
-    def mark_upload_as_processed(self, upload_id: int):
+    def mark_upload_as_processed(self, upload_id: int, report_size: int | None = None):
+        """
+        Marks the upload as processed, recording the `report_size` of its
+        "intermediate report" to size the merge batches.
+        """
+        if report_size is not None:
+            self._redis.hset(self._redis_key("sizes"), upload_id, report_size)
         res = self._redis.smove(
             self._redis_key("processing"), self._redis_key("processed"), upload_id
         )
@@ -104,15 +195,62 @@ class ProcessingState:
             self._redis.sadd(self._redis_key("processed"), upload_id)
 
     def mark_uploads_as_merged(self, upload_ids: list[int]):
-        self._redis.srem(self._redis_key("processed"), *upload_ids)
+        with self._redis.pipeline() as pipeline:
+            pipeline.srem(self._redis_key("processed"), *upload_ids)
+            pipeline.hdel(self._redis_key("sizes"), *upload_ids)
+            pipeline.execute()
 
-    def get_uploads_for_merging(self) -> set[int]:
-        return set(
-            int(id)
-            for id in self._redis.srandmember(
-                self._redis_key("processed"), MERGE_BATCH_SIZE
+    def get_processed_uploads(self) -> set[int]:
+        return set(int(id) for id in self._redis.smembers(self._redis_key("processed")))
+
+    def get_uploads_for_merging(self, exclude: set[int] = frozenset()) -> set[int]:
+        """
+        Returns the processed uploads (other than `exclude`) to merge in one batch.
+
+        The uploads are picked in order, for as long as their combined size fits
+        into the memory budget (see `split_into_merge_batches`).
+        """
+        processed_uploads, sizes = self._get_processed_uploads_with_sizes()
+        budget = get_merge_memory_budget()
+
+        candidates = sorted(
+            (upload_id, size)
+            for upload_id, size in zip(
+                processed_uploads, _estimated_sizes(sizes, budget)
             )
+            if upload_id not in exclude
+        )
+        batches = _split_into_batches(
+            [upload_id for upload_id, _size in candidates],
+            [size for _upload_id, size in candidates],
+            budget,
         )
+        return set(batches[0]) if batches else set()
+
+    def split_into_merge_batches(self, upload_ids: list[int]) -> list[list[int]]:
+        """
+        Splits the `upload_ids` in order into batches to be merged one after the
+        other, by the recorded sizes of their "intermediate report"s.
+
+        Every batch fits into the memory budget, though every batch has at least
+        one upload so that huge uploads make progress as well.
+        """
+        if not upload_ids:
+            return []
+        budget = get_merge_memory_budget()
+        sizes = self._redis.hmget(self._redis_key("sizes"), upload_ids)
+        return _split_into_batches(upload_ids, _estimated_sizes(sizes, budget), budget)
+
+    def _get_processed_uploads_with_sizes(
+        self,
+    ) -> tuple[list[int], list[bytes | None]]:
+        processed_uploads = [
+            int(id) for id in self._redis.smembers(self._redis_key("processed"))
+        ]
+        if not processed_uploads:
+            return [], []
+        sizes = self._redis.hmget(self._redis_key("sizes"), processed_uploads)
+        return processed_uploads, sizes
 
     def _redis_key(self, state: str) -> str:
         return f"upload-processing-state/{self.repoid}/{self.commitsha}/{state}"
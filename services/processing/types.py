@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, NotRequired, TypedDict
 
-from shared.reports.resources import Report
+from shared.reports.resources import Report, ReportTotals
 from shared.upload.constants import UploadErrorCode
 
 
@@ -64,3 +64,9 @@ class MergeResult:
     """
     The Set of carryforwarded `session_id`s that have been removed from the "master Report".
     """
+
+    upload_totals: dict[int, ReportTotals] = field(default_factory=dict)
+    """
+    This is a mapping from the input `upload_id` to the totals of its own report,
+    as they were before merging it into the "master Report".
+    """
@@ -2,6 +2,7 @@ import copy
 import itertools
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from time import time
 from typing import Any
@@ -14,7 +15,7 @@ from shared.django_apps.reports.models import ReportType
 from shared.reports.carryforward import generate_carryforward_report
 from shared.reports.enums import UploadState, UploadType
 from shared.reports.resources import Report
-from shared.reports.types import TOTALS_MAP
+from shared.reports.types import TOTALS_MAP, ReportTotals
 from shared.storage.exceptions import FileNotInStorageError
 from shared.torngit.exceptions import TorngitError
 from shared.upload.constants import UploadErrorCode
@@ -37,7 +38,7 @@ from helpers.exceptions import (
     RepositoryWithoutValidBotError,
 )
 from rollouts import CARRYFORWARD_BASE_SEARCH_RANGE_BY_OWNER
-from services.archive import ArchiveService
+from services.archive import ArchiveService, gzip_to_file
 from services.processing.metrics import (
     PYREPORT_CHUNKS_FILE_SIZE,
     PYREPORT_REPORT_JSON_SIZE,
@@ -46,11 +47,17 @@ from services.processing.types import ProcessingErrorDict, UploadArguments
 from services.report.parser import get_proper_parser
 from services.report.parser.types import ParsedRawReport
 from services.report.parser.version_one import VersionOneReportParser
+from services.report.profiling import profile_upload_processing
 from services.report.prometheus_metrics import (
     RAW_UPLOAD_RAW_REPORT_COUNT,
     RAW_UPLOAD_SIZE,
 )
 from services.report.raw_upload_processor import process_raw_upload
+from services.report.sharded_chunks import ShardedChunks
+from services.report.streaming import (
+    StreamingReportSerializer,
+    is_streaming_serialize_enabled,
+)
 from services.repository import get_repo_provider_service
 from services.yaml.reader import get_paths_from_flags, read_yaml_field
 
@@ -266,7 +273,13 @@ class ReportService(BaseReportService):
 
         try:
             archive_service = self.get_archive_service(commit.repository)
-            chunks = archive_service.read_chunks(commitid, report_code)
+            sharded_chunks = ShardedChunks.from_report_json(
+                archive_service, commitid, report_code, commit.report_json
+            )
+            if sharded_chunks is not None:
+                chunks = sharded_chunks.read_chunks()
+            else:
+                chunks = archive_service.read_chunks(commitid, report_code)
         except FileNotInStorageError:
             log.warning(
                 "File for chunks not found in storage",
@@ -295,6 +308,32 @@ class ReportService(BaseReportService):
             chunks=chunks, files=files, sessions=sessions, totals=totals
         )
 
+    @sentry_sdk.trace
+    def get_existing_sharded_report_for_commit(
+        self, commit: Commit, report_code=None
+    ) -> tuple[Report, ShardedChunks]:
+        """
+        Returns the existing report of the commit, along with its `ShardedChunks`.
+
+        If the report is already stored in the sharded layout, the returned report
+        only has the sessions of the existing report, and its files have to be
+        loaded as needed using `ShardedChunks.load_files`.
+        Otherwise, the whole existing report is loaded, and will be converted to
+        the sharded layout once saved with `save_report`.
+        """
+        archive_service = self.get_archive_service(commit.repository)
+        if self.has_initialized_report(commit):
+            sharded_chunks = ShardedChunks.from_report_json(
+                archive_service, commit.commitid, report_code, commit.report_json
+            )
+            if sharded_chunks is not None:
+                return sharded_chunks.empty_report(), sharded_chunks
+
+        report = self.get_existing_report_for_commit(commit, report_code=report_code)
+        if report is None:
+            report = Report()
+        return report, ShardedChunks(archive_service, commit.commitid, report_code)
+
     def get_appropriate_commit_to_carryforward_from(
         self, commit: Commit, max_parenthood_deepness: int = 10
     ) -> Commit | None:
@@ -603,7 +642,12 @@ class ReportService(BaseReportService):
 
         log.debug("Retrieved report for processing from url %s", archive_url)
         try:
-            result.report = process_raw_upload(self.current_yaml, raw_report, session)
+            with profile_upload_processing(
+                commit.repository, archive_url, raw_report.size
+            ):
+                result.report = process_raw_upload(
+                    self.current_yaml, raw_report, session
+                )
 
             log.info(
                 "Successfully processed report",
@@ -661,7 +705,40 @@ class ReportService(BaseReportService):
             return result
 
     @sentry_sdk.trace
-    def save_report(self, commit: Commit, report: Report, report_code=None):
+    def save_report(
+        self,
+        commit: Commit,
+        report: Report,
+        report_code=None,
+        sharded_chunks: ShardedChunks | None = None,
+    ):
+        """
+        Saves the `report` of the commit.
+
+        With `sharded_chunks`, the report is saved in the sharded layout, and
+        `report` only needs to contain the files that were loaded into it.
+        """
+        if sharded_chunks is not None:
+            return self._save_sharded_report(commit, report, sharded_chunks)
+
+        if is_streaming_serialize_enabled():
+            chunks_url = self._write_streaming_report(commit, report, report_code)
+        else:
+            chunks_url = self._write_report(commit, report, report_code)
+
+        log.info(
+            "Archived report",
+            extra=dict(
+                repoid=commit.repoid,
+                commit=commit.commitid,
+                url=chunks_url,
+                number_sessions=len(report.sessions),
+                new_report_sessions=dict(itertools.islice(report.sessions.items(), 20)),
+            ),
+        )
+        return {"url": chunks_url}
+
+    def _write_report(self, commit: Commit, report: Report, report_code=None) -> str:
         archive_service = self.get_archive_service(commit.repository)
 
         report_json, chunks, _totals = report.serialize()
@@ -669,10 +746,59 @@ class ReportService(BaseReportService):
         PYREPORT_REPORT_JSON_SIZE.observe(len(report_json))
         PYREPORT_CHUNKS_FILE_SIZE.observe(len(chunks))
 
-        chunks_url = archive_service.write_chunks(commit.commitid, chunks, report_code)
+        # the `chunks` are uploaded in the background, while the `report_json`
+        # is being uploaded as part of updating the `commit` below.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            chunks_upload = executor.submit(
+                archive_service.write_chunks, commit.commitid, chunks, report_code
+            )
+            commit.state = "complete" if report else "error"
+            self._update_commit_report(
+                commit, report.totals, report.diff_totals, report_json
+            )
+            return chunks_upload.result()
+
+    def _write_streaming_report(
+        self, commit: Commit, report: Report, report_code=None
+    ) -> str:
+        archive_service = self.get_archive_service(commit.repository)
+
+        # the `chunks` are compressed into a temporary file while being serialized,
+        # and the `report_json` is complete once all the `chunks` are serialized.
+        serializer = StreamingReportSerializer(report)
+        with gzip_to_file(serializer.chunks()) as compressed_chunks:
+            report_json = serializer.report_json()
+
+            PYREPORT_REPORT_JSON_SIZE.observe(len(report_json))
+            PYREPORT_CHUNKS_FILE_SIZE.observe(serializer.size)
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                chunks_upload = executor.submit(
+                    archive_service.write_chunks,
+                    commit.commitid,
+                    compressed_chunks,
+                    report_code,
+                    is_already_gzipped=True,
+                )
+                commit.state = "complete" if report else "error"
+                self._update_commit_report(
+                    commit, report.totals, report.diff_totals, report_json
+                )
+                return chunks_upload.result()
 
-        commit.state = "complete" if report else "error"
-        commit.totals = legacy_totals(report)
+    def _update_commit_report(
+        self,
+        commit: Commit,
+        totals: ReportTotals,
+        diff_totals,
+        report_json: bytes,
+    ):
+        """
+        Updates the `commit` with the `totals` and serialized `report_json`
+        of its report, and the totals of its `CommitReport`.
+        """
+        commit.totals = dict(zip(TOTALS_MAP, totals))
+        commit.totals["diff"] = diff_totals
         if (
             commit.totals is not None
             and "c" in commit.totals
@@ -691,9 +817,7 @@ class ReportService(BaseReportService):
             ),
         )
         # `report_json` is an `ArchiveField`, so this will trigger an upload
-        # FIXME: we do an unnecessary `loads` roundtrip because of this abstraction,
-        # and we should just save the `report_json` to archive storage directly instead.
-        commit.report_json = orjson.loads(report_json)
+        Commit.report_json.set_serialized(commit, report_json)
 
         # `report` is an accessor which implicitly queries `CommitReport`
         if commit_report := commit.report:
@@ -711,17 +835,39 @@ class ReportService(BaseReportService):
                 self.current_yaml, ("coverage", "precision"), 2
             )
             report_totals.update_from_totals(
-                report.totals, precision=precision, rounding=rounding
+                totals, precision=precision, rounding=rounding
             )
             db_session.flush()
+
+    def _save_sharded_report(
+        self, commit: Commit, report: Report, sharded_chunks: ShardedChunks
+    ):
+        report_json, totals, written_shard_sizes, removed_shards = sharded_chunks.save(
+            report
+        )
+        serialized_report_json = orjson.dumps(report_json)
+
+        PYREPORT_REPORT_JSON_SIZE.observe(len(serialized_report_json))
+        # every shard is a standalone chunks file
+        for shard_size in written_shard_sizes:
+            PYREPORT_CHUNKS_FILE_SIZE.observe(shard_size)
+
+        commit.state = "complete" if totals.files else "error"
+        self._update_commit_report(
+            commit, totals, report.diff_totals, serialized_report_json
+        )
+        # the previous `report_json` still indexes the removed shards
+        sharded_chunks.delete_shards(removed_shards)
+
+        chunks_url = sharded_chunks.directory_path()
         log.info(
-            "Archived report",
+            "Archived sharded report",
             extra=dict(
                 repoid=commit.repoid,
                 commit=commit.commitid,
                 url=chunks_url,
+                number_shards=len(sharded_chunks.shards),
                 number_sessions=len(report.sessions),
-                new_report_sessions=dict(itertools.islice(report.sessions.items(), 20)),
             ),
         )
         return {"url": chunks_url}
@@ -0,0 +1,46 @@
+"""
+Benchmarks the language processors on synthetic reports.
+
+Every result is printed as one JSON object per line, to be compared across runs:
+
+    python -m services.report.benchmark --files 1000 --lines 500 > before.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from services.report.benchmark.corpus import GENERATORS, CorpusSize
+from services.report.benchmark.harness import run_benchmark
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = CorpusSize()
+    parser = argparse.ArgumentParser(
+        prog="python -m services.report.benchmark", description=__doc__
+    )
+    parser.add_argument(
+        "--processor",
+        action="append",
+        choices=sorted(GENERATORS),
+        help="the processors to benchmark, defaults to all of them",
+    )
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--lines", type=int, default=defaults.lines)
+    parser.add_argument("--branches", type=int, default=defaults.branches)
+    parser.add_argument("--labels", type=int, default=defaults.labels)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    size = CorpusSize(
+        files=args.files, lines=args.lines, branches=args.branches, labels=args.labels
+    )
+    for processor in args.processor or GENERATORS:
+        result = run_benchmark(processor, size, repeat=args.repeat, seed=args.seed)
+        sys.stdout.write(json.dumps(result.to_dict()) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,229 @@
+"""
+Generators for synthetic coverage reports in the formats of the language processors.
+
+Every generator returns the `(filename, contents)` of one uploaded coverage file,
+covering `files` source files with `lines` lines each. Every 4th line is a
+branch line with `branches` branches (if `branches` > 0), and every covered
+line is covered by `labels` tests (for the formats supporting labels).
+"""
+
+import json
+from dataclasses import dataclass
+from random import Random
+from typing import Callable
+from xml.sax.saxutils import quoteattr
+
+
+@dataclass(frozen=True)
+class CorpusSize:
+    files: int = 100
+    lines: int = 200
+    branches: int = 2
+    labels: int = 0
+
+
+def _hits(rng: Random) -> int:
+    # roughly 3/4 of the lines are covered
+    return 0 if rng.random() < 0.25 else rng.randint(1, 50)
+
+
+def _is_branch_line(size: CorpusSize, ln: int) -> bool:
+    return size.branches > 0 and ln % 4 == 0
+
+
+def _branch_hits(size: CorpusSize, rng: Random) -> list[int]:
+    return [_hits(rng) for _ in range(size.branches)]
+
+
+def generate_lcov(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    records = []
+    for i in range(size.files):
+        records.append(f"TN:\nSF:src/module_{i}/file_{i}.c")
+        records.append(f"FN:1,function_{i}\nFNDA:1,function_{i}")
+        for ln in range(1, size.lines + 1):
+            records.append(f"DA:{ln},{_hits(rng)}")
+            if _is_branch_line(size, ln):
+                for branch, hits in enumerate(_branch_hits(size, rng)):
+                    records.append(f"BRDA:{ln},0,{branch},{hits or '-'}")
+        records.append("end_of_record")
+    return "coverage/lcov.info", "\n".join(records).encode()
+
+
+def generate_cobertura(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    parts = [
+        '<?xml version="1.0" ?>\n<coverage version="7.4">',
+        "<sources><source>/home/runner/work/project</source></sources>",
+        '<packages><package name="project">',
+    ]
+    for i in range(size.files):
+        filename = quoteattr(f"project/module_{i}/file_{i}.py")
+        parts.append(f'<class name="file_{i}.py" filename={filename}><lines>')
+        for ln in range(1, size.lines + 1):
+            hits = _hits(rng)
+            if _is_branch_line(size, ln):
+                branch_hits = _branch_hits(size, rng)
+                covered = sum(1 for b in branch_hits if b)
+                percent = 100 * covered // size.branches
+                parts.append(
+                    f'<line number="{ln}" hits="{hits}" branch="true" '
+                    f'condition-coverage="{percent}% ({covered}/{size.branches})"/>'
+                )
+            else:
+                parts.append(f'<line number="{ln}" hits="{hits}"/>')
+        parts.append("</lines></class>")
+    parts.append("</package></packages></coverage>")
+    return "coverage.xml", "\n".join(parts).encode()
+
+
+def generate_jacoco(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        '<report name="project">',
+    ]
+    for i in range(size.files):
+        parts.append(f'<package name="com/example/module_{i}">')
+        parts.append(f'<sourcefile name="File{i}.java">')
+        for ln in range(1, size.lines + 1):
+            hits = _hits(rng)
+            mi, ci = (0, hits) if hits else (3, 0)
+            mb = cb = 0
+            if _is_branch_line(size, ln):
+                branch_hits = _branch_hits(size, rng)
+                cb = sum(1 for b in branch_hits if b)
+                mb = size.branches - cb
+            parts.append(f'<line nr="{ln}" mi="{mi}" ci="{ci}" mb="{mb}" cb="{cb}"/>')
+        parts.append("</sourcefile></package>")
+    parts.append("</report>")
+    return "jacoco.xml", "\n".join(parts).encode()
+
+
+def generate_clover(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<coverage generated="1700000000"><project timestamp="1700000000">',
+    ]
+    for i in range(size.files):
+        path = quoteattr(f"src/module_{i}/File{i}.php")
+        parts.append(f'<file name="File{i}.php" path={path}>')
+        for ln in range(1, size.lines + 1):
+            if _is_branch_line(size, ln):
+                true_count, false_count = _hits(rng), _hits(rng)
+                parts.append(
+                    f'<line num="{ln}" type="cond" '
+                    f'truecount="{true_count}" falsecount="{false_count}"/>'
+                )
+            else:
+                parts.append(f'<line num="{ln}" type="stmt" count="{_hits(rng)}"/>')
+        parts.append("</file>")
+    parts.append("</project></coverage>")
+    return "clover.xml", "\n".join(parts).encode()
+
+
+def generate_go(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    records = ["mode: count"]
+    for i in range(size.files):
+        filename = f"github.com/example/project/module_{i}/file_{i}.go"
+        for ln in range(1, size.lines + 1):
+            if _is_branch_line(size, ln):
+                # multiple blocks on the same line turn into partials
+                for branch, hits in enumerate(_branch_hits(size, rng)):
+                    start = 2 + branch * 10
+                    records.append(f"{filename}:{ln}.{start},{ln}.{start + 8} 1 {hits}")
+            else:
+                records.append(f"{filename}:{ln}.2,{ln + 1}.2 1 {_hits(rng)}")
+    return "coverage.out", "\n".join(records).encode()
+
+
+def generate_istanbul(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    def location(ln: int, start: int = 4, end: int = 40) -> dict:
+        return {
+            "start": {"line": ln, "column": start},
+            "end": {"line": ln, "column": end},
+        }
+
+    report = {}
+    for i in range(size.files):
+        statements, branches = {}, {}
+        s, b = {}, {}
+        for ln in range(1, size.lines + 1):
+            sid = str(ln - 1)
+            statements[sid] = location(ln)
+            s[sid] = _hits(rng)
+            if _is_branch_line(size, ln):
+                bid = str(len(branches))
+                branches[bid] = {
+                    "loc": location(ln),
+                    "type": "cond-expr",
+                    "locations": [
+                        location(ln, 10 + 10 * branch, 18 + 10 * branch)
+                        for branch in range(size.branches)
+                    ],
+                }
+                b[bid] = _branch_hits(size, rng)
+        filename = f"src/module_{i}/file_{i}.js"
+        report[filename] = {
+            "path": filename,
+            "statementMap": statements,
+            "fnMap": {
+                "0": {"name": f"fn_{i}", "loc": location(1), "line": 1},
+            },
+            "branchMap": branches,
+            "s": s,
+            "f": {"0": 1},
+            "b": b,
+        }
+    return "coverage/coverage-final.json", json.dumps(report).encode()
+
+
+def generate_pycoverage(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    files = {}
+    for i in range(size.files):
+        executed, missing = [], []
+        contexts: dict[str, list[str]] = {}
+        for ln in range(1, size.lines + 1):
+            if _hits(rng):
+                executed.append(ln)
+                if size.labels:
+                    contexts[str(ln)] = [
+                        f"tests/test_{i}.py::test_{label}|run"
+                        for label in rng.sample(range(size.labels * 4), size.labels)
+                    ]
+            else:
+                missing.append(ln)
+        files[f"project/module_{i}/file_{i}.py"] = {
+            "executed_lines": executed,
+            "missing_lines": missing,
+            "contexts": contexts,
+        }
+    report = {
+        "meta": {"version": "7.4.0", "show_contexts": bool(size.labels)},
+        "files": files,
+        "totals": {},
+    }
+    return "coverage.json", json.dumps(report).encode()
+
+
+def generate_gcov(size: CorpusSize, rng: Random) -> tuple[str, bytes]:
+    # gcov reports contain exactly one source file, so this has `files` times
+    # as many lines instead
+    records = ["        -:    0:Source:src/project.c"]
+    for ln in range(1, size.files * size.lines + 1):
+        hits = _hits(rng)
+        records.append(f"{hits or '#####':>9}:{ln:>5}:    value += {ln};")
+        if _is_branch_line(size, ln):
+            for branch, branch_hits in enumerate(_branch_hits(size, rng)):
+                taken = f"taken {branch_hits}" if branch_hits else "never executed"
+                records.append(f"branch  {branch} {taken}")
+    return "project.c.gcov", "\n".join(records).encode()
+
+
+GENERATORS: dict[str, Callable[[CorpusSize, Random], tuple[str, bytes]]] = {
+    "lcov": generate_lcov,
+    "cobertura": generate_cobertura,
+    "jacoco": generate_jacoco,
+    "clover": generate_clover,
+    "go": generate_go,
+    "istanbul": generate_istanbul,
+    "pycoverage": generate_pycoverage,
+    "gcov": generate_gcov,
+}
@@ -0,0 +1,113 @@
+import gc
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from random import Random
+
+from services.report.benchmark.corpus import GENERATORS, CorpusSize
+from services.report.parser.types import ParsedUploadedReportFile
+from services.report.report_builder import ReportBuilder
+from services.report.report_processor import process_report
+
+# Report expiration is disabled, as the synthetic reports have fixed timestamps.
+# `carryforward_mode: labels` makes the `ReportBuilder` create label datapoints.
+BENCHMARK_YAML = {
+    "codecov": {"max_report_age": False},
+    "flag_management": {"default_rules": {"carryforward_mode": "labels"}},
+}
+
+
+def _identity_path_fixer(path: str, bases_to_try=None) -> str:
+    return path
+
+
+def create_report_builder() -> ReportBuilder:
+    """
+    A `ReportBuilder` that takes all the paths as-is, so that only the
+    language processors themselves are measured.
+    """
+    return ReportBuilder(BENCHMARK_YAML, 0, {}, _identity_path_fixer)
+
+
+@dataclass
+class BenchmarkResult:
+    processor: str
+    files: int
+    lines: int
+    branches: int
+    labels: int
+    input_bytes: int
+    # the totals of the resulting report, to make sure it is not empty
+    report_files: int
+    report_lines: int
+    wall_seconds: list[float]
+    wall_seconds_min: float
+    wall_seconds_median: float
+    # measured with `tracemalloc`, in a separate run
+    peak_memory_bytes: int
+    retained_memory_bytes: int
+    # the number of memory blocks that were allocated and not yet freed
+    # after the run, as counted by the interpreter
+    retained_blocks: int
+    python_version: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def run_benchmark(
+    processor: str, size: CorpusSize, repeat: int = 3, seed: int = 0
+) -> BenchmarkResult:
+    """
+    Generates a synthetic report for `processor` and runs it through
+    `process_report` `repeat` times, measuring its wall time, and once more
+    measuring its memory usage.
+    """
+    filename, contents = GENERATORS[processor](size, Random(seed))
+    report_file = ParsedUploadedReportFile(filename=filename, file_contents=contents)
+
+    wall_seconds = []
+    report = None
+    for _ in range(repeat):
+        report = None
+        gc.collect()
+        start = time.perf_counter()
+        report = process_report(report_file, create_report_builder())
+        wall_seconds.append(time.perf_counter() - start)
+
+    report = None
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        report = process_report(report_file, create_report_builder())
+        retained_memory_bytes, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+
+    if report is None:
+        raise ValueError(f"The synthetic {processor} report was not processed")
+    totals = report.totals
+
+    return BenchmarkResult(
+        processor=processor,
+        files=size.files,
+        lines=size.lines,
+        branches=size.branches,
+        labels=size.labels,
+        input_bytes=len(contents),
+        report_files=totals.files,
+        report_lines=totals.lines,
+        wall_seconds=wall_seconds,
+        wall_seconds_min=min(wall_seconds),
+        wall_seconds_median=statistics.median(wall_seconds),
+        peak_memory_bytes=peak_memory_bytes,
+        retained_memory_bytes=retained_memory_bytes,
+        retained_blocks=retained_blocks,
+        python_version=platform.python_version(),
+    )
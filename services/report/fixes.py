@@ -1,8 +1,111 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence, Set
+
 from services.path_fixer import PathFixer
 
 
+class LineIntervals(Set):
+    """
+    An immutable set of line numbers, stored as sorted and merged intervals.
+
+    Excluded regions (like `LCOV_EXCL_START` / `LCOV_EXCL_STOP`) take up a single
+    interval no matter how many lines they span, and membership is checked by
+    bisecting the interval starts.
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(
+        self,
+        lines: Iterable[int] = (),
+        ranges: Iterable[tuple[int, int]] = (),
+    ):
+        """
+        Creates the set of all the `lines`, and all the lines within the
+        inclusive `(start, end)` `ranges`.
+        """
+        intervals = sorted([*((ln, ln) for ln in lines), *ranges])
+        self._starts = array("q")
+        self._ends = array("q")
+        for start, end in intervals:
+            if start > end:
+                continue
+            if self._ends and start <= self._ends[-1] + 1:
+                if end > self._ends[-1]:
+                    self._ends[-1] = end
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __contains__(self, ln) -> bool:
+        index = bisect_right(self._starts, ln) - 1
+        return index >= 0 and ln <= self._ends[index]
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def __len__(self) -> int:
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def __repr__(self) -> str:
+        return f"LineIntervals({self.intervals()!r})"
+
+    def __reduce__(self):
+        return (LineIntervals, ((), self.intervals()))
+
+    def intervals(self) -> list[tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def contains_all(self, line_numbers: Sequence[int]) -> bytearray:
+        """
+        Returns whether each of the `line_numbers` is contained in this set,
+        as a `bytearray` of `0` / `1`.
+
+        The `line_numbers` are visited in sorted order while walking the intervals
+        in lock-step, instead of bisecting the intervals once per line.
+        """
+        result = bytearray(len(line_numbers))
+        starts, ends = self._starts, self._ends
+        interval, interval_count = 0, len(starts)
+        for index in sorted(range(len(line_numbers)), key=line_numbers.__getitem__):
+            ln = line_numbers[index]
+            while interval < interval_count and ends[interval] < ln:
+                interval += 1
+            if interval == interval_count:
+                break
+            if starts[interval] <= ln:
+                result[index] = 1
+        return result
+
+
+def ignored_lines_mask(ignore: dict | None, line_numbers: Sequence[int]) -> bytearray:
+    """
+    Returns whether each of the `line_numbers` is ignored according to `ignore`
+    (one of the values returned by `get_fixes_from_raw`), with the same semantics
+    as the `ignore` argument of `ReportFile`.
+    """
+    if not ignore:
+        return bytearray(len(line_numbers))
+
+    lines = ignore.get("lines") or ()
+    if isinstance(lines, LineIntervals):
+        mask = lines.contains_all(line_numbers)
+    else:
+        mask = bytearray(ln in lines for ln in line_numbers)
+
+    eof = ignore.get("eof")
+    if eof and not isinstance(eof, str):
+        for index, ln in enumerate(line_numbers):
+            if ln > eof:
+                mask[index] = 1
+    return mask
+
+
 def get_fixes_from_raw(content: str, fix: PathFixer) -> dict[str, dict]:
     files: dict[str, dict] = {}
+    files_lines: dict[str, list[int]] = {}
     files_long_comments: dict[str, tuple[list[int], list[int]]] = {}
     _cur_file = None
 
@@ -23,14 +126,13 @@ def get_fixes_from_raw(content: str, fix: PathFixer) -> dict[str, dict]:
                         _fixed = fix(filename)
                         if not _fixed:
                             continue
-                        lines: set[int] = files.setdefault(_fixed, {"lines": set()})[
-                            "lines"
-                        ]
+                        files.setdefault(_fixed, {})
+                        lines = files_lines.setdefault(_fixed, [])
 
                     if ":" not in line:
                         # multi line
                         for sp in line.split(","):
-                            lines.add(int(sp))
+                            lines.append(int(sp))
 
                     else:
                         ln, source = line.split(":", 1)
@@ -51,18 +153,18 @@ def get_fixes_from_raw(content: str, fix: PathFixer) -> dict[str, dict]:
                                 ln
                             )
 
-                        lines.add(ln)
+                        lines.append(ln)
 
             except Exception:
                 pass
 
-    for filename, (starts, stops) in files_long_comments.items():
-        if filename and starts and stops:
-            starts = sorted(starts)
-            stops = sorted(stops)
-            lines = files[filename]["lines"]
-            for x in range(len(starts)):
-                if len(stops) > x:
-                    lines.update(range(int(starts[x]) + 1, int(stops[x])))
+    for filename, lines in files_lines.items():
+        starts, stops = files_long_comments.get(filename, ([], []))
+        # every start is paired with the stop of the same rank,
+        # excluding all the lines in between
+        ranges = [
+            (start + 1, stop - 1) for start, stop in zip(sorted(starts), sorted(stops))
+        ]
+        files[filename]["lines"] = LineIntervals(lines, ranges)
 
     return files
@@ -4,6 +4,42 @@ from services.report.report_builder import ReportBuilderSession
 
 
 class BaseLanguageProcessor(object):
+    signatures: tuple[bytes, ...] = ()
+    """
+    Byte prefixes that (after stripping leading whitespace) uniquely identify
+    files handled by this processor.
+
+    These are checked on the leading bytes of a file before any full parsing
+    happens, so a matching file is sent straight to this processor.
+    """
+
+    streaming_tags: tuple[str, ...] = ()
+    """
+    XML processors that support streaming list the tags of the self-contained
+    elements they process here.
+
+    Those processors also implement
+    `process_streaming(root, elements, report_builder_session)`, which processes
+    an XML report that is being parsed incrementally: The `root` element only has
+    its attributes, but no children. `elements` yields the outermost elements
+    matching `streaming_tags` one by one, and each one of them is discarded after
+    it has been processed. This has to yield the same results as `process` would
+    for the whole tree.
+    """
+
+    json_streaming: bool = False
+    """
+    JSON processors that support streaming set this.
+
+    Those processors also implement
+    `process_json_stream(document, report_builder_session)`, which processes a
+    JSON report that is being decoded incrementally, as a `LazyJSONObject`:
+    `matches_content` has only been checked against a truncated prefix of the
+    document, so any structural errors further down have to be reported by
+    raising a `CorruptRawReportError`. This has to yield the same results as
+    `process` would for the whole document.
+    """
+
     def __init__(self, *args, **kwargs) -> None:
         pass
 
@@ -25,8 +25,11 @@ def from_xml(xml: Element, report_builder_session: ReportBuilderSession) -> None
         build_id = xml.attrib.get("buildId")
         # build_id format has timestamp at the end "4362c668_2020-10-28_17:55:47"
         timestamp = " ".join(build_id.split("_")[1:])
-        if timestamp and Date(timestamp) < max_age:
-            raise ReportExpiredException("Bullseye report expired %s" % timestamp)
+        if timestamp:
+            parsed_datetime = Date(timestamp)
+            if parsed_datetime < max_age:
+                raise ReportExpiredException("Bullseye report expired %s" % timestamp)
+            report_builder_session.record_report_timestamp(parsed_datetime, max_age)
 
     for folder in xml.iter("{https://www.bullseye.com/covxml}folder"):
         for file in folder.iter("{https://www.bullseye.com/covxml}src"):
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 import sentry_sdk
 from lxml.etree import Element
 from timestring import Date
@@ -8,6 +10,8 @@ from services.report.report_builder import CoverageType, ReportBuilderSession
 
 
 class CloverProcessor(BaseLanguageProcessor):
+    streaming_tags = ("file",)
+
     def matches_content(self, content: Element, first_line: str, name: str) -> bool:
         return content.tag == "coverage" and bool(content.attrib.get("generated"))
 
@@ -17,6 +21,15 @@ class CloverProcessor(BaseLanguageProcessor):
     ) -> None:
         return from_xml(content, report_builder_session)
 
+    @sentry_sdk.trace
+    def process_streaming(
+        self,
+        root: Element,
+        elements: Iterable[Element],
+        report_builder_session: ReportBuilderSession,
+    ) -> None:
+        return from_xml_elements(root, elements, report_builder_session)
+
 
 def get_end_of_file(filename, xmlfile):
     """
@@ -33,77 +46,99 @@ def get_end_of_file(filename, xmlfile):
 
 
 def from_xml(xml: Element, report_builder_session: ReportBuilderSession) -> None:
+    from_xml_elements(xml, [xml], report_builder_session)
+
+
+def from_xml_elements(
+    root: Element,
+    elements: Iterable[Element],
+    report_builder_session: ReportBuilderSession,
+) -> None:
+    """
+    Processes all the `<file>` elements contained in `elements`.
+
+    The `root` is only used for its attributes, so when streaming, `elements`
+    can be detached from it, and be discarded once they have been processed.
+    """
     if max_age := report_builder_session.yaml_field(
         ("codecov", "max_report_age"), "12h ago"
     ):
         try:
-            timestamp = next(xml.iter("coverage")).get("generated")
+            timestamp = next(root.iter("coverage")).get("generated")
             if "-" in timestamp:
                 t = timestamp.split("-")
                 timestamp = t[1] + "-" + t[0] + "-" + t[2]
-            if timestamp and Date(timestamp) < max_age:
-                # report expired over 12 hours ago
-                raise ReportExpiredException("Clover report expired %s" % timestamp)
+            if timestamp:
+                parsed_datetime = Date(timestamp)
+                if parsed_datetime < max_age:
+                    # report expired over 12 hours ago
+                    raise ReportExpiredException("Clover report expired %s" % timestamp)
+                report_builder_session.record_report_timestamp(parsed_datetime, max_age)
         except StopIteration:
             pass
 
-    for file in xml.iter("file"):
-        filename = file.attrib.get("path") or file.attrib["name"]
+    for element in elements:
+        for file in element.iter("file"):
+            _process_file(file, report_builder_session)
 
-        # skip empty file documents
-        if (
-            "{" in filename
-            or ("/vendor/" in ("/" + filename) and filename.endswith(".php"))
-            or file.find("line") is None
-        ):
-            continue
 
-        _file = report_builder_session.create_coverage_file(filename)
-        if _file is None:
-            continue
+def _process_file(file: Element, report_builder_session: ReportBuilderSession) -> None:
+    filename = file.attrib.get("path") or file.attrib["name"]
+
+    # skip empty file documents
+    if (
+        "{" in filename
+        or ("/vendor/" in ("/" + filename) and filename.endswith(".php"))
+        or file.find("line") is None
+    ):
+        return
 
-        # fix extra lines
-        eof = get_end_of_file(filename, file)
-
-        # process coverage
-        for line in file.iter("line"):
-            attribs = line.attrib
-            ln = int(attribs["num"])
-            complexity = None
-
-            # skip line
-            if ln < 1 or (eof and ln > eof):
-                continue
-
-            # [typescript] https://github.com/gotwarlost/istanbul/blob/89e338fcb1c8a7dea3b9e8f851aa55de2bc3abee/lib/report/clover.js#L108-L110
-            if attribs["type"] == "cond":
-                _type = CoverageType.branch
-                t, f = int(attribs["truecount"]), int(attribs["falsecount"])
-                if t == f == 0:
-                    coverage = "0/2"
-                elif t == 0 or f == 0:
-                    coverage = "1/2"
-                else:
-                    coverage = "2/2"
-
-            elif attribs["type"] == "method":
-                coverage = int(attribs.get("count") or 0)
-                _type = CoverageType.method
-                complexity = int(attribs.get("complexity") or 0)
-                # <line num="44" type="method" name="doRun" visibility="public" complexity="5" crap="5.20" count="1"/>
+    _file = report_builder_session.create_coverage_file(filename)
+    if _file is None:
+        return
+
+    # fix extra lines
+    eof = get_end_of_file(filename, file)
+
+    # process coverage
+    for line in file.iter("line"):
+        attribs = line.attrib
+        ln = int(attribs["num"])
+        complexity = None
+
+        # skip line
+        if ln < 1 or (eof and ln > eof):
+            continue
 
+        # [typescript] https://github.com/gotwarlost/istanbul/blob/89e338fcb1c8a7dea3b9e8f851aa55de2bc3abee/lib/report/clover.js#L108-L110
+        if attribs["type"] == "cond":
+            _type = CoverageType.branch
+            t, f = int(attribs["truecount"]), int(attribs["falsecount"])
+            if t == f == 0:
+                coverage = "0/2"
+            elif t == 0 or f == 0:
+                coverage = "1/2"
             else:
-                coverage = int(attribs.get("count") or 0)
-                _type = CoverageType.line
-
-            # add line to report
-            _file.append(
-                ln,
-                report_builder_session.create_coverage_line(
-                    coverage,
-                    _type,
-                    complexity=complexity,
-                ),
-            )
-
-        report_builder_session.append(_file)
+                coverage = "2/2"
+
+        elif attribs["type"] == "method":
+            coverage = int(attribs.get("count") or 0)
+            _type = CoverageType.method
+            complexity = int(attribs.get("complexity") or 0)
+            # <line num="44" type="method" name="doRun" visibility="public" complexity="5" crap="5.20" count="1"/>
+
+        else:
+            coverage = int(attribs.get("count") or 0)
+            _type = CoverageType.line
+
+        # add line to report
+        _file.append(
+            ln,
+            report_builder_session.create_coverage_line(
+                coverage,
+                _type,
+                complexity=complexity,
+            ),
+        )
+
+    report_builder_session.append(_file)
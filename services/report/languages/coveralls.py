@@ -17,8 +17,13 @@ class CoverallsProcessor(BaseLanguageProcessor):
 
 
 def from_json(report: dict, report_builder_session: ReportBuilderSession) -> None:
+    fixed_paths = report_builder_session.fix_paths(
+        file["name"] for file in report["source_files"]
+    )
     for file in report["source_files"]:
-        _file = report_builder_session.create_coverage_file(file["name"])
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[file["name"]], do_fix_path=False
+        )
         if _file is None:
             continue
 
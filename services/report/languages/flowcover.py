@@ -16,8 +16,11 @@ class FlowcoverProcessor(BaseLanguageProcessor):
 
 
 def from_json(json: dict, report_builder_session: ReportBuilderSession) -> None:
+    fixed_paths = report_builder_session.fix_paths(json["files"])
     for fn, data in json["files"].items():
-        _file = report_builder_session.create_coverage_file(fn)
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[fn], do_fix_path=False
+        )
         if _file is None:
             continue
 
@@ -190,21 +190,15 @@ def from_txt(string: bytes, report_builder_session: ReportBuilderSession) -> Non
 
             next_is_func = False
 
-    _file = report_builder_session.create_coverage_file(filename, do_fix_path=False)
+    _file = report_builder_session.create_compact_file(filename, do_fix_path=False)
     for ln, coverages in lines.items():
         _type = line_types[ln]
         branches = line_branches.get(ln)
         if branches:
             coverage = "%s/%s" % tuple(branches)
-            _file.append(
-                ln,
-                report_builder_session.create_coverage_line(coverage, _type),
-            )
+            _file.append(ln, coverage, _type)
         else:
             for coverage in coverages:
-                _file.append(
-                    ln,
-                    report_builder_session.create_coverage_line(coverage, _type),
-                )
+                _file.append(ln, coverage, _type)
 
     report_builder_session.append(_file)
@@ -13,6 +13,8 @@ from services.report.report_builder import ReportBuilderSession
 
 
 class GoProcessor(BaseLanguageProcessor):
+    signatures = (b"mode: ",)
+
     def matches_content(self, content: bytes, first_line: str, name: str) -> bool:
         return content[:6] == b"mode: " or ".go:" in first_line
 
@@ -33,7 +35,7 @@ def from_txt(string: bytes, report_builder_session: ReportBuilderSession) -> Non
     files = process_bytes_into_files(string)
 
     for filename, lines in files.items():
-        _file = report_builder_session.create_coverage_file(filename)
+        _file = report_builder_session.create_compact_file(filename)
         if _file is None:
             continue
 
@@ -48,8 +50,7 @@ def from_txt(string: bytes, report_builder_session: ReportBuilderSession) -> Non
             if partials_as_hits and line_type(cov_to_use) == LineType.partial:
                 cov_to_use = 1
 
-            _line = report_builder_session.create_coverage_line(cov_to_use)
-            _file.append(ln, _line)
+            _file.append(ln, cov_to_use)
 
         report_builder_session.append(_file)
 
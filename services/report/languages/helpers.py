@@ -1,5 +1,9 @@
+import json
+import re
 from dataclasses import dataclass
+from typing import Any, Container, Iterable, Iterator
 
+import orjson
 from lxml.etree import Element
 
 
@@ -21,6 +25,188 @@ def child_text(parent: Element, element: str) -> str:
     return child.text or ""
 
 
+def iter_streamed_elements(
+    events: Iterable[tuple[str, Element]], tags: tuple[str, ...]
+) -> Iterator[Element]:
+    """
+    Yields the outermost elements with one of the given `tags` out of a stream of
+    `("start" | "end", element)` events as produced by `lxml.etree.iterparse`.
+
+    Every element is yielded once it has been parsed completely, and is cleared
+    once the consumer asks for the next element, together with everything that
+    precedes it in the document. Memory usage is thus bounded by the size of
+    the largest element.
+    """
+    open_elements = 0
+    for event, element in events:
+        if element.tag not in tags:
+            continue
+        if event == "start":
+            open_elements += 1
+            continue
+
+        open_elements -= 1
+        if open_elements:
+            # this is nested within another element we are interested in,
+            # and will be processed as part of that one.
+            continue
+
+        yield element
+
+        element.clear(keep_tail=True)
+        # drop everything that was already processed, which also includes the
+        # (now empty) previous siblings of all the ancestors of this element
+        node, parent = element, element.getparent()
+        while parent is not None:
+            while node.getprevious() is not None:
+                del parent[0]
+            node, parent = parent, parent.getparent()
+
+
+JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],"]')
+
+JSON_WHITESPACE_RE = re.compile(rb"[ \t\n\r]*")
+JSON_STRING_RE = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"')
+# everything up to and including the next bracket, skipping over strings
+JSON_BRACKET_RE = re.compile(rb'(?:[^"{}\[\]]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+[{}\[\]]')
+JSON_SCALAR_RE = re.compile(rb"[^ \t\n\r,:{}\[\]]+")
+
+
+def _json_value_end(data: bytes | memoryview, pos: int) -> int:
+    """
+    Finds the end of the JSON value starting at `pos`, without decoding it.
+
+    This does not validate the value, which is left to decoding it.
+    """
+    char = data[pos : pos + 1]
+    if char == b'"':
+        match = JSON_STRING_RE.match(data, pos)
+    elif char == b"{" or char == b"[":
+        # an unterminated string makes this skip ahead, in which case the
+        # value is found to be malformed when it is being decoded
+        depth = 0
+        for match in JSON_BRACKET_RE.finditer(data, pos):
+            end = match.end()
+            if data[end - 1] in b"{[":
+                depth += 1
+                continue
+            depth -= 1
+            if not depth:
+                return end
+        match = None
+    else:
+        match = JSON_SCALAR_RE.match(data, pos)
+    if match is None:
+        raise json.JSONDecodeError("Unterminated value", "", pos)
+    return match.end()
+
+
+class LazyJSONObject:
+    """
+    A JSON object within the larger (UTF-8 encoded) JSON document `data`,
+    starting at `start`.
+
+    Its members are only decoded one at a time while iterating over `items`,
+    instead of having to hold the whole decoded document in memory at once.
+    The `data` can also be a `memoryview`, and is never copied as a whole.
+    """
+
+    def __init__(self, data: bytes | memoryview | str, start: int = 0):
+        if isinstance(data, str):
+            data = data.encode()
+        self.data = memoryview(data)
+        self.start = JSON_WHITESPACE_RE.match(self.data, start).end()
+        self.end: int | None = None
+        if self.data[self.start : self.start + 1] != b"{":
+            raise json.JSONDecodeError("Expecting object", "", self.start)
+
+    def contains(self, needle: bytes) -> bool:
+        """
+        Whether `needle` occurs anywhere within the whole document.
+        """
+        return re.search(re.escape(needle), self.data) is not None
+
+    def items(self, lazy_keys: Container[str] = ()) -> Iterator[tuple[str, Any]]:
+        """
+        Yields the decoded `(key, value)` pairs of this object.
+
+        Object values of `lazy_keys` are yielded as a `LazyJSONObject` themselves.
+        Raises a `json.JSONDecodeError` on malformed JSON.
+        """
+        data = self.data
+        pos = JSON_WHITESPACE_RE.match(data, self.start + 1).end()
+        if data[pos : pos + 1] == b"}":
+            self.end = pos + 1
+            return
+
+        while True:
+            if data[pos : pos + 1] != b'"':
+                raise json.JSONDecodeError("Expecting property name", "", pos)
+            end = _json_value_end(data, pos)
+            key = orjson.loads(data[pos:end])
+            pos = JSON_WHITESPACE_RE.match(data, end).end()
+            if data[pos : pos + 1] != b":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", "", pos)
+            pos = JSON_WHITESPACE_RE.match(data, pos + 1).end()
+
+            if key in lazy_keys and data[pos : pos + 1] == b"{":
+                value = LazyJSONObject(data, pos)
+                yield key, value
+                if value.end is None:
+                    # the consumer did not go through all of it, so we do
+                    for _ in value.items():
+                        pass
+                pos = value.end
+            else:
+                end = _json_value_end(data, pos)
+                value = orjson.loads(data[pos:end])
+                yield key, value
+                pos = end
+
+            pos = JSON_WHITESPACE_RE.match(data, pos).end()
+            delimiter = data[pos : pos + 1]
+            if delimiter == b"}":
+                self.end = pos + 1
+                return
+            if delimiter != b",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", "", pos)
+            pos = JSON_WHITESPACE_RE.match(data, pos + 1).end()
+
+
+def read_json_prefix(text: str, size: int) -> Any:
+    """
+    Decodes the first `size` characters of the JSON document `text`.
+
+    Every value that is cut off by `size` is truncated to the elements / members
+    that are fully contained in the prefix, so the result has the same structure
+    as the full document, but only a bounded amount of its contents.
+    Raises a `json.JSONDecodeError` on malformed JSON.
+    """
+    if len(text) <= size:
+        return json.loads(text)
+
+    # the closing brackets for the containers that are open at `cut`
+    cut, closing = 0, ""
+    open_containers: list[str] = []
+    for match in JSON_TOKEN_RE.finditer(text, 0, size):
+        token = match.group()
+        if token in "{[":
+            open_containers.append("}" if token == "{" else "]")
+            cut, closing = match.end(), "".join(reversed(open_containers))
+        elif token in "}]":
+            if not open_containers:
+                raise json.JSONDecodeError(f"Unexpected {token}", text, match.start())
+            open_containers.pop()
+        elif token == ",":
+            # everything up to a delimiter is complete
+            cut, closing = match.start(), "".join(reversed(open_containers))
+        elif token == '"':
+            # a string that is cut off by `size`
+            break
+
+    return json.loads(text[:cut] + closing)
+
+
 @dataclass
 class SourceLocation:
     line: int
@@ -1,5 +1,6 @@
 import logging
 from collections import defaultdict
+from typing import Callable, Iterable
 
 import sentry_sdk
 from lxml.etree import Element
@@ -14,6 +15,8 @@ log = logging.getLogger(__name__)
 
 
 class JacocoProcessor(BaseLanguageProcessor):
+    streaming_tags = ("sessioninfo", "package")
+
     def matches_content(self, content: Element, first_line: str, name: str) -> bool:
         return content.tag == "report"
 
@@ -23,9 +26,31 @@ class JacocoProcessor(BaseLanguageProcessor):
     ) -> None:
         return from_xml(content, report_builder_session)
 
+    @sentry_sdk.trace
+    def process_streaming(
+        self,
+        root: Element,
+        elements: Iterable[Element],
+        report_builder_session: ReportBuilderSession,
+    ) -> None:
+        return from_xml_elements(root, elements, report_builder_session)
+
 
 def from_xml(xml: Element, report_builder_session: ReportBuilderSession) -> None:
+    from_xml_elements(xml, [xml], report_builder_session)
+
+
+def from_xml_elements(
+    root: Element,
+    elements: Iterable[Element],
+    report_builder_session: ReportBuilderSession,
+) -> None:
     """
+    Processes all the `<sessioninfo>` and `<package>` elements contained in `elements`.
+
+    The `root` is only used for its attributes, so when streaming, `elements`
+    can be detached from it, and be discarded once they have been processed.
+
     nr = line number
     mi = missed instructions
     ci = covered instructions
@@ -33,19 +58,11 @@ def from_xml(xml: Element, report_builder_session: ReportBuilderSession) -> None
     cb = covered branches
     """
     path_fixer = report_builder_session.path_fixer
-    if max_age := report_builder_session.yaml_field(
+    max_age = report_builder_session.yaml_field(
         ("codecov", "max_report_age"), "12h ago"
-    ):
-        try:
-            timestamp = next(xml.iter("sessioninfo")).get("start")
-            if timestamp and Date(timestamp) < max_age:
-                # report expired over 12 hours ago
-                raise ReportExpiredException("Jacoco report expired %s" % timestamp)
-
-        except StopIteration:
-            pass
+    )
 
-    project = xml.attrib.get("name", "")
+    project = root.attrib.get("name", "")
     project = "" if " " in project else project.strip("/")
 
     partials_as_hits = report_builder_session.yaml_field(
@@ -67,84 +84,113 @@ def from_xml(xml: Element, report_builder_session: ReportBuilderSession) -> None
         # package/path
         return path_fixer(path)
 
-    for package in xml.iter("package"):
-        base_name = package.attrib["name"]
-
-        file_method_complixity: dict[str, dict[int, tuple[int, int]]] = defaultdict(
-            dict
-        )
-        # Classes complexity
-        for _class in package.iter("class"):
-            class_name = _class.attrib["name"]
-            if "$" not in class_name:
-                method_complixity = file_method_complixity[class_name]
-                # Method Complexity
-                for method in _class.iter("method"):
-                    ln = int(method.attrib.get("line", 0))
-                    if ln > 0:
-                        for counter in method.iter("counter"):
-                            if counter.attrib["type"] == "COMPLEXITY":
-                                m = int(counter.attrib["missed"])
-                                c = int(counter.attrib["covered"])
-                                method_complixity[ln] = (c, m + c)
-                                break
-
-        # Statements
-        for source in package.iter("sourcefile"):
-            source_name = "%s/%s" % (base_name, source.attrib["name"])
-            filename = try_to_fix_path(source_name)
-            if filename is None:
-                continue
-
-            method_complixity = file_method_complixity[source_name.split(".")[0]]
-
-            _file = report_builder_session.create_coverage_file(
-                filename, do_fix_path=False
-            )
-            assert _file is not None, (
-                "`create_coverage_file` with pre-fixed path is infallible"
+    checked_timestamp = not max_age
+    for element in elements:
+        if not checked_timestamp:
+            # only the first `<sessioninfo>` is considered
+            for sessioninfo in element.iter("sessioninfo"):
+                checked_timestamp = True
+                timestamp = sessioninfo.get("start")
+                if timestamp:
+                    parsed_datetime = Date(timestamp)
+                    if parsed_datetime < max_age:
+                        # report expired over 12 hours ago
+                        raise ReportExpiredException(
+                            "Jacoco report expired %s" % timestamp
+                        )
+                    report_builder_session.record_report_timestamp(
+                        parsed_datetime, max_age
+                    )
+                break
+
+        for package in element.iter("package"):
+            _process_package(
+                package,
+                report_builder_session,
+                try_to_fix_path,
+                partials_as_hits=partials_as_hits,
             )
 
-            for line in source.iter("line"):
-                attr = line.attrib
-                cov: int | str
-                if attr["mb"] != "0":
-                    cov = "%s/%s" % (attr["cb"], int(attr["mb"]) + int(attr["cb"]))
-                    coverage_type = CoverageType.branch
-
-                elif attr["cb"] != "0":
-                    cov = "%s/%s" % (attr["cb"], attr["cb"])
-                    coverage_type = CoverageType.branch
-
-                else:
-                    cov = int(attr["ci"])
-                    coverage_type = CoverageType.line
-
-                if (
-                    coverage_type == CoverageType.branch
-                    and branch_type(cov) == LineType.partial
-                    and partials_as_hits
-                ):
-                    cov = 1
-
-                ln = int(attr["nr"])
+
+def _process_package(
+    package: Element,
+    report_builder_session: ReportBuilderSession,
+    try_to_fix_path: Callable[[str], str | None],
+    partials_as_hits: bool,
+) -> None:
+    base_name = package.attrib["name"]
+
+    file_method_complixity: dict[str, dict[int, tuple[int, int]]] = defaultdict(dict)
+    # Classes complexity
+    for _class in package.iter("class"):
+        class_name = _class.attrib["name"]
+        if "$" not in class_name:
+            method_complixity = file_method_complixity[class_name]
+            # Method Complexity
+            for method in _class.iter("method"):
+                ln = int(method.attrib.get("line", 0))
                 if ln > 0:
-                    complexity = method_complixity.get(ln)
-                    if complexity:
-                        coverage_type = CoverageType.method
-                    # add line to file
-                    _file.append(
-                        ln,
-                        report_builder_session.create_coverage_line(
-                            cov,
-                            coverage_type,
-                            complexity=complexity,
-                        ),
-                    )
-                else:
-                    log.warning(
-                        f"Jacoco report has an invalid coverage line: nr={ln}. Skipping processing line."
-                    )
+                    for counter in method.iter("counter"):
+                        if counter.attrib["type"] == "COMPLEXITY":
+                            m = int(counter.attrib["missed"])
+                            c = int(counter.attrib["covered"])
+                            method_complixity[ln] = (c, m + c)
+                            break
+
+    # Statements
+    for source in package.iter("sourcefile"):
+        source_name = "%s/%s" % (base_name, source.attrib["name"])
+        filename = try_to_fix_path(source_name)
+        if filename is None:
+            continue
+
+        method_complixity = file_method_complixity[source_name.split(".")[0]]
+
+        _file = report_builder_session.create_coverage_file(filename, do_fix_path=False)
+        assert _file is not None, (
+            "`create_coverage_file` with pre-fixed path is infallible"
+        )
 
-            # append file to report
-            report_builder_session.append(_file)
+        for line in source.iter("line"):
+            attr = line.attrib
+            cov: int | str
+            if attr["mb"] != "0":
+                cov = "%s/%s" % (attr["cb"], int(attr["mb"]) + int(attr["cb"]))
+                coverage_type = CoverageType.branch
+
+            elif attr["cb"] != "0":
+                cov = "%s/%s" % (attr["cb"], attr["cb"])
+                coverage_type = CoverageType.branch
+
+            else:
+                cov = int(attr["ci"])
+                coverage_type = CoverageType.line
+
+            if (
+                coverage_type == CoverageType.branch
+                and branch_type(cov) == LineType.partial
+                and partials_as_hits
+            ):
+                cov = 1
+
+            ln = int(attr["nr"])
+            if ln > 0:
+                complexity = method_complixity.get(ln)
+                if complexity:
+                    coverage_type = CoverageType.method
+                # add line to file
+                _file.append(
+                    ln,
+                    report_builder_session.create_coverage_line(
+                        cov,
+                        coverage_type,
+                        complexity=complexity,
+                    ),
+                )
+            else:
+                log.warning(
+                    f"Jacoco report has an invalid coverage line: nr={ln}. Skipping processing line."
+                )
+
+        # append file to report
+        report_builder_session.append(_file)
@@ -1,4 +1,5 @@
 import logging
+import re
 from collections import defaultdict
 from decimal import Decimal, InvalidOperation
 from io import BytesIO
@@ -7,12 +8,25 @@ import sentry_sdk
 from shared.reports.resources import ReportFile
 
 from services.report.languages.base import BaseLanguageProcessor
-from services.report.report_builder import CoverageType, ReportBuilderSession
+from services.report.report_builder import (
+    CompactReportFile,
+    CoverageType,
+    ReportBuilderSession,
+)
 
 log = logging.getLogger(__name__)
 
+IGNORED_METHODS = ("TN", "LF", "LH", "FNF", "FNH", "BRF", "BRH", "FNDA")
+
+# bytes-level tokenizers for whole `SF:` ... `end_of_record` blocks
+SF_RE = re.compile(rb"^SF:([^\n]*)", re.MULTILINE)
+DA_RE = re.compile(rb"^DA:([0-9]+),(-?[0-9]+)(?:,[^\n]*)?\r?$", re.MULTILINE)
+FN_BRDA_RE = re.compile(rb"^(FN|BRDA):([^\n]*)", re.MULTILINE)
+
 
 class LcovProcessor(BaseLanguageProcessor):
+    signatures = (b"TN:", b"SF:")
+
     def matches_content(self, content: bytes, first_line: str, name: str) -> bool:
         return b"\nend_of_record" in content
 
@@ -33,6 +47,79 @@ def from_txt(reports: bytes, report_builder_session: ReportBuilderSession) -> No
 
 def _process_file(
     doc: bytes, report_builder_session: ReportBuilderSession
+) -> ReportFile | CompactReportFile | None:
+    """
+    Processes a single `SF:` ... `end_of_record` block.
+
+    The common case of a block with exactly one `SF:` record followed by only
+    well-formed `DA:` records is tokenized at the bytes level with one regex pass
+    per record type. Anything else goes through the line by line fallback.
+    """
+    sf_matches = list(SF_RE.finditer(doc))
+    if len(sf_matches) != 1 or _has_records(doc[: sf_matches[0].start()]):
+        return _process_file_lines(doc, report_builder_session)
+    sf_start = sf_matches[0].start()
+
+    da_records = DA_RE.findall(doc, sf_start)
+    da_count = doc.count(b"\nDA:") + doc.startswith(b"DA:")
+    if len(da_records) != da_count:
+        return _process_file_lines(doc, report_builder_session)
+
+    filename = sf_matches[0].group(1).decode(errors="replace").strip()
+    JS = filename[-3:] == ".js"
+    CPP = filename[-4:] == ".cpp"
+    # branch and function records are ignored for javascript
+    fn_brda_records = [] if JS else FN_BRDA_RE.findall(doc, sf_start)
+
+    if not fn_brda_records:
+        # only plain line coverage, which can be stored compactly
+        compact_file = report_builder_session.create_compact_file(filename)
+        if compact_file is None:
+            return None
+        for line_str, hit in da_records:
+            if line_str[:1] == b"0":
+                continue
+            compact_file.append(int(line_str), max(int(hit), 0))
+        return compact_file
+
+    _file = report_builder_session.create_coverage_file(filename)
+    if _file is None:
+        return None
+
+    create_coverage_line = report_builder_session.create_coverage_line
+    append = _file.append
+    for line_str, hit in da_records:
+        if line_str[:1] == b"0":
+            continue
+        append(int(line_str), create_coverage_line(max(int(hit), 0)))
+
+    branches: dict[str, dict[str, int]] = defaultdict(dict)
+    fn_lines: set[str] = set()  # lines of function definitions
+    skip_lines: list[str] = []
+    for method, content in fn_brda_records:
+        content = content.decode(errors="replace").strip()
+        if method == b"FN":
+            _process_fn(content, CPP, fn_lines, skip_lines)
+        else:
+            _process_brda(content, _file, branches)
+
+    _process_branches(_file, branches, fn_lines, skip_lines, report_builder_session)
+    return _file
+
+
+def _has_records(doc: bytes) -> bool:
+    """
+    Whether `doc` has any records which are not ignored by `_process_file_lines`.
+    """
+    for line in doc.split(b"\n"):
+        method, colon, _content = line.partition(b":")
+        if colon and method.decode(errors="replace") not in IGNORED_METHODS:
+            return True
+    return False
+
+
+def _process_file_lines(
+    doc: bytes, report_builder_session: ReportBuilderSession
 ) -> ReportFile | None:
     branches: dict[str, dict[str, int]] = defaultdict(dict)
     fn_lines: set[str] = set()  # lines of function definitions
@@ -49,7 +136,7 @@ def _process_file(
 
         method, content = line.split(":", 1)
         content = content.strip()
-        if method in ("TN", "LF", "LH", "FNF", "FNH", "BRF", "BRH", "FNDA"):
+        if method in IGNORED_METHODS:
             # TN: test title
             # LF: lines found
             # LH: lines hit
@@ -110,51 +197,72 @@ def _process_file(
             _file.append(ln, _line)
 
         elif method == "FN" and not JS:
-            """
-            Following is a list of line numbers for each function name found in the
-            source file:
+            _process_fn(content, CPP, fn_lines, skip_lines)
 
-            FN:<line number of function start>,<function name>
-            """
+        elif method == "BRDA" and not JS:
+            _process_brda(content, _file, branches)
 
-            split = content.split(",", 1)
-            if len(split) < 2:
-                continue
-            line_str, name = split
+    if _file is None:
+        return None
 
-            if CPP and name[:2] in ("_Z", "_G"):
-                skip_lines.append(line_str)
-                continue
+    _process_branches(_file, branches, fn_lines, skip_lines, report_builder_session)
+    return _file
 
-            fn_lines.add(line_str)
 
-        elif method == "BRDA" and not JS:
-            """
-            Branch coverage information is stored with one line per branch:
+def _process_fn(
+    content: str, CPP: bool, fn_lines: set[str], skip_lines: list[str]
+) -> None:
+    """
+    Following is a list of line numbers for each function name found in the
+    source file:
 
-              BRDA:<line number>,<block number>,<branch number>,<taken>
+    FN:<line number of function start>,<function name>
+    """
 
-            Block number and branch number are gcc internal IDs for the branch.
-            Taken is either "-" if the basic block containing the branch was never
-            executed or a number indicating how often that branch was taken.
-            """
-            # BRDA:<line number>,<block number>,<branch number>,<taken>
-            split = content.split(",", 3)
-            if len(split) < 4:
-                continue
-            line_str, block, branch, taken = split
+    split = content.split(",", 1)
+    if len(split) < 2:
+        return
+    line_str, name = split
 
-            if line_str == "1" and _file.name.endswith(".ts"):
-                continue
+    if CPP and name[:2] in ("_Z", "_G"):
+        skip_lines.append(line_str)
+        return
 
-            elif line_str not in ("0", ""):
-                branches[line_str]["%s:%s" % (block, branch)] = (
-                    0 if taken in ("-", "0") else 1
-                )
+    fn_lines.add(line_str)
 
-    if _file is None:
-        return None
 
+def _process_brda(
+    content: str, _file: ReportFile, branches: dict[str, dict[str, int]]
+) -> None:
+    """
+    Branch coverage information is stored with one line per branch:
+
+      BRDA:<line number>,<block number>,<branch number>,<taken>
+
+    Block number and branch number are gcc internal IDs for the branch.
+    Taken is either "-" if the basic block containing the branch was never
+    executed or a number indicating how often that branch was taken.
+    """
+    # BRDA:<line number>,<block number>,<branch number>,<taken>
+    split = content.split(",", 3)
+    if len(split) < 4:
+        return
+    line_str, block, branch, taken = split
+
+    if line_str == "1" and _file.name.endswith(".ts"):
+        return
+
+    elif line_str not in ("0", ""):
+        branches[line_str]["%s:%s" % (block, branch)] = 0 if taken in ("-", "0") else 1
+
+
+def _process_branches(
+    _file: ReportFile,
+    branches: dict[str, dict[str, int]],
+    fn_lines: set[str],
+    skip_lines: list[str],
+    report_builder_session: ReportBuilderSession,
+) -> None:
     # remove skipped branches
     for sl in skip_lines:
         branches.pop(sl, None)
@@ -183,8 +291,6 @@ def _process_file(
         # instead of using `.append`/merge, this rather overwrites the line:
         _file[ln] = _line
 
-    return _file
-
 
 def parse_int(n: str) -> int:
     if n.isnumeric():
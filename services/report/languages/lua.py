@@ -7,6 +7,8 @@ from services.report.report_builder import ReportBuilderSession
 
 
 class LuaProcessor(BaseLanguageProcessor):
+    signatures = (b"=======",)
+
     def matches_content(self, content: bytes, first_line: str, name: str) -> bool:
         return content[:7] == b"======="
 
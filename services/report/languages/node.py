@@ -1,15 +1,22 @@
+import json
 from collections import defaultdict
 from fractions import Fraction
+from itertools import chain
+from typing import Iterable, Iterator
 
 import sentry_sdk
 from shared.reports.resources import ReportFile
 from shared.utils.merge import partials_to_line
 
+from helpers.exceptions import CorruptRawReportError
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import LazyJSONObject
 from services.report.report_builder import CoverageType, ReportBuilderSession
 
 
 class NodeProcessor(BaseLanguageProcessor):
+    json_streaming = True
+
     def matches_content(self, content: dict, first_line: str, name: str) -> bool:
         return isinstance(content, dict) and all(
             isinstance(data, dict) for data in content.values()
@@ -21,6 +28,28 @@ class NodeProcessor(BaseLanguageProcessor):
     ) -> None:
         return from_json(content, report_builder_session)
 
+    @sentry_sdk.trace
+    def process_json_stream(
+        self, document: LazyJSONObject, report_builder_session: ReportBuilderSession
+    ) -> None:
+        return from_json_items(_iter_file_entries(document), report_builder_session)
+
+
+def _iter_file_entries(document: LazyJSONObject) -> Iterator[tuple[str, dict]]:
+    """
+    Yields the file entries of a streamed report, checking the structure that
+    `matches_content` can only check for the first few files.
+    """
+    try:
+        for filename, data in document.items():
+            if not isinstance(data, dict):
+                raise CorruptRawReportError(
+                    "node", "file entries expected to be objects"
+                )
+            yield filename, data
+    except json.JSONDecodeError as e:
+        raise CorruptRawReportError("node", str(e))
+
 
 def get_line_coverage(location, cov, line_type):
     if location.get("skip"):
@@ -74,11 +103,11 @@ def must_be_dict(value):
 
 
 def next_from_json(
-    report_dict: dict, report_builder_session: ReportBuilderSession
+    items: Iterable[tuple[str, dict]], report_builder_session: ReportBuilderSession
 ) -> None:
     path_fixer = report_builder_session.path_fixer
 
-    for filename, data in report_dict.items():
+    for filename, data in items:
         filename = path_fixer(filename) or path_fixer(
             filename.replace("lib/", "src/", 1)
         )
@@ -324,6 +353,15 @@ def jscoverage(
 
 
 def from_json(report_dict: dict, report_builder_session: ReportBuilderSession) -> None:
+    return from_json_items(report_dict.items(), report_builder_session)
+
+
+def from_json_items(
+    items: Iterable[tuple[str, dict]], report_builder_session: ReportBuilderSession
+) -> None:
+    """
+    Processes the `(filename, data)` file entries of a report one at a time.
+    """
     enable_partials = report_builder_session.yaml_field(
         ("parsers", "javascript", "enable_partials"),
         False,
@@ -331,11 +369,14 @@ def from_json(report_dict: dict, report_builder_session: ReportBuilderSession) -
     path_fixer = report_builder_session.path_fixer
 
     if enable_partials:
-        if next(iter(report_dict.items()))[0].endswith(".js"):
+        items = iter(items)
+        first_item = next(items)
+        items = chain([first_item], items)
+        if first_item[0].endswith(".js"):
             # only javascript is supported ATM
-            return next_from_json(report_dict, report_builder_session)
+            return next_from_json(items, report_builder_session)
 
-    for filename, data in report_dict.items():
+    for filename, data in items:
         filename = path_fixer(filename) or path_fixer(
             filename.replace("lib/", "src/", 1)
         )
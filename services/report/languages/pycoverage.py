@@ -1,6 +1,11 @@
+import json
+from typing import Iterable
+
 import sentry_sdk
 
+from helpers.exceptions import CorruptRawReportError
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import LazyJSONObject
 from services.report.report_builder import ReportBuilderSession, SpecialLabelsEnum
 
 COVERAGE_HIT = 1
@@ -8,6 +13,8 @@ COVERAGE_MISS = 0
 
 
 class PyCoverageProcessor(BaseLanguageProcessor):
+    json_streaming = True
+
     def matches_content(self, content: dict, first_line: str, name: str) -> bool:
         meta = "meta" in content and content["meta"]
         return "files" in content and isinstance(meta, dict) and "show_contexts" in meta
@@ -17,29 +24,61 @@ class PyCoverageProcessor(BaseLanguageProcessor):
         self, content: dict, report_builder_session: ReportBuilderSession
     ) -> None:
         labels_table = content.get("labels_table", {})
+        _process_files(content["files"].items(), labels_table, report_builder_session)
 
-        for filename, file_coverage in content["files"].items():
-            _file = report_builder_session.create_coverage_file(filename)
-            if _file is None:
-                continue
-
-            lines_and_coverage = [
-                (COVERAGE_HIT, ln) for ln in file_coverage["executed_lines"]
-            ] + [(COVERAGE_MISS, ln) for ln in file_coverage["missing_lines"]]
-            for cov, ln in lines_and_coverage:
-                if ln > 0:
-                    label_list_of_lists = [
-                        [_normalize_label(labels_table, testname)]
-                        for testname in file_coverage.get("contexts", {}).get(
-                            str(ln), []
+    @sentry_sdk.trace
+    def process_json_stream(
+        self, document: LazyJSONObject, report_builder_session: ReportBuilderSession
+    ) -> None:
+        try:
+            # The `labels_table` of compressed reports comes *after* the `files`.
+            # Unless it can be ruled out cheaply, the `files` are thus
+            # processed only after the whole document has been gone through.
+            has_labels_table = document.contains(b'"labels_table"')
+            labels_table = {}
+            files = None
+            for key, value in document.items(lazy_keys=("files",)):
+                if key == "labels_table":
+                    labels_table = value
+                elif key == "files":
+                    files = value
+                    if not has_labels_table:
+                        _process_files(
+                            files.items(), labels_table, report_builder_session
                         )
-                    ]
-                    _line = report_builder_session.create_coverage_line(
-                        cov,
-                        labels_list_of_lists=label_list_of_lists,
-                    )
-                    _file.append(ln, _line)
-            report_builder_session.append(_file)
+            if has_labels_table and files is not None:
+                _process_files(files.items(), labels_table, report_builder_session)
+        except json.JSONDecodeError as e:
+            raise CorruptRawReportError("pycoverage", str(e))
+
+
+def _process_files(
+    files: Iterable[tuple[str, dict]],
+    labels_table: dict[str, str],
+    report_builder_session: ReportBuilderSession,
+) -> None:
+    for filename, file_coverage in files:
+        _file = report_builder_session.create_coverage_file(filename)
+        if _file is None:
+            continue
+
+        lines_and_coverage = [
+            (COVERAGE_HIT, ln) for ln in file_coverage["executed_lines"]
+        ] + [(COVERAGE_MISS, ln) for ln in file_coverage["missing_lines"]]
+        for cov, ln in lines_and_coverage:
+            if ln > 0:
+                label_list_of_lists = [
+                    [_normalize_label(labels_table, testname)]
+                    for testname in file_coverage.get("contexts", {}).get(str(ln), [])
+                ]
+                _line = report_builder_session.create_coverage_line(
+                    cov,
+                    labels_list_of_lists=label_list_of_lists,
+                    filename=_file.name,
+                    line_number=ln,
+                )
+                _file.append(ln, _line)
+        report_builder_session.append(_file)
 
 
 def _normalize_label(labels_table: dict[str, str], testname: int | float | str) -> str:
@@ -25,8 +25,13 @@ def from_json(data_dict: dict, report_builder_session: ReportBuilderSession) ->
         coverage: [null]
     """
 
+    fixed_paths = report_builder_session.fix_paths(
+        data["name"] for data in data_dict["files"]
+    )
     for data in data_dict["files"]:
-        _file = report_builder_session.create_coverage_file(data["name"])
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[data["name"]], do_fix_path=False
+        )
         if _file is None:
             continue
 
@@ -16,8 +16,13 @@ class ScalaProcessor(BaseLanguageProcessor):
 
 
 def from_json(data_dict: dict, report_builder_session: ReportBuilderSession) -> None:
+    fixed_paths = report_builder_session.fix_paths(
+        f["filename"] for f in data_dict["fileReports"]
+    )
     for f in data_dict["fileReports"]:
-        _file = report_builder_session.create_coverage_file(f["filename"])
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[f["filename"]], do_fix_path=False
+        )
         if _file is None:
             continue
 
@@ -22,8 +22,13 @@ class SimplecovProcessor(BaseLanguageProcessor):
 
 
 def from_json(json: dict, report_builder_session: ReportBuilderSession) -> None:
+    fixed_paths = report_builder_session.fix_paths(
+        data["filename"] for data in json["files"]
+    )
     for data in json["files"]:
-        _file = report_builder_session.create_coverage_file(data["filename"])
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[data["filename"]], do_fix_path=False
+        )
         if _file is None:
             continue
 
@@ -1,4 +1,10 @@
+from io import BytesIO
+
+from lxml import etree
+
 from services.path_fixer import PathFixer
+from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import iter_streamed_elements
 from services.report.report_builder import ReportBuilder, ReportBuilderSession
 
 
@@ -17,3 +23,14 @@ def create_report_builder_session(
         current_yaml=current_yaml,
     )
     return report_builder.create_report_builder_session(filename)
+
+
+def process_xml_streaming(
+    processor: BaseLanguageProcessor,
+    xml: str,
+    report_builder_session: ReportBuilderSession,
+) -> None:
+    events = etree.iterparse(BytesIO(xml.encode()), events=("start", "end"))
+    _, root = next(events)
+    elements = iter_streamed_elements(events, processor.streaming_tags)
+    processor.process_streaming(root, elements, report_builder_session)
@@ -8,7 +8,7 @@ from helpers.exceptions import ReportExpiredException
 from services.report.languages import clover
 from test_utils.base import BaseTestCase
 
-from . import create_report_builder_session
+from . import create_report_builder_session, process_xml_streaming
 
 xml = """<?xml version="1.0" encoding="UTF-8"?>
 <coverage generated="%s">
@@ -145,3 +145,23 @@ class TestCloverProcessor(BaseTestCase):
         report_builder_session = create_report_builder_session()
         with pytest.raises(ReportExpiredException, match="Clover report expired"):
             clover.from_xml(etree.fromstring(xml % date), report_builder_session)
+
+    def test_process_streaming(self):
+        data = xml % int(time())
+
+        def fixes(path):
+            return None if path == "ignore" else path
+
+        expected_session = create_report_builder_session(path_fixer=fixes)
+        clover.from_xml(etree.fromstring(data), expected_session)
+        expected = self.convert_report_to_better_readable(
+            expected_session.output_report()
+        )
+
+        report_builder_session = create_report_builder_session(path_fixer=fixes)
+        process_xml_streaming(clover.CloverProcessor(), data, report_builder_session)
+        processed_report = self.convert_report_to_better_readable(
+            report_builder_session.output_report()
+        )
+
+        assert processed_report == expected
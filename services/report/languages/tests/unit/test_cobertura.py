@@ -10,7 +10,7 @@ from services.path_fixer import PathFixer
 from services.report.languages import cobertura
 from test_utils.base import BaseTestCase
 
-from . import create_report_builder_session
+from . import create_report_builder_session, process_xml_streaming
 
 xml = """<?xml version="1.0" ?>
 <!DOCTYPE coverage
@@ -167,6 +167,34 @@ class TestCobertura(BaseTestCase):
         assert processed_report["totals"] == expected_result["totals"]
         assert processed_report == expected_result
 
+    def test_process_streaming(self):
+        sources = """
+        <sources>
+            <source>/user/repo</source>
+        </sources>
+        """
+        data = xml % ("", int(time()), sources, "")
+
+        def fixes(path, *, bases_to_try):
+            return None if path == "ignore" else f"{bases_to_try[0]}/{path}"
+
+        expected_session = create_report_builder_session(path_fixer=fixes)
+        cobertura.from_xml(etree.fromstring(data), expected_session)
+        expected = self.convert_report_to_better_readable(
+            expected_session.output_report()
+        )
+
+        report_builder_session = create_report_builder_session(path_fixer=fixes)
+        process_xml_streaming(
+            cobertura.CoberturaProcessor(), data, report_builder_session
+        )
+        processed_report = self.convert_report_to_better_readable(
+            report_builder_session.output_report()
+        )
+
+        assert "/user/repo/source" in processed_report["report"]["files"]
+        assert processed_report == expected
+
     def test_report_missing_conditions(self):
         def fixes(path, *, bases_to_try):
             if path == "ignore":
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from services.report.languages.helpers import LazyJSONObject, read_json_prefix
+
+document = json.dumps(
+    {
+        "meta": {"show_contexts": True},
+        "files": {
+            "a.py": {"executed_lines": [1, 2], "name": 'tricky ,}]"{[ string'},
+            "b.py": {"executed_lines": [3]},
+        },
+        "labels_table": {"0": "test"},
+    },
+    indent=2,
+)
+
+
+def test_lazy_json_object():
+    lazy = LazyJSONObject(document)
+    items = list(lazy.items())
+
+    assert items == list(json.loads(document).items())
+    assert lazy.end == len(document)
+
+
+def test_lazy_json_object_bytes():
+    data = json.dumps({"ä.py": {"name": "ö\\"}, "b.py": -1.5}, ensure_ascii=False)
+    lazy = LazyJSONObject(memoryview(data.encode()))
+
+    assert list(lazy.items()) == list(json.loads(data).items())
+    assert lazy.end == len(data.encode())
+    assert lazy.contains(b'"b.py"')
+    assert not lazy.contains(b'"c.py"')
+
+
+def test_lazy_json_object_lazy_keys():
+    seen = {}
+    for key, value in LazyJSONObject(document).items(lazy_keys=("files",)):
+        if key == "files":
+            assert isinstance(value, LazyJSONObject)
+            # only partially consumed, the rest is skipped over
+            seen[key] = next(value.items())
+        else:
+            seen[key] = value
+
+    assert seen == {
+        "meta": {"show_contexts": True},
+        "files": ("a.py", {"executed_lines": [1, 2], "name": 'tricky ,}]"{[ string'}),
+        "labels_table": {"0": "test"},
+    }
+
+
+@pytest.mark.parametrize(
+    "malformed",
+    [
+        '{"a": 1 "b": 2}',
+        '{"a": 1,}',
+        "{1: 2}",
+        '{"a" 1}',
+        '{"a": 1',
+        "[1]",
+        '{"a": {"b": "c}}',
+        '{"a": [1, }',
+        '{"a": tru}',
+    ],
+)
+def test_lazy_json_object_malformed(malformed):
+    with pytest.raises(json.JSONDecodeError):
+        list(LazyJSONObject(malformed).items())
+
+
+def test_read_json_prefix():
+    full = json.loads(document)
+    assert read_json_prefix(document, len(document)) == full
+
+    for size in range(1, len(document)):
+        prefix = read_json_prefix(document, size)
+        # every truncated value is a prefix of the full value
+        assert list(prefix) == list(full)[: len(prefix)]
+
+    assert read_json_prefix(document, 130) == {
+        "meta": {"show_contexts": True},
+        "files": {"a.py": {"executed_lines": [1, 2]}},
+    }
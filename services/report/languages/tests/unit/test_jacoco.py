@@ -10,7 +10,7 @@ from helpers.exceptions import ReportExpiredException
 from services.report.languages import jacoco
 from test_utils.base import BaseTestCase
 
-from . import create_report_builder_session
+from . import create_report_builder_session, process_xml_streaming
 
 xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>
 <!DOCTYPE report PUBLIC "-//JACOCO//DTD Report 1.0//EN" "report.dtd">
@@ -91,6 +91,33 @@ class TestJacoco(BaseTestCase):
 
         assert expected_result_archive == processed_report["archive"]
 
+    def test_process_streaming(self):
+        data = xml % int(time())
+
+        def fixes(path):
+            return None if path == "base/ignore" else path
+
+        expected_session = create_report_builder_session(path_fixer=fixes)
+        jacoco.from_xml(etree.fromstring(data), expected_session)
+        expected = self.convert_report_to_better_readable(
+            expected_session.output_report()
+        )
+
+        report_builder_session = create_report_builder_session(path_fixer=fixes)
+        process_xml_streaming(jacoco.JacocoProcessor(), data, report_builder_session)
+        processed_report = self.convert_report_to_better_readable(
+            report_builder_session.output_report()
+        )
+
+        assert processed_report == expected
+
+    def test_process_streaming_expired(self):
+        report_builder_session = create_report_builder_session()
+        with pytest.raises(ReportExpiredException, match="Jacoco report expired"):
+            process_xml_streaming(
+                jacoco.JacocoProcessor(), xml % "01-01-2014", report_builder_session
+            )
+
     def test_report_partials_as_hits(self):
         def fixes(path):
             if path == "base/ignore":
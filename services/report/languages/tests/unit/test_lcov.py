@@ -215,3 +215,27 @@ end_of_record
                 (1047, "1/2", "b", [[0, "1/2", ["0:0"], None, None]], None, None),
             ]
         }
+
+    def test_fast_path_matches_line_by_line(self):
+        texts = [
+            txt,
+            negative_count,
+            corrupt_txt,
+            b"TN:\nSF:a.cpp\nDA:1,1\r\nDA:2,0,abc\nFN:2,_Zfn\nBRDA:2,0,0,-\nend_of_record",
+            b"SF:a.c\nDA:1,1\nSF:b.c\nDA:1,0\nend_of_record",
+            b"DA:1,1\nSF:a.c\nDA:2,1\nend_of_record",
+            b"SF:a.c\nDA:1,1\nDA: 2,1\nDA:3,4e2\nend_of_record",
+        ]
+
+        def process(text: bytes, process_file) -> dict:
+            report_builder_session = create_report_builder_session()
+            for block in text.split(b"\nend_of_record"):
+                if (_file := process_file(block, report_builder_session)) is not None:
+                    report_builder_session.append(_file)
+            report = report_builder_session.output_report()
+            return self.convert_report_to_better_readable(report)
+
+        for text in texts:
+            assert process(text, lcov._process_file) == process(
+                text, lcov._process_file_lines
+            )
@@ -5,8 +5,10 @@ from pathlib import Path
 
 import pytest
 
+from helpers.exceptions import CorruptRawReportError
 from services.report import legacy_totals
 from services.report.languages import node
+from services.report.languages.helpers import LazyJSONObject
 from test_utils.base import BaseTestCase
 
 from . import create_report_builder_session
@@ -106,6 +108,44 @@ class TestNodeProcessor(BaseTestCase):
             "totals": legacy_totals(report),
         } == expected_result
 
+    @pytest.mark.parametrize("enable_partials", [True, False])
+    def test_process_json_stream(self, enable_partials):
+        nodejson = loads(self.readfile("node/node1.json"))
+        nodejson.update(base_report)
+        current_yaml = {"parsers": {"javascript": {"enable_partials": enable_partials}}}
+
+        expected_session = create_report_builder_session(current_yaml=current_yaml)
+        node.from_json(nodejson, expected_session)
+        expected_json, expected_chunks, _totals = (
+            expected_session.output_report().serialize()
+        )
+
+        report_builder_session = create_report_builder_session(
+            current_yaml=current_yaml
+        )
+        node.NodeProcessor().process_json_stream(
+            LazyJSONObject(dumps(nodejson, indent=2)), report_builder_session
+        )
+        report_json, chunks, _totals = (
+            report_builder_session.output_report().serialize()
+        )
+
+        assert report_json == expected_json
+        assert chunks == expected_chunks
+
+    def test_process_json_stream_corrupt(self):
+        report_builder_session = create_report_builder_session()
+        with pytest.raises(CorruptRawReportError):
+            node.NodeProcessor().process_json_stream(
+                LazyJSONObject('{"file.js": {}, "other.js": 1}'),
+                report_builder_session,
+            )
+        with pytest.raises(CorruptRawReportError):
+            node.NodeProcessor().process_json_stream(
+                LazyJSONObject('{"file.js": {}, "other.js": {'),
+                report_builder_session,
+            )
+
     @pytest.mark.parametrize("name", ["inline", "ifbinary", "ifbinarymb"])
     def test_singles(self, name):
         record = self.readjson("node/%s.json" % name)
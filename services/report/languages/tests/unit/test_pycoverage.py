@@ -3,6 +3,11 @@ This is going to be deprecated soon.
 For the tests with encoded labels see services/report/languages/tests/unit/test_pycoverage_encoded_labels.py
 """
 
+import json
+
+import pytest
+
+from services.report.languages.helpers import LazyJSONObject
 from services.report.languages.pycoverage import PyCoverageProcessor
 from test_utils.base import BaseTestCase
 
@@ -605,3 +610,33 @@ class TestPyCoverageProcessor(BaseTestCase):
                 "diff": None,
             },
         }
+
+    @pytest.mark.parametrize("content", [SAMPLE, COMPRESSED_SAMPLE])
+    def test_process_json_stream(self, content):
+        p = PyCoverageProcessor()
+        current_yaml = {
+            "flag_management": {
+                "default_rules": {
+                    "carryforward": "true",
+                    "carryforward_mode": "labels",
+                }
+            }
+        }
+
+        expected_session = create_report_builder_session(current_yaml=current_yaml)
+        p.process(content, expected_session)
+        expected = self.convert_report_to_better_readable(
+            expected_session.output_report()
+        )
+
+        report_builder_session = create_report_builder_session(
+            current_yaml=current_yaml
+        )
+        p.process_json_stream(
+            LazyJSONObject(json.dumps(content)), report_builder_session
+        )
+        processed_report = self.convert_report_to_better_readable(
+            report_builder_session.output_report()
+        )
+
+        assert processed_report == expected
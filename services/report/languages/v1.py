@@ -47,8 +47,11 @@ def from_json(json: str, report_builder_session: ReportBuilderSession) -> None:
     if not isinstance(json["coverage"], dict):
         return
 
+    fixed_paths = report_builder_session.fix_paths(json["coverage"])
     for fn, lns in json["coverage"].items():
-        _file = report_builder_session.create_coverage_file(fn)
+        _file = report_builder_session.create_coverage_file(
+            fixed_paths[fn], do_fix_path=False
+        )
         if _file is None:
             continue
 
@@ -0,0 +1,179 @@
+"""
+A cache of the `Report`s parsed out of the individual files of an upload.
+
+CI retries and matrix builds frequently upload byte-identical coverage files.
+As long as the processing inputs (the commit yaml, the path fixes, etc) are
+the same as well, the resulting `Report` is the same too, and the language
+processor does not have to run again.
+"""
+
+import hashlib
+import logging
+import time
+
+import orjson
+import zstandard
+from redis.exceptions import RedisError
+from shared.config import get_config
+from shared.helpers.redis import get_redis_connection
+from shared.reports.resources import Report
+from shared.yaml import UserYaml
+
+from helpers.metrics import MiB
+from services.path_fixer import PathFixer
+from services.report.fixes import LineIntervals
+from services.report.parser.types import ParsedUploadedReportFile
+from services.report.report_processor import PARSED_REPORT_CACHE_COUNTER
+
+log = logging.getLogger(__name__)
+
+# This has to be bumped whenever the output of any language processor changes.
+CACHE_VERSION = 1
+CACHE_KEY_PREFIX = f"parsed-report-cache/v{CACHE_VERSION}"
+# A sorted set of all the cached reports, scored by their insertion time.
+CACHE_INDEX_KEY = f"{CACHE_KEY_PREFIX}/index"
+
+DEFAULT_CACHE_TTL = 6 * 60 * 60
+DEFAULT_MAX_ENTRY_SIZE = 10 * MiB
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+def _config(key: str, default):
+    return get_config(
+        "setup", "upload_processing", "parsed_report_cache", key, default=default
+    )
+
+
+def is_cache_enabled() -> bool:
+    return bool(_config("enabled", False))
+
+
+def _json_default(obj):
+    if isinstance(obj, LineIntervals):
+        return obj.intervals()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
+
+
+def context_fingerprint(
+    commit_yaml: UserYaml | dict | None,
+    sessionid: int,
+    ignored_lines: dict,
+    path_fixer: PathFixer,
+) -> str:
+    """
+    Returns a hash of all the inputs of an upload that affect how its files are parsed.
+    """
+    if isinstance(commit_yaml, UserYaml):
+        commit_yaml = commit_yaml.to_dict()
+    inputs = [commit_yaml, sessionid, ignored_lines, path_fixer.fingerprint()]
+    serialized = orjson.dumps(
+        inputs, option=orjson.OPT_SORT_KEYS, default=_json_default
+    )
+    return hashlib.sha256(serialized).hexdigest()
+
+
+def cache_key(fingerprint: str, report_file: ParsedUploadedReportFile) -> str:
+    """
+    Returns the cache key for `report_file`, which is uploaded with the inputs
+    hashed in the `context_fingerprint`.
+    The filename is part of the key, as it is used for format detection and
+    for resolving relative paths.
+    """
+    digest = hashlib.sha256(fingerprint.encode())
+    digest.update(orjson.dumps(report_file.filename))
+    digest.update(report_file.contents)
+    return f"{CACHE_KEY_PREFIX}/{digest.hexdigest()}"
+
+
+def load_cached_report(key: str) -> Report | None:
+    try:
+        cached: dict = get_redis_connection().hgetall(key)
+    except RedisError:
+        log.warning("Failed to load parsed report from cache", exc_info=True)
+        PARSED_REPORT_CACHE_COUNTER.labels(result="error").inc()
+        return None
+    if not cached:
+        PARSED_REPORT_CACHE_COUNTER.labels(result="miss").inc()
+        return None
+
+    # NOTE: our redis client is configured to return `bytes` everywhere,
+    # so the dict keys are `bytes` as well.
+    try:
+        dctx = zstandard.ZstdDecompressor()
+        chunks = dctx.decompress(cached[b"chunks"]).decode(errors="replace")
+        report_json = orjson.loads(dctx.decompress(cached[b"report_json"]))
+        report = Report.from_chunks(
+            chunks=chunks,
+            files=report_json["files"],
+            sessions=report_json["sessions"],
+        )
+    except Exception:
+        # a corrupted (or outdated) entry would otherwise fail every upload
+        # of the same file until it expires
+        log.warning("Failed to decode cached parsed report", exc_info=True)
+        PARSED_REPORT_CACHE_COUNTER.labels(result="error").inc()
+        try:
+            get_redis_connection().delete(key)
+        except RedisError:
+            log.warning("Failed to delete parsed report from cache", exc_info=True)
+        return None
+
+    PARSED_REPORT_CACHE_COUNTER.labels(result="hit").inc()
+    return report
+
+
+def save_cached_report(
+    key: str, report: Report, accepted_until: float | None = None
+) -> None:
+    """
+    Stores the parsed `report` in the cache.
+
+    Cached reports expire after the configured `ttl`. Reports larger than the
+    `max_entry_size` are not cached at all, and once there are more than
+    `max_entries` reports in the cache, the oldest ones are evicted.
+
+    Reports of formats carrying a timestamp are rejected once they are older
+    than `codecov.max_report_age`. As the cache is not checking that on a hit,
+    such reports expire from the cache at their `accepted_until` time at the latest.
+    """
+    max_ttl = _config("ttl", DEFAULT_CACHE_TTL)
+    now = time.time()
+    ttl = max_ttl
+    if accepted_until is not None:
+        ttl = min(ttl, int(accepted_until - now))
+        if ttl <= 0:
+            return
+
+    report_json, chunks, _totals = report.serialize(with_totals=False)
+    if len(report_json) + len(chunks) > _config(
+        "max_entry_size", DEFAULT_MAX_ENTRY_SIZE
+    ):
+        PARSED_REPORT_CACHE_COUNTER.labels(result="too_large").inc()
+        return
+
+    max_entries = _config("max_entries", DEFAULT_MAX_ENTRIES)
+    mapping = {
+        "report_json": zstandard.compress(report_json),
+        "chunks": zstandard.compress(chunks),
+    }
+
+    try:
+        redis = get_redis_connection()
+        with redis.pipeline() as pipeline:
+            pipeline.hset(key, mapping=mapping)
+            pipeline.expire(key, ttl)
+            pipeline.zadd(CACHE_INDEX_KEY, {key: now})
+            pipeline.zremrangebyscore(CACHE_INDEX_KEY, "-inf", now - max_ttl)
+            pipeline.expire(CACHE_INDEX_KEY, max_ttl)
+            pipeline.zcard(CACHE_INDEX_KEY)
+            *_, entries = pipeline.execute()
+
+        if entries > max_entries:
+            evicted = redis.zpopmin(CACHE_INDEX_KEY, entries - max_entries)
+            if evicted:
+                redis.delete(*(evicted_key for evicted_key, _score in evicted))
+    except RedisError:
+        log.warning("Failed to save parsed report to cache", exc_info=True)
+        PARSED_REPORT_CACHE_COUNTER.labels(result="error").inc()
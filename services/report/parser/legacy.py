@@ -1,5 +1,5 @@
+import re
 import string
-from io import BytesIO
 
 import sentry_sdk
 
@@ -14,37 +14,29 @@ class LegacyReportParser(object):
 
     separator_lines = [network_separator, env_separator, eof_separator]
 
-    def _find_place_to_cut(self, raw_report: bytes):
+    separator_re = re.compile(
+        b"|".join(re.escape(separator) for separator in separator_lines)
+    )
+    path_line_re = re.compile(rb"# path=([^\n]*)\n?")
+
+    def _find_place_to_cut(self, raw_report: bytes | memoryview):
         """Finds the locations of all separators in the report, as listed above.
 
         Args:
-            raw_report (bytes): the raw_report to parse
+            raw_report (bytes | memoryview): the raw_report to parse
 
         Yields:
             tuple: tuple in the format (separator_location, separator)
         """
-        common_base = b"<<<<<<"
-        starting_point = 0
-        while 0 <= starting_point <= len(raw_report):
-            next_place = raw_report.find(common_base, starting_point)
-            if next_place >= 0:
-                starting_point = next_place + 1
-                for separator in self.separator_lines:
-                    w = raw_report.find(
-                        separator, next_place, next_place + len(separator)
-                    )
-                    if w >= 0:
-                        yield w, separator
-                        starting_point = next_place + len(separator)
-            else:
-                return
+        for match in self.separator_re.finditer(raw_report):
+            yield match.start(), match.group()
 
-    def _get_sections_to_cut(self, raw_report: bytes):
+    def _get_sections_to_cut(self, raw_report: bytes | memoryview):
         """Finds which are the sections to cut when parsing `raw_report`.
             It yields, for each section, where it starts, ends and what separator it uses
 
         Args:
-            raw_report (bytes): the raw_report to parse
+            raw_report (bytes | memoryview): the raw_report to parse
 
         Yields:
             tuple: tuple in the format (start_index, end_index, separator used)
@@ -62,7 +54,7 @@ class LegacyReportParser(object):
         else:
             yield (0, len(raw_report), None)
 
-    def cut_sections(self, raw_report: bytes):
+    def cut_sections(self, raw_report: bytes | memoryview):
         """Cuts `raw_report` into the sections that we recognize in a report
 
         This function takes the proper steps to find all the relevant sections of a report:
@@ -74,8 +66,11 @@ class LegacyReportParser(object):
         and splits them, also taking care of 'strip()' them, removing whitespaces,
             as the original logic also does.
 
+        The section contents are slices of `raw_report`, so passing in a `memoryview`
+            avoids copying any of the (potentially huge) section contents.
+
         Args:
-            raw_report (bytes): the raw_report to parse
+            raw_report (bytes | memoryview): the raw_report to parse
 
         Yields:
             dict: Dicts with contents, filename and footer of each section
@@ -90,12 +85,10 @@ class LegacyReportParser(object):
                 i_end -= 1
             if i_start < i_end:
                 filename = None
-                if raw_report[i_start : i_start + len(b"# path=")] == b"# path=":
-                    content = BytesIO(raw_report)
-                    content.seek(i_start)
-                    first_line = next(iter(content))
-                    filename = first_line.split(b"# path=")[1].decode().strip()
-                    i_start = i_start + len(first_line)
+                path_line = self.path_line_re.match(raw_report, i_start)
+                if path_line:
+                    filename = path_line.group(1).decode().strip()
+                    i_start = path_line.end()
                     while i_start < i_end and raw_report[i_start] in whitespaces:
                         i_start += 1
                 yield {
@@ -106,10 +99,13 @@ class LegacyReportParser(object):
 
     @sentry_sdk.trace
     def parse_raw_report_from_bytes(self, raw_report: bytes) -> LegacyParsedRawReport:
-        raw_report, _, _compat_report_str = raw_report.partition(
-            self.ignore_from_now_on_marker
-        )
-        sections = self.cut_sections(raw_report)
+        # All the sections are cut out of this view without copying them,
+        # the uploaded files only turn into `bytes` once a processor needs them.
+        report_view = memoryview(raw_report)
+        compat_marker = raw_report.find(self.ignore_from_now_on_marker)
+        if compat_marker >= 0:
+            report_view = report_view[:compat_marker]
+        sections = self.cut_sections(report_view)
         res = self._generate_parsed_report_from_sections(sections)
         return res
 
@@ -120,12 +116,12 @@ class LegacyReportParser(object):
         report_fixes_section = None
         for sect in sections:
             if sect["footer"] == self.network_separator:
-                toc_section = sect["contents"]
+                toc_section = bytes(sect["contents"])
             elif sect["footer"] == self.env_separator:
-                env_section = sect["contents"]
+                env_section = bytes(sect["contents"])
             else:
                 if sect["filename"] == "fixes":
-                    report_fixes_section = sect["contents"]
+                    report_fixes_section = bytes(sect["contents"])
                 else:
                     uploaded_files.append(
                         ParsedUploadedReportFile(
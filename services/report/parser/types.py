@@ -1,24 +1,59 @@
+import re
 from io import BytesIO
 from typing import Any
 
 from services.path_fixer.fixpaths import clean_toc
 from services.report.fixes import get_fixes_from_raw
 
+FIRST_LINE_RE = re.compile(rb"[^\n]*\n?")
+
 
 class ParsedUploadedReportFile(object):
+    """
+    A single coverage file contained in an upload.
+
+    The `file_contents` can either be `bytes`, or a `memoryview` into the buffer
+    of the whole raw upload. In the latter case, the contents are only copied
+    out into `bytes` once a processor actually asks for them via `contents`.
+    """
+
     def __init__(
         self,
         filename: str | None,
-        file_contents: bytes,
+        file_contents: bytes | memoryview,
         labels: list[str] | None = None,
     ):
         self.filename = filename
-        self.contents = file_contents
-        self.size = len(self.contents)
+        self._raw_contents = file_contents
+        self._materialized_contents: bytes | None = None
+        self.size = len(file_contents)
         self.labels = labels
 
-    def get_first_line(self):
-        return BytesIO(self.contents).readline()
+    @property
+    def contents(self) -> bytes:
+        if not isinstance(self._raw_contents, memoryview):
+            return self._raw_contents
+        if self._materialized_contents is None:
+            self._materialized_contents = self._raw_contents.tobytes()
+        return self._materialized_contents
+
+    @property
+    def contents_view(self) -> memoryview:
+        """
+        A zero-copy view of the file contents.
+        """
+        return memoryview(self._raw_contents)
+
+    def release_contents(self):
+        """
+        Drops the `bytes` copy materialized by `contents`, if any.
+
+        The contents remain accessible, and will be materialized again on access.
+        """
+        self._materialized_contents = None
+
+    def get_first_line(self) -> bytes:
+        return FIRST_LINE_RE.match(self._raw_contents).group()
 
 
 class ParsedRawReport(object):
@@ -72,7 +107,7 @@ class ParsedRawReport(object):
             buffer.write(b"<<<<<< network\n\n")
         for file in self.uploaded_files:
             buffer.write(f"# path={file.filename}\n".encode("utf-8"))
-            buffer.write(file.contents)
+            buffer.write(file.contents_view)
             buffer.write(b"\n<<<<<< EOF\n\n")
         buffer.seek(0)
         return buffer
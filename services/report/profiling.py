@@ -0,0 +1,162 @@
+"""
+On-demand profiling of the processing of individual uploads.
+
+Profiling is armed for uploads above the configured `min_size`, or for all the
+uploads of the configured `repoids`:
+
+    setup:
+      upload_processing:
+        profiling:
+          min_size: 104857600
+          repoids: [1234]
+
+The cProfile stats (loadable with `pstats` / snakeviz) and the top `tracemalloc`
+allocations are written to the archive next to the raw upload.
+"""
+
+import cProfile
+import io
+import linecache
+import logging
+import marshal
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+
+from shared.config import get_config
+
+from database.models import Repository
+from services.archive import ArchiveService
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TOP_ALLOCATIONS = 50
+TRACEMALLOC_FRAMES = 10
+
+# Whether an upload is currently being profiled in this process.
+_profiling_active = False
+
+
+def _config(key: str, default):
+    return get_config("setup", "upload_processing", "profiling", key, default=default)
+
+
+def should_profile_upload(repoid: int, upload_size: int) -> bool:
+    min_size = _config("min_size", None)
+    if min_size is not None and upload_size >= min_size:
+        return True
+    return repoid in _config("repoids", [])
+
+
+def is_profiling_active() -> bool:
+    """
+    Whether an upload is being profiled, in which case all the work should be
+    done in the current process, as child processes are not profiled.
+    """
+    return _profiling_active
+
+
+def profile_paths(archive_url: str) -> tuple[str, str] | None:
+    """
+    Returns the archive paths of the cProfile stats and the allocations report
+    for the upload stored at `archive_url`.
+    """
+    if not archive_url or archive_url.startswith("http"):
+        # the upload is not stored in our archive, so there is nothing to put
+        # the profile next to
+        return None
+    base = archive_url.removesuffix(".txt")
+    return f"{base}.cprofile", f"{base}.tracemalloc.txt"
+
+
+def format_top_allocations(
+    snapshot: tracemalloc.Snapshot, peak_size: int, limit: int
+) -> str:
+    stats = snapshot.statistics("traceback")
+    total_size = sum(stat.size for stat in stats)
+
+    output = io.StringIO()
+    output.write(f"peak: {peak_size} B, retained: {total_size} B\n")
+    for index, stat in enumerate(stats[:limit], 1):
+        output.write(f"\n#{index}: {stat.size} B in {stat.count} blocks\n")
+        for frame in stat.traceback:
+            line = linecache.getline(frame.filename, frame.lineno).strip()
+            output.write(f"  {frame.filename}:{frame.lineno}: {line}\n")
+    return output.getvalue()
+
+
+@contextmanager
+def profile_upload_processing(
+    repository: Repository, archive_url: str, upload_size: int
+) -> Iterator[bool]:
+    """
+    Profiles the wrapped block if `should_profile_upload`, and writes the results
+    to the archive once the block exits, whether it succeeded or not.
+
+    This yields whether profiling is armed. When it is not, nothing is done.
+    """
+    global _profiling_active
+
+    paths = profile_paths(archive_url)
+    if (
+        _profiling_active
+        or paths is None
+        or not should_profile_upload(repository.repoid, upload_size)
+    ):
+        yield False
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+
+    _profiling_active = True
+    profiler.enable()
+    try:
+        yield True
+    finally:
+        profiler.disable()
+        _profiling_active = False
+        _, peak_size = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+        _save_profile(repository, paths, profiler, snapshot, peak_size, upload_size)
+
+
+def _save_profile(
+    repository: Repository,
+    paths: tuple[str, str],
+    profiler: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot,
+    peak_size: int,
+    upload_size: int,
+):
+    cprofile_path, tracemalloc_path = paths
+    try:
+        archive_service = ArchiveService(repository)
+        # this is the format of `Profile.dump_stats`, without the temporary file
+        profiler.create_stats()
+        archive_service.write_file(cprofile_path, marshal.dumps(profiler.stats))
+
+        top_allocations = format_top_allocations(
+            snapshot, peak_size, _config("top_allocations", DEFAULT_TOP_ALLOCATIONS)
+        )
+        archive_service.write_file(tracemalloc_path, top_allocations)
+    except Exception:
+        # profiling should never fail the processing itself
+        log.warning("Failed to save upload processing profile", exc_info=True)
+        return
+
+    log.info(
+        "Saved upload processing profile",
+        extra=dict(
+            upload_size=upload_size,
+            peak_memory=peak_size,
+            cprofile_path=cprofile_path,
+            tracemalloc_path=tracemalloc_path,
+        ),
+    )
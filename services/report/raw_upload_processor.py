@@ -1,7 +1,16 @@
 import logging
-from dataclasses import dataclass
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator
+from uuid import uuid4
 
+import orjson
 import sentry_sdk
+from shared.config import get_config
 from shared.reports.resources import Report
 from shared.utils.sessions import Session, SessionType
 from shared.yaml import UserYaml
@@ -9,14 +18,20 @@ from shared.yaml import UserYaml
 from database.models.reports import Upload
 from helpers.exceptions import ReportEmptyError, ReportExpiredException
 from helpers.labels import get_all_report_labels, get_labels_per_session
+from helpers.metrics import MiB
 from services.path_fixer import PathFixer
 from services.processing.metrics import LABELS_USAGE
-from services.report.parser.types import ParsedRawReport
+from services.report import parsed_report_cache
+from services.report.parser.types import ParsedRawReport, ParsedUploadedReportFile
+from services.report.profiling import is_profiling_active
 from services.report.report_builder import ReportBuilder
 from services.report.report_processor import process_report
 
 log = logging.getLogger(__name__)
 
+DEFAULT_PARALLEL_PARSING_MIN_SIZE = 20 * MiB
+DEFAULT_PARALLEL_PARSING_MAX_WORKERS = 4
+
 
 @dataclass
 class SessionAdjustmentResult:
@@ -61,45 +76,42 @@ def process_raw_upload(
     report = Report()
     sessionid = session.id = report.next_session_number()
 
-    # ---------------
-    # Process reports
-    # ---------------
-    for report_file in raw_reports.get_uploaded_files():
-        current_filename = report_file.filename
-        if current_filename in skip_files or not report_file.contents:
-            continue
+    report_files = [
+        report_file
+        for report_file in raw_reports.get_uploaded_files()
+        if report_file.filename not in skip_files and report_file.size
+    ]
+    if ReportBuilder(
+        commit_yaml, sessionid, ignored_lines, path_fixer
+    ).supports_labels():
+        # NOTE: this here is very conservative, as it checks for *any* `carryforward_mode=labels`,
+        # not taking the `flags` into account at all.
+        LABELS_USAGE.labels(codepath="report_builder").inc(len(report_files))
 
-        path_fixer_to_use = path_fixer.get_relative_path_aware_pathfixer(
-            current_filename
+    cache_fingerprint = None
+    if parsed_report_cache.is_cache_enabled():
+        cache_fingerprint = parsed_report_cache.context_fingerprint(
+            commit_yaml, sessionid, ignored_lines, path_fixer
         )
-        report_builder_to_use = ReportBuilder(
-            commit_yaml, sessionid, ignored_lines, path_fixer_to_use
+    context = ParsingContext(
+        commit_yaml,
+        sessionid,
+        ignored_lines,
+        path_fixer,
+        report_files,
+        cache_fingerprint,
+    )
+    if should_parse_in_parallel(report_files):
+        reports_from_files = parse_reports_in_parallel(context)
+    else:
+        reports_from_files = (
+            parse_report(context, report_file) for report_file in report_files
         )
-        if report_builder_to_use.supports_labels():
-            # NOTE: this here is very conservative, as it checks for *any* `carryforward_mode=labels`,
-            # not taking the `flags` into account at all.
-            LABELS_USAGE.labels(codepath="report_builder").inc()
-
-        try:
-            report_from_file = process_report(
-                report=report_file, report_builder=report_builder_to_use
-            )
-        except ReportExpiredException as r:
-            r.filename = current_filename
-            raise
-
-        if not report_from_file:
-            continue
-        if report.is_empty():
-            # if the initial report is empty, we can avoid a costly merge operation
-            report = report_from_file
-        else:
-            # merging the smaller report into the larger one is faster,
-            # so swap the two reports in that case.
-            if len(report_from_file._files) > len(report._files):
-                report_from_file, report = report, report_from_file
-
-            report.merge(report_from_file)
+
+    # ---------------
+    # Process reports
+    # ---------------
+    report = merge_reports_pairwise(filter(None, reports_from_files)) or report
 
     if not report:
         raise ReportEmptyError("No files found in report.")
@@ -110,6 +122,296 @@ def process_raw_upload(
     return report
 
 
+def _report_size(report: Report) -> int:
+    totals = report.totals
+    return (totals.files or 0) + (totals.lines or 0)
+
+
+def merge_reports_pairwise(reports: Iterable[Report]) -> Report | None:
+    """
+    Merges all the `reports` into one, returning `None` if there are none.
+
+    Instead of merging every report into one ever-growing accumulator, adjacent
+    reports are merged pairwise in a balanced tree keyed on their number of
+    files and lines, similar to a merge sort. Each merge thus combines two
+    reports of similar size, and every line is only merged a logarithmic number
+    of times. The reports are merged `joined`, which makes the result
+    independent of the merge order.
+    """
+    merger = PairwiseMerger()
+    for report in reports:
+        merger.add(report)
+    return merger.finish()
+
+
+class PairwiseMerger:
+    """
+    Merges reports in a balanced tree as they are being `add`ed,
+    see `merge_reports_pairwise`.
+
+    Only a logarithmic number of reports is retained at any time, so the
+    reports can be produced (and dropped) one by one.
+    """
+
+    def __init__(self):
+        # the reports that are not merged yet, along with their size.
+        # the sizes are kept decreasing by more than a factor of 2 towards the
+        # end of the stack, so the stack stays logarithmic in size as well.
+        self._stack: list[tuple[int, Report]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._stack)
+
+    def add(self, report: Report) -> None:
+        stack = self._stack
+        stack.append((_report_size(report), report))
+        while len(stack) > 1 and stack[-2][0] <= 2 * stack[-1][0]:
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(_merge_pair(left, right))
+
+    def finish(self) -> Report | None:
+        """
+        Merges all the remaining reports, returning `None` if there are none.
+        The merger is empty afterwards.
+        """
+        stack, self._stack = self._stack, []
+        while len(stack) > 1:
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(_merge_pair(left, right))
+
+        return stack[0][1] if stack else None
+
+
+def _merge_pair(
+    left: tuple[int, Report], right: tuple[int, Report]
+) -> tuple[int, Report]:
+    (left_size, left_report), (right_size, right_report) = left, right
+    # merging the smaller report into the larger one is faster,
+    # so swap the two reports in that case.
+    if right_size > left_size:
+        left_report, right_report = right_report, left_report
+    left_report.merge(right_report)
+    return left_size + right_size, left_report
+
+
+@dataclass
+class ParsingContext:
+    """
+    Everything needed to parse the individual files of one upload.
+    """
+
+    commit_yaml: UserYaml | dict | None
+    sessionid: int
+    ignored_lines: dict
+    path_fixer: PathFixer
+    report_files: list[ParsedUploadedReportFile]
+    # the `parsed_report_cache.context_fingerprint`, if the cache is enabled
+    cache_fingerprint: str | None = None
+
+
+def parse_report(
+    context: ParsingContext, report_file: ParsedUploadedReportFile
+) -> Report | None:
+    cache_key = None
+    if context.cache_fingerprint is not None:
+        cache_key = parsed_report_cache.cache_key(
+            context.cache_fingerprint, report_file
+        )
+        if (report := parsed_report_cache.load_cached_report(cache_key)) is not None:
+            report_file.release_contents()
+            return report
+
+    path_fixer_to_use = context.path_fixer.get_relative_path_aware_pathfixer(
+        report_file.filename
+    )
+    report_builder_to_use = ReportBuilder(
+        context.commit_yaml, context.sessionid, context.ignored_lines, path_fixer_to_use
+    )
+
+    try:
+        report = process_report(
+            report=report_file, report_builder=report_builder_to_use
+        )
+    except ReportExpiredException as r:
+        r.filename = report_file.filename
+        raise
+    finally:
+        # the processed file contents are not needed anymore,
+        # so drop the `bytes` copy and only keep the view into the raw upload
+        report_file.release_contents()
+
+    if cache_key is not None and report:
+        parsed_report_cache.save_cached_report(
+            cache_key, report, accepted_until=report_builder_to_use.accepted_until
+        )
+    return report
+
+
+def is_parallel_parsing_enabled() -> bool:
+    return bool(
+        get_config(
+            "setup", "upload_processing", "parallel_parsing", "enabled", default=False
+        )
+    )
+
+
+def should_parse_in_parallel(report_files: list[ParsedUploadedReportFile]) -> bool:
+    """
+    Uploads with multiple files and a large enough combined size are parsed in
+    a process pool if parallel parsing is enabled:
+
+        setup:
+          upload_processing:
+            parallel_parsing:
+              enabled: true
+              min_size: 20971520  # bytes
+              max_workers: 4
+
+    For anything smaller, the overhead of the pool is not worth it.
+    Uploads being profiled are always parsed in-process.
+
+    NOTE: The pool is forked from the celery worker process. Forking a process
+    that runs other threads can deadlock the forked children on locks held by
+    those threads (like the ones of `logging`). The pool is thus forked only
+    once per worker process, right when it starts (see `start_parsing_pool`),
+    and is then kept around for all the uploads parsed by that process.
+    """
+    if is_profiling_active():
+        return False
+    if not is_parallel_parsing_enabled():
+        return False
+    min_size = get_config(
+        "setup",
+        "upload_processing",
+        "parallel_parsing",
+        "min_size",
+        default=DEFAULT_PARALLEL_PARSING_MIN_SIZE,
+    )
+    total_size = sum(report_file.size for report_file in report_files)
+    return len(report_files) > 1 and total_size >= min_size
+
+
+# The parallel parsing pool of the current process, along with the pid of the
+# process it belongs to, as a forked process must not use the pool of its parent.
+_parsing_pool: tuple[int, ProcessPoolExecutor] | None = None
+
+
+def start_parsing_pool() -> ProcessPoolExecutor:
+    """
+    Returns the parallel parsing pool of the current process, forking it first
+    if there is none yet.
+    """
+    global _parsing_pool
+    if _parsing_pool is not None and _parsing_pool[0] == os.getpid():
+        return _parsing_pool[1]
+
+    max_workers = get_config(
+        "setup",
+        "upload_processing",
+        "parallel_parsing",
+        "max_workers",
+        default=min(DEFAULT_PARALLEL_PARSING_MAX_WORKERS, os.cpu_count() or 1),
+    )
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+    )
+    # with "fork", all the workers are forked on the first submitted task
+    pool.submit(int).result()
+    _parsing_pool = (os.getpid(), pool)
+    return pool
+
+
+def shutdown_parsing_pool():
+    global _parsing_pool
+    if _parsing_pool is not None and _parsing_pool[0] == os.getpid():
+        _parsing_pool[1].shutdown(wait=True, cancel_futures=True)
+    _parsing_pool = None
+
+
+# The `ParsingContext` of the upload being parsed by a parallel parsing worker,
+# along with the id of that upload.
+_worker_context: tuple[str, ParsingContext] | None = None
+
+
+def _parse_report_in_worker(
+    context_id: str,
+    serialized_context: bytes,
+    filename: str | None,
+    contents: bytes,
+    labels: list[str] | None,
+) -> tuple[bytes, bytes] | None:
+    global _worker_context
+    if _worker_context is None or _worker_context[0] != context_id:
+        # the workers are shared by all the uploads, so the context is only
+        # deserialized once per upload in every worker
+        _worker_context = (context_id, pickle.loads(serialized_context))
+    report_file = ParsedUploadedReportFile(filename, contents, labels)
+    report = parse_report(_worker_context[1], report_file)
+    if not report:
+        return None
+    report_json, chunks, _totals = report.serialize(with_totals=False)
+    return report_json, chunks
+
+
+def parse_reports_in_parallel(context: ParsingContext) -> Iterator[Report | None]:
+    """
+    Parses all the `report_files` in the parallel parsing pool.
+
+    The workers are passed the `context` along with the files, and pass back
+    the serialized reports, which are yielded in the same order as the `report_files`.
+    """
+    try:
+        pool = start_parsing_pool()
+        context_id = uuid4().hex
+        serialized_context = pickle.dumps(replace(context, report_files=[]))
+        futures: list[Future[tuple[bytes, bytes] | None]] = [
+            pool.submit(
+                _parse_report_in_worker,
+                context_id,
+                serialized_context,
+                report_file.filename,
+                report_file.contents,
+                report_file.labels,
+            )
+            for report_file in context.report_files
+        ]
+    except BrokenProcessPool:
+        # a worker of the pool died, so a new one is forked for the next upload
+        shutdown_parsing_pool()
+        raise
+
+    try:
+        for report_file, future in zip(context.report_files, futures):
+            try:
+                serialized_report = future.result()
+            except ReportExpiredException as r:
+                r.filename = report_file.filename
+                raise
+            except BrokenProcessPool:
+                shutdown_parsing_pool()
+                raise
+            finally:
+                report_file.release_contents()
+
+            if serialized_report is None:
+                yield None
+                continue
+
+            report_json, chunks = serialized_report
+            report_json = orjson.loads(report_json)
+            yield Report.from_chunks(
+                chunks=chunks.decode(errors="replace"),
+                files=report_json["files"],
+                sessions=report_json["sessions"],
+            )
+    finally:
+        # the pool is kept around for the next upload
+        for future in futures:
+            future.cancel()
+
+
 @sentry_sdk.trace
 def clear_carryforward_sessions(
     original_report: Report,
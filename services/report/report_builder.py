@@ -1,15 +1,19 @@
 import dataclasses
 import logging
+import time
+from array import array
 from enum import Enum
-from typing import Any, List, Sequence
+from typing import Any, Iterable, List, Sequence
 
 from shared.reports.reportfile import ReportFile
 from shared.reports.resources import Report
 from shared.reports.types import CoverageDatapoint, LineSession, ReportLine
 from shared.yaml.user_yaml import UserYaml
+from timestring import Date
 
 from helpers.labels import SpecialLabelsEnum
 from services.path_fixer import PathFixer
+from services.report.fixes import ignored_lines_mask
 from services.yaml.reader import read_yaml_field
 
 log = logging.getLogger(__name__)
@@ -28,6 +32,77 @@ class CoverageType(Enum):
         return self.report_value
 
 
+# the types that a `CompactReportFile` stores as an index into this tuple
+COMPACT_COVERAGE_TYPES: tuple[CoverageType | None, ...] = (None, *CoverageType)
+COMPACT_COVERAGE_TYPE_CODES = {
+    coverage_type: code for code, coverage_type in enumerate(COMPACT_COVERAGE_TYPES)
+}
+# the `hits` of coverage that does not fit into the array, like partials
+COMPACT_SPECIAL_HITS = -(2**63)
+
+
+class CompactReportFile(object):
+    """
+    A file of plain line coverage, stored compactly in typed arrays.
+
+    This is meant for formats that only report line (or method / branch) hits,
+    without any partials, missing branches, complexity or labels.
+    Instead of one `ReportLine` with its `LineSession`s per line, this only stores
+    the line number, hits and coverage type for each `append`ed line, as the
+    session of all lines is the one of the `ReportBuilder` anyway.
+    The real `ReportFile` is only materialized within `output_report`.
+    """
+
+    def __init__(self, name: str, ignore: dict | None = None):
+        self.name = name
+        self._ignore = ignore
+        self._line_numbers = array("q")
+        self._hits = array("q")
+        self._types = array("b")
+        # coverage that is not an integer (like `"1/2"`), keyed by its index
+        self._special_coverage: dict[int, int | str] = {}
+
+    def __len__(self) -> int:
+        return len(self._line_numbers)
+
+    def append(
+        self,
+        ln: int,
+        coverage: int | str,
+        coverage_type: CoverageType | None = None,
+    ) -> None:
+        """
+        Records the coverage of line `ln`, with the same semantics as
+        `ReportFile.append(ln, create_coverage_line(coverage, coverage_type))`.
+        """
+        if type(coverage) is not int or not COMPACT_SPECIAL_HITS < coverage < 2**63:
+            self._special_coverage[len(self._hits)] = coverage
+            coverage = COMPACT_SPECIAL_HITS
+        self._line_numbers.append(ln)
+        self._hits.append(coverage)
+        self._types.append(COMPACT_COVERAGE_TYPE_CODES[coverage_type])
+
+    def materialize(self, report_builder_session: "ReportBuilderSession") -> ReportFile:
+        """
+        Creates the `ReportFile` with all the `append`ed lines.
+        Ignored lines are dropped upfront, without creating their `ReportLine`s.
+        """
+        _file = ReportFile(self.name, ignore=self._ignore)
+        create_coverage_line = report_builder_session.create_coverage_line
+        special_coverage = self._special_coverage
+        ignored = ignored_lines_mask(self._ignore, self._line_numbers)
+        for i, (ln, hits, type_code) in enumerate(
+            zip(self._line_numbers, self._hits, self._types)
+        ):
+            if ignored[i]:
+                continue
+            coverage = special_coverage[i] if hits == COMPACT_SPECIAL_HITS else hits
+            _file.append(
+                ln, create_coverage_line(coverage, COMPACT_COVERAGE_TYPES[type_code])
+            )
+        return _file
+
+
 class ReportBuilderSession(object):
     def __init__(
         self,
@@ -37,31 +112,94 @@ class ReportBuilderSession(object):
         self.filepath = report_filepath
         self._report_builder = report_builder
         self._report = Report()
+        # the labels of all the datapoints created by `create_coverage_line`
         self._present_labels = set()
+        # the line numbers with a `CODECOV_ALL_LABELS_PLACEHOLDER` datapoint, per file
+        self._placeholder_lines: dict[str, set[int]] = {}
+        # files which are not yet appended to the `_report`, see `append`
+        self._pending_files: list[ReportFile | CompactReportFile] = []
 
     @property
     def path_fixer(self):
         return self._report_builder.path_fixer
 
-    def resolve_paths(self, paths):
+    def fix_paths(
+        self, paths: Iterable[str], bases_to_try: Sequence[str] | None = None
+    ) -> dict[str, str | None]:
+        """
+        Fixes all the `paths` of a report in one batch, see `PathFixer.resolve_paths`.
+        Plain callables used as a path fixer are called for each path instead.
+        """
+        path_fixer = self.path_fixer
+        if isinstance(path_fixer, PathFixer):
+            return path_fixer.resolve_paths(paths, bases_to_try)
+        if bases_to_try is None:
+            return {path: path_fixer(path) for path in dict.fromkeys(paths)}
+        return {
+            path: path_fixer(path, bases_to_try=bases_to_try)
+            for path in dict.fromkeys(paths)
+        }
+
+    def resolve_paths(
+        self, filenames: Sequence[str], bases_to_try: Sequence[str] | None = None
+    ):
+        """
+        Renames the files of the report from the given (unfixed) `filenames` to
+        their fixed paths, dropping the files that should not be included.
+        All the `filenames` are fixed in one batch by the `path_fixer`.
+        """
+        self._append_pending_files()
+        fixed_paths = self.fix_paths(filenames, bases_to_try)
+        paths = [(filename, fixed_paths[filename]) for filename in filenames]
+        if self._placeholder_lines:
+            renames = dict(paths)
+            placeholder_lines, self._placeholder_lines = self._placeholder_lines, {}
+            for filename, line_numbers in placeholder_lines.items():
+                if new_filename := renames.get(filename, filename):
+                    self._placeholder_lines.setdefault(new_filename, set()).update(
+                        line_numbers
+                    )
         return self._report.resolve_paths(paths)
 
     def yaml_field(self, keys: Sequence[str], default: Any = None) -> Any:
         return read_yaml_field(self._report_builder.current_yaml, keys, default)
 
+    def record_report_timestamp(self, timestamp: Date, max_age: str) -> None:
+        """
+        Records that the (not yet expired) report being processed was created at
+        `timestamp`, and will be considered expired once it is older than `max_age`.
+        """
+        try:
+            remaining = (timestamp.date - Date(max_age).date).total_seconds()
+        except TypeError:  # mixing timezone-aware and naive datetimes
+            remaining = 0
+        self._report_builder.accepted_until = time.time() + remaining
+
     def get_file(self, filename: str) -> ReportFile | None:
+        self._append_pending_files()
         return self._report.get(filename)
 
-    def append(self, file: ReportFile):
-        if file is not None:
-            for line_number, line in file.lines:
-                if line.datapoints:
-                    for datapoint in line.datapoints:
-                        if datapoint.label_ids:
-                            for label in datapoint.label_ids:
-                                self._present_labels.add(label)
+    def append(self, file: ReportFile | CompactReportFile | None):
+        if file is None:
+            return
+        if isinstance(file, CompactReportFile) or self._pending_files:
+            # `CompactReportFile`s are only materialized when they are needed,
+            # and all the files following them have to wait for that as well,
+            # to end up in the same order within the `_report`.
+            self._pending_files.append(file)
+            return
         return self._report.append(file)
 
+    def _append_pending_files(self) -> None:
+        pending_files, self._pending_files = self._pending_files, []
+        # materialize one file at a time, dropping the compact one right after
+        pending_files.reverse()
+        while pending_files:
+            file = pending_files.pop()
+            if isinstance(file, CompactReportFile):
+                file = file.materialize(self)
+            self._report.append(file)
+
     def output_report(self) -> Report:
         """
             Outputs a Report.
@@ -71,6 +209,7 @@ class ReportBuilderSession(object):
         Returns:
             Report: The legacy report desired
         """
+        self._append_pending_files()
         if self._present_labels:
             if self._present_labels == {
                 SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER
@@ -78,11 +217,16 @@ class ReportBuilderSession(object):
                 log.warning(
                     "Report only has SpecialLabels. Might indicate it was not generated with contexts"
                 )
-            for file in self._report:
-                for line_number, line in file.lines:
-                    self._possibly_modify_line_to_account_for_special_labels(
-                        file, line_number, line
-                    )
+            for filename, line_numbers in self._placeholder_lines.items():
+                file = self._report.get(filename)
+                if file is None:
+                    continue
+                for line_number in sorted(line_numbers):
+                    line = file.get(line_number)
+                    if line:
+                        self._possibly_modify_line_to_account_for_special_labels(
+                            file, line_number, line
+                        )
             self._report._totals = None
         return self._report
 
@@ -130,10 +274,7 @@ class ReportBuilderSession(object):
         Args:
             datapoint (CoverageDatapoint): The datapoint to convert
         """
-        if datapoint.label_ids and any(
-            label == SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER
-            for label in datapoint.label_ids
-        ):
+        if _has_placeholder_label(datapoint):
             new_label = (
                 SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER.corresponding_label
             )
@@ -166,6 +307,20 @@ class ReportBuilderSession(object):
             fixed_path, ignore=self._report_builder.ignored_lines.get(fixed_path)
         )
 
+    def create_compact_file(
+        self, path: str, do_fix_path: bool = True
+    ) -> CompactReportFile | None:
+        """
+        Like `create_coverage_file`, but for files with only plain line coverage.
+        """
+        fixed_path = self._report_builder.path_fixer(path) if do_fix_path else path
+        if not fixed_path:
+            return None
+
+        return CompactReportFile(
+            fixed_path, ignore=self._report_builder.ignored_lines.get(fixed_path)
+        )
+
     def create_coverage_line(
         self,
         coverage: int | str,
@@ -176,7 +331,17 @@ class ReportBuilderSession(object):
         partials=None,
         missing_branches=None,
         complexity=None,
+        filename: str | None = None,
+        line_number: int | None = None,
     ) -> ReportLine:
+        """
+        Creates the `ReportLine` for the current session.
+
+        Lines with labels have to be created with the `filename` and `line_number`
+        they are appended at, so that `output_report` can find the lines with a
+        `CODECOV_ALL_LABELS_PLACEHOLDER` datapoint without visiting every line.
+        Raises a `ValueError` if a placeholder line is created without those.
+        """
         sessionid = self._report_builder.sessionid
         coverage_type_str = coverage_type.map_to_string() if coverage_type else None
         datapoints = (
@@ -194,6 +359,8 @@ class ReportBuilderSession(object):
             if self._report_builder._supports_labels
             else None
         )
+        if datapoints:
+            self._track_labels(datapoints, filename, line_number)
         return ReportLine.create(
             coverage=coverage,
             type=coverage_type_str,
@@ -212,6 +379,29 @@ class ReportBuilderSession(object):
             complexity=complexity,
         )
 
+    def _track_labels(
+        self,
+        datapoints: list[CoverageDatapoint],
+        filename: str | None,
+        line_number: int | None,
+    ) -> None:
+        for datapoint in datapoints:
+            self._present_labels.update(datapoint.label_ids)
+        if any(_has_placeholder_label(datapoint) for datapoint in datapoints):
+            if filename is None or line_number is None:
+                # the placeholder would silently never be replaced otherwise
+                raise ValueError(
+                    "Lines with placeholder labels need a filename and line_number"
+                )
+            self._placeholder_lines.setdefault(filename, set()).add(line_number)
+
+
+def _has_placeholder_label(datapoint: CoverageDatapoint) -> bool:
+    return bool(datapoint.label_ids) and any(
+        label == SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER
+        for label in datapoint.label_ids
+    )
+
 
 class ReportBuilder(object):
     def __init__(
@@ -226,6 +416,9 @@ class ReportBuilder(object):
         self.ignored_lines = ignored_lines
         self.path_fixer = path_fixer
         self._supports_labels = self.supports_labels()
+        # the unix time after which the processed report would be rejected
+        # as expired, for formats that carry a timestamp
+        self.accepted_until: float | None = None
 
     def create_report_builder_session(self, filepath) -> ReportBuilderSession:
         return ReportBuilderSession(self, filepath)
@@ -1,18 +1,26 @@
 import logging
-from typing import Literal
+from io import BytesIO
+from itertools import chain
+from typing import Callable, Iterator, Literal
 
 import orjson
 import sentry_sdk
 from lxml import etree
+from shared.config import get_config
 from shared.metrics import Counter, Histogram
 from shared.reports.resources import Report
 
 from helpers.exceptions import CorruptRawReportError
 from helpers.metrics import KiB, MiB
 from services.report.languages.base import BaseLanguageProcessor
-from services.report.languages.helpers import remove_non_ascii
+from services.report.languages.helpers import (
+    LazyJSONObject,
+    iter_streamed_elements,
+    read_json_prefix,
+    remove_non_ascii,
+)
 from services.report.parser.types import ParsedUploadedReportFile
-from services.report.report_builder import ReportBuilder
+from services.report.report_builder import ReportBuilder, ReportBuilderSession
 
 from .languages.bullseye import BullseyeProcessor
 from .languages.clover import CloverProcessor
@@ -79,6 +87,165 @@ RAW_REPORT_PROCESSOR_COUNTER = Counter(
     ["processor", "result"],
 )
 
+PARSED_REPORT_CACHE_COUNTER = Counter(
+    "worker_services_report_parsed_report_cache",
+    "Number of parsed report cache lookups and stores, and with what result",
+    ["result"],
+)
+
+
+ReportType = Literal["txt", "plist", "json", "xml"]
+
+# The processors that can handle each of the `ReportType`s, in order of priority.
+PROCESSORS: dict[str, list[type[BaseLanguageProcessor]]] = {
+    "plist": [XCodePlistProcessor],
+    "xml": [
+        BullseyeProcessor,
+        SCoverageProcessor,
+        JetBrainsXMLProcessor,
+        CloverProcessor,
+        MonoProcessor,
+        CSharpProcessor,
+        JacocoProcessor,
+        VbProcessor,
+        VbTwoProcessor,
+        CoberturaProcessor,
+    ],
+    "txt": [
+        LcovProcessor,
+        GcovProcessor,
+        LuaProcessor,
+        GapProcessor,
+        DLSTProcessor,
+        GoProcessor,
+        XCodeProcessor,
+    ],
+    "json": [
+        SalesforceProcessor,
+        ElmProcessor,
+        RlangProcessor,
+        FlowcoverProcessor,
+        VOneProcessor,
+        ScalaProcessor,
+        CoverallsProcessor,
+        SimplecovProcessor,
+        GapProcessor,
+        PyCoverageProcessor,
+        NodeProcessor,
+    ],
+}
+
+SNIFF_SIZE = 1 * KiB
+DEFAULT_XML_STREAMING_THRESHOLD = 50 * MiB
+DEFAULT_JSON_STREAMING_THRESHOLD = 50 * MiB
+JSON_PREFIX_SIZE = 64 * KiB
+UTF8_BOM = b"\xef\xbb\xbf"
+UNSNIFFABLE_BOMS = (b"\xff\xfe", b"\xfe\xff")  # UTF-16/32 BOMs
+
+
+def leading_bytes(raw_report: bytes) -> bytes:
+    """
+    Returns the first few bytes of `raw_report`, with leading whitespace stripped.
+    """
+    return raw_report[:SNIFF_SIZE].lstrip()
+
+
+def sniff_report_type(head: bytes) -> ReportType | None:
+    """
+    Classifies a report by its leading bytes (as returned by `leading_bytes`),
+    without parsing it.
+
+    JSON objects / arrays always start with `{` / `[`, and XML documents always
+    start with `<`, possibly preceded by a byte-order-mark. Everything else can
+    only ever be a text report, so the report only has to be parsed as the
+    sniffed format. Returns `None` if the report can not be classified this way.
+    """
+    if not head or head.startswith(UNSNIFFABLE_BOMS):
+        return None
+    if head.startswith(UTF8_BOM):
+        # JSON does not allow a BOM, but XML does
+        return "xml" if head[3:].lstrip()[:1] == b"<" else "txt"
+
+    first_byte = head[:1]
+    if first_byte == b"<":
+        return "xml"
+    if first_byte in (b"{", b"["):
+        return "json"
+    return "txt"
+
+
+def get_processors(report_type: str, head: bytes) -> list[BaseLanguageProcessor]:
+    """
+    Returns the processors for the given `report_type`.
+
+    Processors declaring one of their `signatures` as the prefix of `head` are
+    attempted first, the remaining processors serve as a fallback.
+    """
+    processor_classes = PROCESSORS.get(report_type, [])
+    processor_classes = sorted(
+        processor_classes,
+        key=lambda processor: not head.startswith(processor.signatures),
+    )
+    return [processor() for processor in processor_classes]
+
+
+def _parse_json(raw_report: bytes) -> dict | list | None:
+    try:
+        processed = orjson.loads(raw_report)
+        if isinstance(processed, dict) or isinstance(processed, list):
+            return processed
+    except ValueError:
+        pass
+    return None
+
+
+def _parse_xml(raw_report: bytes) -> etree.Element | None:
+    try:
+        parser = etree.XMLParser(recover=True, resolve_entities=False)
+        processed = etree.fromstring(raw_report, parser=parser)
+        if processed is not None and len(processed) > 0:
+            return processed
+    except (ValueError, etree.XMLSyntaxError):
+        pass
+    return None
+
+
+XCODE_FIRST_LINE_ENDINGS = (
+    ".h:",
+    ".m:",
+    ".swift:",
+    ".hpp:",
+    ".cpp:",
+    ".cxx:",
+    ".c:",
+    ".C:",
+    ".cc:",
+    ".cxx:",
+    ".c++:",
+)
+XCODE_FILENAME_ENDINGS = (
+    "app.coverage.txt",
+    "framework.coverage.txt",
+    "xctest.coverage.txt",
+)
+
+
+def _report_type_from_name(
+    name: str, first_line: str, raw_report: bytes
+) -> Literal["txt", "plist"] | None:
+    """
+    Detects the report types that are decided without looking at the contents.
+    """
+    if first_line.endswith(XCODE_FIRST_LINE_ENDINGS) or name.endswith(
+        XCODE_FILENAME_ENDINGS
+    ):
+        return "txt"
+    if name.endswith(".plist"):
+        return "plist"
+    if not raw_report:
+        return "txt"
+    return None
+
 
 @sentry_sdk.trace
 def report_type_matching(
@@ -90,51 +257,156 @@ def report_type_matching(
 ):
     name = report.filename or ""
     raw_report = report.contents
-    xcode_first_line_endings = (
-        ".h:",
-        ".m:",
-        ".swift:",
-        ".hpp:",
-        ".cpp:",
-        ".cxx:",
-        ".c:",
-        ".C:",
-        ".cc:",
-        ".cxx:",
-        ".c++:",
-    )
-    xcode_filename_endings = (
-        "app.coverage.txt",
-        "framework.coverage.txt",
-        "xctest.coverage.txt",
-    )
-    if first_line.endswith(xcode_first_line_endings) or name.endswith(
-        xcode_filename_endings
-    ):
-        return raw_report, "txt"
-    if raw_report.find(b'<plist version="1.0">') >= 0 or name.endswith(".plist"):
+    if report_type := _report_type_from_name(name, first_line, raw_report):
+        return raw_report, report_type
+
+    sniffed_type = sniff_report_type(leading_bytes(raw_report))
+    if sniffed_type in (None, "xml") and raw_report.find(b'<plist version="1.0">') >= 0:
         return raw_report, "plist"
-    if not raw_report:
-        return raw_report, "txt"
 
-    try:
-        processed = orjson.loads(raw_report)
-        if isinstance(processed, dict) or isinstance(processed, list):
+    if sniffed_type in (None, "json"):
+        if (processed := _parse_json(raw_report)) is not None:
             return processed, "json"
-    except ValueError:
-        pass
 
-    try:
-        parser = etree.XMLParser(recover=True, resolve_entities=False)
-        processed = etree.fromstring(raw_report, parser=parser)
-        if processed is not None and len(processed) > 0:
+    if sniffed_type in (None, "xml"):
+        if (processed := _parse_xml(raw_report)) is not None:
             return processed, "xml"
-    except (ValueError, etree.XMLSyntaxError):
-        pass
 
     return raw_report, "txt"
 
 
+def open_xml_stream(
+    report: ParsedUploadedReportFile, first_line: str
+) -> tuple[BaseLanguageProcessor, etree.Element, Iterator[etree.Element]] | None:
+    """
+    Starts parsing `report` incrementally, if it is an XML report with a
+    processor declaring `streaming_tags`.
+
+    Returns the matching processor, the (still empty) root element, and an
+    iterator over the elements to process. Returns `None` if the report has to
+    go through `report_type_matching` and the tree-based `process` instead.
+    """
+    name = report.filename or ""
+    raw_report = report.contents
+    if _report_type_from_name(name, first_line, raw_report) is not None:
+        return None
+    if sniff_report_type(leading_bytes(raw_report)) != "xml":
+        return None
+    if raw_report.find(b'<plist version="1.0">') >= 0:
+        return None
+    if raw_report.find(b"<assembly") >= 0:
+        # `MonoProcessor` matches on the children of the root element,
+        # which are not available up-front when streaming.
+        return None
+
+    events = etree.iterparse(
+        BytesIO(raw_report),
+        events=("start", "end"),
+        recover=True,
+        resolve_entities=False,
+    )
+    try:
+        _, root = next(events)
+        # `report_type_matching` does not consider a document without any
+        # children of the root element to be XML
+        first_child_event = next(events)
+    except (StopIteration, etree.XMLSyntaxError):
+        return None
+    if first_child_event[0] != "start":
+        return None
+
+    for processor in get_processors("xml", leading_bytes(raw_report)):
+        if processor.matches_content(root, first_line, name):
+            if not processor.streaming_tags:
+                return None
+            elements = iter_streamed_elements(
+                chain([first_child_event], events), processor.streaming_tags
+            )
+            return processor, root, elements
+    return None
+
+
+def open_json_stream(
+    report: ParsedUploadedReportFile, first_line: str
+) -> tuple[BaseLanguageProcessor, LazyJSONObject] | None:
+    """
+    Prepares decoding `report` incrementally, if it is a JSON report with a
+    processor setting `json_streaming`.
+
+    The processor is chosen by calling `matches_content` on a truncated prefix
+    of the document (see `read_json_prefix`). Returns `None` if the report has
+    to go through `report_type_matching` and the regular `process` instead.
+    As the rest of the document was not looked at, the report also has to go
+    through those if the chosen processor fails on it.
+    """
+    name = report.filename or ""
+    raw_report = report.contents
+    if _report_type_from_name(name, first_line, raw_report) is not None:
+        return None
+    head = leading_bytes(raw_report)
+    if not head.startswith(b"{"):
+        return None
+
+    try:
+        if len(raw_report) <= JSON_PREFIX_SIZE:
+            prefix = read_json_prefix(raw_report.decode(), JSON_PREFIX_SIZE)
+        else:
+            # only the prefix is decoded, which might end within a character
+            text = raw_report[:JSON_PREFIX_SIZE].decode(errors="ignore")
+            prefix = read_json_prefix(text, len(text) - 1)
+    except ValueError:  # this includes `UnicodeDecodeError` and `JSONDecodeError`
+        return None
+    if not prefix:
+        return None
+
+    for processor in get_processors("json", head):
+        if processor.matches_content(prefix, first_line, name):
+            if not processor.json_streaming:
+                return None
+            return processor, LazyJSONObject(report.contents_view)
+    return None
+
+
+def _run_processor(
+    processor: BaseLanguageProcessor,
+    report: ParsedUploadedReportFile,
+    report_builder: ReportBuilder,
+    process: Callable[[ReportBuilderSession], None],
+) -> Report | None:
+    processor_name = type(processor).__name__
+
+    RAW_REPORT_SIZE.labels(processor=processor_name).observe(report.size)
+    with RAW_REPORT_PROCESSOR_RUNTIME_SECONDS.labels(processor=processor_name).time():
+        try:
+            report_builder_session = report_builder.create_report_builder_session(
+                report.filename or ""
+            )
+            process(report_builder_session)
+            RAW_REPORT_PROCESSOR_COUNTER.labels(
+                processor=processor_name, result="success"
+            ).inc()
+            return report_builder_session.output_report()
+        except CorruptRawReportError as e:
+            log.warning(
+                "Processor matched file but later a problem with file was discovered",
+                extra=dict(
+                    processor_name=processor_name,
+                    expected_format=e.expected_format,
+                    corruption_error=e.corruption_error,
+                ),
+                exc_info=True,
+            )
+            RAW_REPORT_PROCESSOR_COUNTER.labels(
+                processor=processor_name, result="corrupt_raw_report"
+            ).inc()
+            return None
+        except Exception:
+            RAW_REPORT_PROCESSOR_COUNTER.labels(
+                processor=processor_name, result="failure"
+            ).inc()
+            raise
+
+
 def process_report(
     report: ParsedUploadedReportFile, report_builder: ReportBuilder
 ) -> Report | None:
@@ -149,89 +421,69 @@ def process_report(
         )
         return None
 
+    # Huge XML and JSON reports are processed while being parsed, instead of
+    # building the whole tree / document in memory first.
+    xml_streaming_threshold = get_config(
+        "setup",
+        "upload_processing",
+        "xml_streaming_threshold",
+        default=DEFAULT_XML_STREAMING_THRESHOLD,
+    )
+    if report.size >= xml_streaming_threshold:
+        if xml_stream := open_xml_stream(report, first_line):
+            processor, root, elements = xml_stream
+            return _run_processor(
+                processor,
+                report,
+                report_builder,
+                lambda session: processor.process_streaming(root, elements, session),
+            )
+
+    json_streaming_threshold = get_config(
+        "setup",
+        "upload_processing",
+        "json_streaming_threshold",
+        default=DEFAULT_JSON_STREAMING_THRESHOLD,
+    )
+    if report.size >= json_streaming_threshold:
+        if json_stream := open_json_stream(report, first_line):
+            processor, document = json_stream
+            streamed_report = _run_processor(
+                processor,
+                report,
+                report_builder,
+                lambda session: processor.process_json_stream(document, session),
+            )
+            if streamed_report is not None:
+                return streamed_report
+            # the processor was chosen by the prefix of the document only
+            log.info(
+                "Streaming processor failed, falling back to the full document",
+                extra=dict(
+                    report_filename=report_filename,
+                    processor_name=type(processor).__name__,
+                ),
+            )
+
     parsed_report, report_type = report_type_matching(report, first_line)
 
+    if report_type == "txt" and parsed_report[-11:] == b"has no code":
+        # empty [dlst]
+        return None
+
     processors: list[BaseLanguageProcessor] = []
-    if report_type == "plist":
-        processors = [XCodePlistProcessor()]
-    elif report_type == "xml":
-        processors = [
-            BullseyeProcessor(),
-            SCoverageProcessor(),
-            JetBrainsXMLProcessor(),
-            CloverProcessor(),
-            MonoProcessor(),
-            CSharpProcessor(),
-            JacocoProcessor(),
-            VbProcessor(),
-            VbTwoProcessor(),
-            CoberturaProcessor(),
-        ]
-    elif report_type == "txt":
-        if parsed_report[-11:] == b"has no code":
-            # empty [dlst]
-            return None
-        processors = [
-            LcovProcessor(),
-            GcovProcessor(),
-            LuaProcessor(),
-            GapProcessor(),
-            DLSTProcessor(),
-            GoProcessor(),
-            XCodeProcessor(),
-        ]
-    elif report_type == "json" and parsed_report:
-        processors = [
-            SalesforceProcessor(),
-            ElmProcessor(),
-            RlangProcessor(),
-            FlowcoverProcessor(),
-            VOneProcessor(),
-            ScalaProcessor(),
-            CoverallsProcessor(),
-            SimplecovProcessor(),
-            GapProcessor(),
-            PyCoverageProcessor(),
-            NodeProcessor(),
-        ]
+    if report_type != "json" or parsed_report:
+        processors = get_processors(report_type, leading_bytes(raw_report))
 
     for processor in processors:
         if not processor.matches_content(parsed_report, first_line, report_filename):
             continue
-        processor_name = type(processor).__name__
-
-        RAW_REPORT_SIZE.labels(processor=processor_name).observe(report.size)
-        with RAW_REPORT_PROCESSOR_RUNTIME_SECONDS.labels(
-            processor=processor_name
-        ).time():
-            try:
-                report_builder_session = report_builder.create_report_builder_session(
-                    report_filename
-                )
-                processor.process(parsed_report, report_builder_session)
-                RAW_REPORT_PROCESSOR_COUNTER.labels(
-                    processor=processor_name, result="success"
-                ).inc()
-                return report_builder_session.output_report()
-            except CorruptRawReportError as e:
-                log.warning(
-                    "Processor matched file but later a problem with file was discovered",
-                    extra=dict(
-                        processor_name=processor_name,
-                        expected_format=e.expected_format,
-                        corruption_error=e.corruption_error,
-                    ),
-                    exc_info=True,
-                )
-                RAW_REPORT_PROCESSOR_COUNTER.labels(
-                    processor=processor_name, result="corrupt_raw_report"
-                ).inc()
-                return None
-            except Exception:
-                RAW_REPORT_PROCESSOR_COUNTER.labels(
-                    processor=processor_name, result="failure"
-                ).inc()
-                raise
+        return _run_processor(
+            processor,
+            report,
+            report_builder,
+            lambda session: processor.process(parsed_report, session),
+        )
     log.warning(
         "File format could not be recognized",
         extra=dict(
@@ -0,0 +1,341 @@
+"""
+An optional sharded storage layout for the `chunks` of a commit report.
+
+Instead of a single `chunks.txt` file, the chunks of the files of a report are
+split into shards of (up to) `shard_size` files each. Every shard is stored as a
+standalone chunks file, and the shards are indexed from the `report_json`:
+
+    setup:
+      upload_processing:
+        sharded_chunks:
+          enabled: true
+          shard_size: 500
+
+The `files` of the `report_json` are indexed into the concatenation of all the
+shards in order, so the whole report can still be loaded at once.
+When merging uploads, the shards are instead only loaded once one of their files
+is touched, and only the loaded shards that changed are written back, so the cost
+of merging and saving scales with the touched files instead of the whole report.
+
+NOTE: The sharded layout is only understood by the worker. Other readers of the
+`chunks.txt` files of a commit have to be able to read shards before enabling it.
+"""
+
+import dataclasses
+import hashlib
+import posixpath
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from shared.config import get_config
+from shared.helpers.numeric import ratio
+from shared.reports.resources import Report
+from shared.reports.types import ReportTotals
+from shared.utils.sessions import Session
+
+from services.archive import ArchiveService
+
+END_OF_HEADER = "\n<<<<< end_of_header >>>>>\n"
+END_OF_CHUNK = "\n<<<<< end_of_chunk >>>>>\n"
+
+# The key of the shards index within the `report_json`.
+INDEX_KEY = "chunks_shards"
+
+DEFAULT_SHARD_SIZE = 500
+MAX_READ_THREADS = 8
+
+
+def _config(key: str, default):
+    return get_config(
+        "setup", "upload_processing", "sharded_chunks", key, default=default
+    )
+
+
+def is_sharded_chunks_enabled() -> bool:
+    return bool(_config("enabled", False))
+
+
+def split_chunks(chunks: str) -> tuple[str, list[str]]:
+    """
+    Splits a serialized chunks file into its header and the chunks of its files.
+    """
+    header, separator, body = chunks.partition(END_OF_HEADER)
+    if not separator:
+        # chunks files without a header
+        header, body = "{}", chunks
+    return header, body.split(END_OF_CHUNK) if body else []
+
+
+def join_chunks(header: str, chunks: list[str]) -> str:
+    return header + END_OF_HEADER + END_OF_CHUNK.join(chunks)
+
+
+def sum_file_totals(file_totals: Iterable[list | None], sessions: int) -> ReportTotals:
+    """
+    Sums up the (serialized) totals of the files of a report into the report totals.
+    """
+    totals = ReportTotals(
+        files=0,
+        lines=0,
+        hits=0,
+        misses=0,
+        partials=0,
+        coverage=None,
+        branches=0,
+        methods=0,
+        messages=0,
+        sessions=sessions,
+        complexity=0,
+        complexity_total=0,
+        diff=None,
+    )
+    for serialized in file_totals:
+        totals.files += 1
+        if not serialized:
+            continue
+        file = ReportTotals(*serialized)
+        totals.lines += file.lines or 0
+        totals.hits += file.hits or 0
+        totals.misses += file.misses or 0
+        totals.partials += file.partials or 0
+        totals.branches += file.branches or 0
+        totals.methods += file.methods or 0
+        totals.messages += file.messages or 0
+        totals.complexity += file.complexity or 0
+        totals.complexity_total += file.complexity_total or 0
+    if totals.lines:
+        totals.coverage = ratio(totals.hits, totals.lines)
+    return totals
+
+
+@dataclasses.dataclass
+class ChunksShard:
+    id: int
+    files: list[str]
+    digest: str | None = None
+    """
+    The digest of the stored shard contents, used to skip writing unchanged shards.
+    """
+
+
+class ShardedChunks:
+    """
+    The sharded chunks of a commit report, which are loaded lazily.
+    """
+
+    def __init__(
+        self,
+        archive_service: ArchiveService,
+        commitid: str,
+        report_code: str | None,
+        header: str = "{}",
+        shards: list[ChunksShard] | None = None,
+        files: dict[str, list] | None = None,
+        sessions: dict | None = None,
+    ):
+        self.archive_service = archive_service
+        self.commitid = commitid
+        self.report_code = report_code
+        self.header = header
+        self.shards = shards or []
+        self.files = files or {}
+        self.sessions = sessions or {}
+        self._file_shards = {
+            filename: shard_index
+            for shard_index, shard in enumerate(self.shards)
+            for filename in shard.files
+        }
+        self._loaded_shards: set[int] = set()
+
+    @classmethod
+    def from_report_json(
+        cls,
+        archive_service: ArchiveService,
+        commitid: str,
+        report_code: str | None,
+        report_json: dict | None,
+    ) -> "ShardedChunks | None":
+        """
+        Returns the `ShardedChunks` indexed from `report_json`, or `None` if the
+        report is not stored in the sharded layout.
+        """
+        index = (report_json or {}).get(INDEX_KEY)
+        if index is None:
+            return None
+        return cls(
+            archive_service,
+            commitid,
+            report_code,
+            header=index["header"],
+            shards=[ChunksShard(**shard) for shard in index["shards"]],
+            files=report_json["files"],
+            sessions=report_json["sessions"],
+        )
+
+    def _report_sessions(self) -> dict:
+        return {
+            session_id: session
+            if isinstance(session, Session)
+            else {**session, "id": int(session_id)}
+            for session_id, session in self.sessions.items()
+        }
+
+    def empty_report(self) -> Report:
+        """
+        Returns the report with all of its sessions, but none of its files.
+        Those are added to the report by `load_files`.
+        """
+        return Report.from_chunks(
+            chunks=join_chunks(self.header, []),
+            files={},
+            sessions=self._report_sessions(),
+        )
+
+    def load_files(self, report: Report, filenames: Iterable[str] | None = None):
+        """
+        Adds the files of all the shards containing any of the `filenames`,
+        or of all the shards if `filenames` is `None`, to `report`.
+        """
+        if filenames is None:
+            touched_shards = set(range(len(self.shards)))
+        else:
+            touched_shards = {
+                self._file_shards[filename]
+                for filename in filenames
+                if filename in self._file_shards
+            }
+        shard_indices = sorted(touched_shards - self._loaded_shards)
+        if not shard_indices:
+            return
+
+        for shard_index, contents in zip(
+            shard_indices, self._read_shards(shard_indices)
+        ):
+            shard = self.shards[shard_index]
+            files = {
+                filename: [position, *self.files[filename][1:]]
+                for position, filename in enumerate(shard.files)
+            }
+            shard_report = Report.from_chunks(
+                chunks=contents, files=files, sessions=self._report_sessions()
+            )
+            for _file in shard_report:
+                report.append(_file)
+            self._loaded_shards.add(shard_index)
+
+    def read_chunks(self) -> str:
+        """
+        Reads all the shards, joined into a single chunks file that is indexed
+        by the `files` of the `report_json`.
+        """
+        chunks = []
+        for contents in self._read_shards(range(len(self.shards))):
+            chunks.extend(split_chunks(contents)[1])
+        return join_chunks(self.header, chunks)
+
+    def directory_path(self) -> str:
+        """
+        The path of the "directory" containing all the shards.
+        """
+        return posixpath.dirname(self._shard_path(ChunksShard(0, [])))
+
+    def _shard_path(self, shard: ChunksShard) -> str:
+        return self.archive_service.get_chunks_shard_path(
+            self.commitid, shard.id, self.report_code
+        )
+
+    def _read_shards(self, shard_indices: Iterable[int]) -> list[str]:
+        paths = [self._shard_path(self.shards[index]) for index in shard_indices]
+        if len(paths) <= 1:
+            return [self._read_shard(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(len(paths), MAX_READ_THREADS)) as pool:
+            return list(pool.map(self._read_shard, paths))
+
+    def _read_shard(self, path: str) -> str:
+        return self.archive_service.read_file(path).decode(errors="replace")
+
+    def save(
+        self, report: Report
+    ) -> tuple[dict, ReportTotals, list[int], list[ChunksShard]]:
+        """
+        Writes the shards of `report` that were loaded (or newly added) and have
+        changed.
+
+        `report` has to contain all the files of the loaded shards, and no files
+        of shards that were not loaded.
+        Returns the `report_json` including the shards index, the totals of
+        the whole report, the sizes of the shards that were written, and the
+        shards that became empty.
+        The empty shards are still referenced by the previous `report_json`, so
+        they have to be deleted (see `delete_shards`) only once the returned
+        `report_json` has been persisted.
+        """
+        shard_size = _config("shard_size", DEFAULT_SHARD_SIZE)
+        serialized_json, serialized_chunks, _totals = report.serialize(
+            with_totals=False
+        )
+        report_json = orjson.loads(serialized_json)
+        header, chunks = split_chunks(serialized_chunks.decode(errors="replace"))
+        loaded_files: dict[str, list] = report_json["files"]
+
+        new_files = [name for name in loaded_files if name not in self._file_shards]
+        new_files.reverse()
+        next_shard_id = max((shard.id for shard in self.shards), default=-1) + 1
+
+        shards: list[tuple[ChunksShard, bool]] = []
+        removed_shards: list[ChunksShard] = []
+        for shard_index, shard in enumerate(self.shards):
+            if shard_index not in self._loaded_shards:
+                shards.append((shard, False))
+                continue
+            shard_files = [name for name in shard.files if name in loaded_files]
+            while new_files and len(shard_files) < shard_size:
+                shard_files.append(new_files.pop())
+            if shard_files:
+                shards.append((ChunksShard(shard.id, shard_files, shard.digest), True))
+            else:
+                removed_shards.append(shard)
+        while new_files:
+            shard_files = [
+                new_files.pop() for _ in range(min(shard_size, len(new_files)))
+            ]
+            shards.append((ChunksShard(next_shard_id, shard_files), True))
+            next_shard_id += 1
+
+        files: dict[str, list] = {}
+        written_shard_sizes: list[int] = []
+        for shard, loaded in shards:
+            for filename in shard.files:
+                entry = loaded_files[filename] if loaded else self.files[filename]
+                files[filename] = [len(files), *entry[1:]]
+            if not loaded:
+                continue
+
+            contents = join_chunks(
+                header, [chunks[loaded_files[filename][0]] for filename in shard.files]
+            )
+            encoded_contents = contents.encode()
+            digest = hashlib.sha256(encoded_contents).hexdigest()
+            if digest != shard.digest:
+                self.archive_service.write_file(self._shard_path(shard), contents)
+                shard.digest = digest
+                written_shard_sizes.append(len(encoded_contents))
+
+        totals = sum_file_totals(
+            (entry[1] for entry in files.values()), len(report_json["sessions"])
+        )
+        report_json = {
+            "files": files,
+            "sessions": report_json["sessions"],
+            "totals": list(dataclasses.astuple(totals)),
+            INDEX_KEY: {
+                "header": header,
+                "shards": [dataclasses.asdict(shard) for shard, _loaded in shards],
+            },
+        }
+        return report_json, totals, written_shard_sizes, removed_shards
+
+    def delete_shards(self, shards: Iterable[ChunksShard]):
+        for shard in shards:
+            self.archive_service.delete_file(self._shard_path(shard))
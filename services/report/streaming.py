@@ -0,0 +1,110 @@
+"""
+Serializes a `Report` into its `chunks` a few files at a time.
+
+`Report.serialize` builds the complete `chunks` of a report in memory, which
+for huge reports means multiple full-size copies being alive at once. Instead,
+`StreamingReportSerializer` serializes batches of files, and yields the `chunks`
+piece by piece, so they can be compressed and uploaded without ever holding
+them in memory as a whole:
+
+    setup:
+      upload_processing:
+        streaming_serialize: true
+
+The streamed `chunks` and `report_json` are identical to the ones produced by
+`Report.serialize`.
+"""
+
+import dataclasses
+from collections.abc import Iterator
+
+import orjson
+from shared.config import get_config
+from shared.reports.resources import Report
+
+END_OF_HEADER = b"\n<<<<< end_of_header >>>>>\n"
+END_OF_CHUNK = b"\n<<<<< end_of_chunk >>>>>\n"
+
+# The number of files being serialized at once.
+SERIALIZE_BATCH_SIZE = 100
+
+
+def is_streaming_serialize_enabled() -> bool:
+    return bool(
+        get_config("setup", "upload_processing", "streaming_serialize", default=False)
+    )
+
+
+class StreamingReportSerializer:
+    """
+    Serializes `report`, by first consuming all the `chunks`, and then getting
+    the `report_json`, which is only complete once all the `chunks` were consumed.
+    """
+
+    def __init__(self, report: Report, batch_size: int = SERIALIZE_BATCH_SIZE):
+        self.report = report
+        self.batch_size = batch_size
+        self.size = 0
+        """
+        The total size of the `chunks` that were serialized so far.
+        """
+        self._files: dict[str, list] = {}
+        self._sessions: dict | None = None
+
+    def _new_batch(self) -> Report:
+        batch = Report(sessions=self.report.sessions)
+        batch.header = self.report.header
+        return batch
+
+    def _batches(self) -> Iterator[Report]:
+        batch = self._new_batch()
+        batch_files = 0
+        for _file in self.report:
+            batch.append(_file)
+            batch_files += 1
+            if batch_files >= self.batch_size:
+                yield batch
+                batch = self._new_batch()
+                batch_files = 0
+        # the last batch is also the one that serializes the header and sessions
+        # of a report without any files.
+        if batch_files or not self._files:
+            yield batch
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Yields the serialized `chunks` of the report, piece by piece.
+        """
+        for batch in self._batches():
+            batch_json, batch_chunks, _totals = batch.serialize(with_totals=False)
+            batch_json = orjson.loads(batch_json)
+            header, _separator, body = batch_chunks.partition(END_OF_HEADER)
+            del batch_chunks
+
+            pieces = []
+            if self._sessions is None:
+                self._sessions = batch_json["sessions"]
+                pieces.extend((header, END_OF_HEADER))
+            if batch_json["files"]:
+                if self._files:
+                    pieces.append(END_OF_CHUNK)
+                pieces.append(body)
+
+            # the files of the batch are indexed after all the previous ones
+            offset = len(self._files)
+            for filename, entry in batch_json["files"].items():
+                self._files[filename] = [offset + entry[0], *entry[1:]]
+
+            for piece in pieces:
+                self.size += len(piece)
+                yield piece
+
+    def report_json(self, with_totals: bool = True) -> bytes:
+        """
+        Returns the serialized `report_json`, matching the already consumed `chunks`.
+        """
+        assert self._sessions is not None, "the `chunks` have to be consumed first"
+        report_json: dict = {"files": self._files, "sessions": self._sessions}
+        if with_totals:
+            report_json["totals"] = list(dataclasses.astuple(self.report.totals))
+        return orjson.dumps(report_json)
@@ -0,0 +1,17 @@
+import pytest
+
+from services.report.benchmark.corpus import GENERATORS, CorpusSize
+from services.report.benchmark.harness import run_benchmark
+
+
+@pytest.mark.parametrize("processor", sorted(GENERATORS))
+def test_run_benchmark(processor):
+    size = CorpusSize(files=3, lines=10, branches=2, labels=2)
+    result = run_benchmark(processor, size, repeat=1)
+
+    assert result.processor == processor
+    assert len(result.wall_seconds) == 1
+    assert result.input_bytes > 0
+    assert result.report_files > 0
+    assert result.report_lines > 0
+    assert result.peak_memory_bytes > 0
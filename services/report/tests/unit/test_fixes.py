@@ -74,3 +74,36 @@ class TestFixes(unittest.TestCase):
             },
         }
         assert expected_result == res
+
+    def test_fixes_large_region(self):
+        res = fixes.get_fixes_from_raw(
+            "file:1:LCOV_EXCL_START\nfile:5000000:LCOV_EXCL_STOP\nfile:5000002", str
+        )
+        lines = res["file"]["lines"]
+        assert lines.intervals() == [(1, 5000000), (5000002, 5000002)]
+        assert len(lines) == 5000001
+        assert 2500000 in lines
+        assert 5000001 not in lines
+
+    def test_line_intervals(self):
+        lines = fixes.LineIntervals([1, 3, 9, 4], [(5, 7), (20, 30), (40, 35)])
+        assert lines.intervals() == [(1, 1), (3, 7), (9, 9), (20, 30)]
+        assert lines == {1, 3, 4, 5, 6, 7, 9, *range(20, 31)}
+        assert 0 not in lines
+        assert 8 not in lines
+        assert 25 in lines
+        assert 31 not in lines
+        assert list(lines.contains_all([31, 25, 0, 3, 8, 1])) == [0, 1, 0, 1, 0, 1]
+
+    def test_ignored_lines_mask(self):
+        line_numbers = [1, 2, 3, 4, 10, 11]
+        lines = fixes.LineIntervals([1], [(3, 4)])
+        assert list(fixes.ignored_lines_mask(None, line_numbers)) == [0] * 6
+        mask = fixes.ignored_lines_mask({"lines": lines}, line_numbers)
+        assert list(mask) == [1, 0, 1, 1, 0, 0]
+        assert list(
+            fixes.ignored_lines_mask({"lines": [2], "eof": 10}, line_numbers)
+        ) == [0, 1, 0, 0, 0, 1]
+        assert list(
+            fixes.ignored_lines_mask({"lines": [2], "eof": "N"}, line_numbers)
+        ) == [0, 1, 0, 0, 0, 0]
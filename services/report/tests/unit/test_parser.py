@@ -549,3 +549,19 @@ github.com/mypath/bugsbunny.go:20.36,22.17 2 1"""
             res.uploaded_files[0].contents
             == would_be_simple_content_res.uploaded_files[0].contents
         )
+
+    def test_parser_does_not_copy_uploaded_files(self):
+        res = LegacyReportParser().parse_raw_report_from_bytes(more_complex)
+        assert len(res.uploaded_files) == 2
+        for uploaded_file in res.uploaded_files:
+            # the contents are views into the original upload
+            assert uploaded_file.contents_view.obj is more_complex
+            assert uploaded_file.size == len(uploaded_file.contents)
+
+        first_file = res.uploaded_files[0]
+        assert first_file.get_first_line() == b'<?xml version="1.0" ?>\n'
+        contents = first_file.contents
+        assert first_file.contents is contents
+        first_file.release_contents()
+        assert first_file.contents is not contents
+        assert first_file.contents == contents
@@ -1,4 +1,5 @@
 from json import loads
+from time import time
 from unittest.mock import patch
 
 import pytest
@@ -21,6 +22,12 @@ from services.report.report_builder import ReportBuilder
 from test_utils.base import BaseTestCase
 
 
+@pytest.fixture
+def parsing_pool():
+    yield
+    process.shutdown_parsing_pool()
+
+
 class TestProcessRawUpload(BaseTestCase):
     @pytest.mark.parametrize("keys", ["nm", "n", "m", "nme", "ne", "M"])
     def test_process_raw_upload(self, keys):
@@ -109,6 +116,190 @@ class TestProcessRawUpload(BaseTestCase):
         master = process.process_raw_upload({}, parsed_report, Session())
         assert master.files == ["source", "file"]
 
+    def test_process_raw_upload_in_parallel(self, mock_configuration, parsing_pool):
+        report_data = [
+            "# path=coverage.info",
+            "mode: count",
+            "file.go:7.14,9.2 1 1",
+            "<<<<<< EOF",
+            "# path=coverage/coverage.lcov",
+            "SF:file.js",
+            "DA:1,1",
+            "DA:2,0",
+            "end_of_record",
+            "<<<<<< EOF",
+            "# path=coverage.json",
+            '{"coverage": {"file.js": [null, 0, 1, 1], "file.py": [null, 1]}}',
+            "<<<<<< EOF",
+            "# path=empty.txt",
+            "nothing to see here",
+        ]
+
+        def process_upload(parallel: bool) -> Report:
+            mock_configuration.set_params(
+                {
+                    "setup": {
+                        "upload_processing": {
+                            "parallel_parsing": {"enabled": parallel, "min_size": 0}
+                        }
+                    }
+                }
+            )
+            parsed_report = LegacyReportParser().parse_raw_report_from_bytes(
+                "\n".join(report_data).encode()
+            )
+            return process.process_raw_upload({}, parsed_report, Session())
+
+        sequential = process_upload(parallel=False)
+        parallel = process_upload(parallel=True)
+
+        assert parallel.files == ["file.go", "file.js", "file.py"]
+        assert parallel.serialize() == sequential.serialize()
+
+        # the pool is kept around for the following uploads
+        pool = process.start_parsing_pool()
+        assert process.start_parsing_pool() is pool
+        assert process_upload(parallel=True).serialize() == sequential.serialize()
+        assert process.start_parsing_pool() is pool
+
+    def test_process_raw_upload_in_parallel_expired(
+        self, mock_configuration, parsing_pool
+    ):
+        mock_configuration.set_params(
+            {
+                "setup": {
+                    "upload_processing": {
+                        "parallel_parsing": {"enabled": True, "min_size": 0}
+                    }
+                }
+            }
+        )
+        report_data = [
+            "# path=coverage.info",
+            "mode: count",
+            "file.go:7.14,9.2 1 1",
+            "<<<<<< EOF",
+            "# path=jacoco.xml",
+            '<report name="project">',
+            '<sessioninfo id="x" start="1411925087" dump="1411925088117" />',
+            '<package name="base"></package>',
+            "</report>",
+        ]
+        parsed_report = LegacyReportParser().parse_raw_report_from_bytes(
+            "\n".join(report_data).encode()
+        )
+
+        with pytest.raises(ReportExpiredException) as e:
+            process.process_raw_upload({}, parsed_report, Session())
+        assert e.value.filename == "jacoco.xml"
+
+    def test_process_raw_upload_cached(self, mocker, mock_configuration, mock_redis):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"parsed_report_cache": {"enabled": True}}}}
+        )
+        report_data = [
+            "# path=coverage.info",
+            "mode: count",
+            "file.go:7.14,9.2 1 1",
+            "<<<<<< EOF",
+            "# path=coverage.json",
+            '{"coverage": {"file.py": [null, 1, 0]}}',
+        ]
+
+        def process_upload() -> Report:
+            parsed_report = LegacyReportParser().parse_raw_report_from_bytes(
+                "\n".join(report_data).encode()
+            )
+            return process.process_raw_upload({}, parsed_report, Session())
+
+        pipeline = mock_redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [1, True, 1, 0, True, 1]
+        mock_redis.hgetall.return_value = {}
+        uncached = process_upload()
+
+        # both files were parsed and stored in the cache
+        assert pipeline.hset.call_count == 2
+        cached_reports = {
+            call.args[0]: {
+                key.encode(): value for key, value in call.kwargs["mapping"].items()
+            }
+            for call in pipeline.hset.call_args_list
+        }
+        assert len(cached_reports) == 2
+
+        mock_redis.hgetall.side_effect = lambda key: cached_reports[key]
+        process_report = mocker.spy(process, "process_report")
+        cached = process_upload()
+
+        process_report.assert_not_called()
+        assert cached.files == uncached.files
+        assert cached.totals == uncached.totals
+
+    def test_process_raw_upload_cached_corrupt(
+        self, mocker, mock_configuration, mock_redis
+    ):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"parsed_report_cache": {"enabled": True}}}}
+        )
+        report_data = [
+            "# path=coverage.json",
+            '{"coverage": {"file.py": [null, 1, 0]}}',
+        ]
+        parsed_report = LegacyReportParser().parse_raw_report_from_bytes(
+            "\n".join(report_data).encode()
+        )
+
+        pipeline = mock_redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [1, True, 1, 0, True, 1]
+        mock_redis.hgetall.return_value = {
+            b"report_json": b"not zstd",
+            b"chunks": b"not zstd",
+        }
+        process_report = mocker.spy(process, "process_report")
+        report = process.process_raw_upload({}, parsed_report, Session())
+
+        # the corrupt entry is dropped, and the file is parsed again
+        process_report.assert_called_once()
+        key = mock_redis.hgetall.call_args.args[0]
+        mock_redis.delete.assert_any_call(key)
+        assert report.files == ["file.py"]
+
+    def test_process_raw_upload_cached_until_expired(
+        self, mock_configuration, mock_redis
+    ):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"parsed_report_cache": {"enabled": True}}}}
+        )
+        # the report is rejected as expired in one hour from now
+        timestamp = int(time()) - 11 * 60 * 60
+        report_data = [
+            "# path=coverage.xml",
+            f'<coverage timestamp="{timestamp}" version="3.7.1">',
+            '<packages><package name=""><classes>',
+            '<class filename="file.py" name="file"><lines>',
+            '<line hits="1" number="1"/>',
+            "</lines></class>",
+            "</classes></package></packages>",
+            "</coverage>",
+        ]
+        parsed_report = LegacyReportParser().parse_raw_report_from_bytes(
+            "\n".join(report_data).encode()
+        )
+
+        pipeline = mock_redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [1, True, 1, 0, True, 1]
+        mock_redis.hgetall.return_value = {}
+        process.process_raw_upload({}, parsed_report, Session())
+
+        assert pipeline.hset.call_count == 1
+        key = pipeline.hset.call_args.args[0]
+        key_ttl = next(
+            call.args[1]
+            for call in pipeline.expire.call_args_list
+            if call.args[0] == key
+        )
+        assert 55 * 60 < key_ttl <= 60 * 60
+
     def test_process_raw_upload_empty_report(self):
         report_data = []
         report_data.append("# path=coverage/coverage.txt")
@@ -211,6 +402,55 @@ class TestProcessRawUpload(BaseTestCase):
             parsed_report = LegacyReportParser().parse_raw_report_from_bytes(b"")
             process.process_raw_upload(None, parsed_report, Session())
 
+    @pytest.mark.parametrize("count", [0, 1, 2, 7])
+    def test_merge_reports_pairwise(self, count):
+        def make_reports() -> list[Report]:
+            reports = []
+            for i in range(count):
+                report = Report()
+                for name in ["shared.py", f"file_{i}.py"]:
+                    _file = ReportFile(name)
+                    for ln in range(1, i + 3):
+                        coverage = (i + ln) % 3
+                        _file.append(
+                            ln,
+                            ReportLine.create(
+                                coverage, sessions=[LineSession(0, coverage)]
+                            ),
+                        )
+                    report.append(_file)
+                reports.append(report)
+            return reports
+
+        merged = process.merge_reports_pairwise(make_reports())
+        if not count:
+            assert merged is None
+            return
+
+        expected, *rest = make_reports()
+        for report in rest:
+            expected.merge(report)
+
+        assert sorted(merged.files) == sorted(expected.files)
+        assert merged.totals == expected.totals
+        for _file in expected:
+            assert merged.get(_file.name).totals == _file.totals
+
+    def test_pairwise_merger_retains_few_reports(self):
+        merger = process.PairwiseMerger()
+        assert not merger
+        for i in range(64):
+            report = Report()
+            _file = ReportFile(f"file_{i}.py")
+            _file.append(1, ReportLine.create(1, sessions=[LineSession(0, 1)]))
+            report.append(_file)
+            merger.add(report)
+            assert len(merger._stack) <= 7
+
+        merged = merger.finish()
+        assert not merger
+        assert len(merged.files) == 64
+
 
 class TestProcessRawUploadFixed(BaseTestCase):
     def test_fixes(self):
@@ -0,0 +1,63 @@
+import marshal
+
+import pytest
+from shared.storage.exceptions import FileNotInStorageError
+
+from services.report.profiling import (
+    is_profiling_active,
+    profile_upload_processing,
+    should_profile_upload,
+)
+
+ARCHIVE_URL = "v4/raw/2019-05-22/C3C4715CA57C910D11D5EB899FC86A7E/4c4e4654ac25037ae869caeb3619d485970b6304/a84d445c-9c1e-434f-8275-f18f1f320f81.txt"
+PROFILE_BASE = ARCHIVE_URL.removesuffix(".txt")
+
+
+@pytest.mark.parametrize(
+    "config, repoid, upload_size, expected",
+    [
+        ({}, 1, 1000, False),
+        ({"min_size": 1000}, 1, 1000, True),
+        ({"min_size": 1000}, 1, 999, False),
+        ({"repoids": [1]}, 1, 10, True),
+        ({"repoids": [2]}, 1, 10, False),
+    ],
+)
+def test_should_profile_upload(
+    mock_configuration, config, repoid, upload_size, expected
+):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"profiling": config}}}
+    )
+    assert should_profile_upload(repoid, upload_size) == expected
+
+
+def test_profile_upload_processing(mocker, mock_configuration, mock_storage):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"profiling": {"min_size": 100}}}}
+    )
+    repository = mocker.MagicMock(repoid=1)
+
+    with profile_upload_processing(repository, ARCHIVE_URL, 100) as armed:
+        assert armed
+        assert is_profiling_active()
+        data = [list(range(100)) for _ in range(100)]
+    assert not is_profiling_active()
+    assert data
+
+    cprofile = mock_storage.read_file("archive", f"{PROFILE_BASE}.cprofile")
+    assert marshal.loads(cprofile)
+    allocations = mock_storage.read_file("archive", f"{PROFILE_BASE}.tracemalloc.txt")
+    assert allocations.startswith(b"peak: ")
+    assert b"test_profiling.py" in allocations
+
+
+def test_profile_upload_processing_disarmed(mocker, mock_configuration, mock_storage):
+    repository = mocker.MagicMock(repoid=1)
+
+    with profile_upload_processing(repository, ARCHIVE_URL, 100) as armed:
+        assert not armed
+        assert not is_profiling_active()
+
+    with pytest.raises(FileNotInStorageError):
+        mock_storage.read_file("archive", f"{PROFILE_BASE}.cprofile")
@@ -2,6 +2,7 @@ import pytest
 from shared.reports.reportfile import ReportFile
 from shared.reports.types import CoverageDatapoint, LineSession, ReportLine
 
+from services.report.fixes import LineIntervals
 from services.report.report_builder import (
     CoverageType,
     ReportBuilder,
@@ -24,58 +25,29 @@ def test_report_builder_generate_session(mocker):
 
 def test_report_builder_session(mocker):
     current_yaml, sessionid, ignored_lines, path_fixer = (
-        {"beta_groups": ["labels"]},
-        mocker.MagicMock(),
-        mocker.MagicMock(),
+        {"flag_management": {"default_rules": {"carryforward_mode": "labels"}}},
+        0,
+        {},
         mocker.MagicMock(),
     )
     filepath = "filepath"
     builder = ReportBuilder(current_yaml, sessionid, ignored_lines, path_fixer)
     builder_session = builder.create_report_builder_session(filepath)
     first_file = ReportFile("filename.py")
-    first_file.append(2, ReportLine.create(coverage=0))
+    first_file.append(2, builder_session.create_coverage_line(0))
     first_file.append(
         3,
-        ReportLine.create(
-            coverage=0,
-            datapoints=[
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER],
-                )
-            ],
+        builder_session.create_coverage_line(
+            0,
+            labels_list_of_lists=[[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER]],
+            filename="filename.py",
+            line_number=3,
         ),
     )
     first_file.append(
         10,
-        ReportLine.create(
-            coverage=1,
-            type=None,
-            sessions=[
-                (
-                    LineSession(
-                        id=0,
-                        coverage=1,
-                    )
-                )
-            ],
-            datapoints=[
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=["some_label", "other"],
-                ),
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=None,
-                ),
-            ],
-            complexity=None,
+        builder_session.create_coverage_line(
+            1, labels_list_of_lists=[["some_label", "other"], []]
         ),
     )
     builder_session.append(first_file)
@@ -85,7 +57,15 @@ def test_report_builder_session(mocker):
         (
             2,
             ReportLine.create(
-                coverage=0, type=None, sessions=None, datapoints=None, complexity=None
+                coverage=0,
+                type=None,
+                sessions=[
+                    LineSession(
+                        id=0, coverage=0, branches=None, partials=None, complexity=None
+                    )
+                ],
+                datapoints=[],
+                complexity=None,
             ),
         ),
         (
@@ -93,11 +73,15 @@ def test_report_builder_session(mocker):
             ReportLine.create(
                 coverage=0,
                 type=None,
-                sessions=None,
+                sessions=[
+                    LineSession(
+                        id=0, coverage=0, branches=None, partials=None, complexity=None
+                    )
+                ],
                 datapoints=[
                     CoverageDatapoint(
                         sessionid=0,
-                        coverage=1,
+                        coverage=0,
                         coverage_type=None,
                         label_ids=["Th2dMtk4M_codecov"],
                     ),
@@ -122,73 +106,45 @@ def test_report_builder_session(mocker):
                         coverage_type=None,
                         label_ids=["some_label", "other"],
                     ),
-                    CoverageDatapoint(
-                        sessionid=0,
-                        coverage=1,
-                        coverage_type=None,
-                        label_ids=None,
-                    ),
                 ],
                 complexity=None,
             ),
         ),
     ]
+    assert builder_session._placeholder_lines == {"filename.py": {3}}
 
 
 def test_report_builder_session_only_all_labels(mocker):
     current_yaml, sessionid, ignored_lines, path_fixer = (
+        {"flag_management": {"default_rules": {"carryforward_mode": "labels"}}},
+        0,
         {},
         mocker.MagicMock(),
-        mocker.MagicMock(),
-        mocker.MagicMock(),
     )
     filepath = "filepath"
     builder = ReportBuilder(current_yaml, sessionid, ignored_lines, path_fixer)
     builder_session = builder.create_report_builder_session(filepath)
     first_file = ReportFile("filename.py")
-    first_file.append(2, ReportLine.create(coverage=0))
+    first_file.append(2, builder_session.create_coverage_line(0))
     first_file.append(
         3,
-        ReportLine.create(
-            coverage=0,
-            datapoints=[
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER],
-                )
-            ],
+        builder_session.create_coverage_line(
+            0,
+            labels_list_of_lists=[[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER]],
+            filename="filename.py",
+            line_number=3,
         ),
     )
     first_file.append(
         10,
-        ReportLine.create(
-            coverage=1,
-            type=None,
-            sessions=[
-                (
-                    LineSession(
-                        id=0,
-                        coverage=1,
-                    )
-                )
-            ],
-            datapoints=[
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER],
-                ),
-                CoverageDatapoint(
-                    sessionid=0,
-                    coverage=1,
-                    coverage_type=None,
-                    label_ids=None,
-                ),
+        builder_session.create_coverage_line(
+            1,
+            labels_list_of_lists=[
+                [SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER],
+                [],
             ],
-            complexity=None,
+            filename="filename.py",
+            line_number=10,
         ),
     )
     builder_session.append(first_file)
@@ -198,7 +154,15 @@ def test_report_builder_session_only_all_labels(mocker):
         (
             2,
             ReportLine.create(
-                coverage=0, type=None, sessions=None, datapoints=None, complexity=None
+                coverage=0,
+                type=None,
+                sessions=[
+                    LineSession(
+                        id=0, coverage=0, branches=None, partials=None, complexity=None
+                    )
+                ],
+                datapoints=[],
+                complexity=None,
             ),
         ),
         (
@@ -206,11 +170,15 @@ def test_report_builder_session_only_all_labels(mocker):
             ReportLine.create(
                 coverage=0,
                 type=None,
-                sessions=None,
+                sessions=[
+                    LineSession(
+                        id=0, coverage=0, branches=None, partials=None, complexity=None
+                    )
+                ],
                 datapoints=[
                     CoverageDatapoint(
                         sessionid=0,
-                        coverage=1,
+                        coverage=0,
                         coverage_type=None,
                         label_ids=["Th2dMtk4M_codecov"],
                     ),
@@ -235,12 +203,6 @@ def test_report_builder_session_only_all_labels(mocker):
                         coverage_type=None,
                         label_ids=["Th2dMtk4M_codecov"],
                     ),
-                    CoverageDatapoint(
-                        sessionid=0,
-                        coverage=1,
-                        coverage_type=None,
-                        label_ids=None,
-                    ),
                 ],
                 complexity=None,
             ),
@@ -248,6 +210,97 @@ def test_report_builder_session_only_all_labels(mocker):
     ]
 
 
+def test_report_builder_session_placeholder_requires_position(mocker):
+    builder = ReportBuilder(
+        {"flag_management": {"default_rules": {"carryforward_mode": "labels"}}},
+        0,
+        {},
+        mocker.MagicMock(),
+    )
+    builder_session = builder.create_report_builder_session("filepath")
+    labels = [[SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER]]
+
+    with pytest.raises(ValueError):
+        builder_session.create_coverage_line(1, labels_list_of_lists=labels)
+    with pytest.raises(ValueError):
+        builder_session.create_coverage_line(
+            1, labels_list_of_lists=labels, filename="filename.py"
+        )
+    # lines without placeholders do not need to be found again
+    builder_session.create_coverage_line(1, labels_list_of_lists=[["test"]])
+
+
+def test_report_builder_session_labels_without_placeholder(mocker):
+    builder = ReportBuilder(
+        {"flag_management": {"default_rules": {"carryforward_mode": "labels"}}},
+        0,
+        {},
+        mocker.MagicMock(),
+    )
+    builder_session = builder.create_report_builder_session("filepath")
+    first_file = ReportFile("filename.py")
+    first_file.append(
+        1, builder_session.create_coverage_line(1, labels_list_of_lists=[["test"]])
+    )
+    builder_session.append(first_file)
+
+    modify_line = mocker.patch.object(
+        builder_session, "_possibly_modify_line_to_account_for_special_labels"
+    )
+    final_report = builder_session.output_report()
+
+    assert builder_session._present_labels == {"test"}
+    assert final_report.files == ["filename.py"]
+    modify_line.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "ignore",
+    [
+        {"lines": {4}},
+        {"lines": LineIntervals([1], [(2, 3)])},
+        {"lines": LineIntervals([2]), "eof": 3},
+    ],
+)
+def test_report_builder_session_compact_file(ignore):
+    builder = ReportBuilder({}, 3, {"other.py": ignore}, lambda path: path)
+
+    def build(compact: bool):
+        builder_session = builder.create_report_builder_session("filepath")
+        for name in ["file.py", "other.py", "file.py"]:
+            lines = [
+                (1, 1, None),
+                (2, 0, CoverageType.line),
+                (2, 5, CoverageType.line),
+                (3, "1/2", CoverageType.branch),
+                (4, 2**70, CoverageType.method),
+                (0, 1, None),
+            ]
+            if compact:
+                _file = builder_session.create_compact_file(name)
+                for ln, coverage, coverage_type in lines:
+                    _file.append(ln, coverage, coverage_type)
+            else:
+                _file = builder_session.create_coverage_file(name)
+                for ln, coverage, coverage_type in lines:
+                    _file.append(
+                        ln,
+                        builder_session.create_coverage_line(coverage, coverage_type),
+                    )
+            builder_session.append(_file)
+        # a regular file after the compact ones keeps its position
+        last_file = builder_session.create_coverage_file("last.py")
+        last_file.append(1, builder_session.create_coverage_line(1))
+        builder_session.append(last_file)
+        return builder_session.output_report()
+
+    expected = build(compact=False)
+    report = build(compact=True)
+
+    assert report.files == ["file.py", "other.py", "last.py"]
+    assert report.serialize() == expected.serialize()
+
+
 def test_report_builder_session_create_line(mocker):
     current_yaml, sessionid, ignored_lines, path_fixer = (
         {
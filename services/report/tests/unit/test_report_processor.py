@@ -1,8 +1,24 @@
+import orjson
 import pytest
 
+from services.report.languages.cobertura import CoberturaProcessor
+from services.report.languages.go import GoProcessor
 from services.report.languages.helpers import remove_non_ascii
+from services.report.languages.node import NodeProcessor
+from services.report.languages.pycoverage import PyCoverageProcessor
 from services.report.parser.types import ParsedUploadedReportFile
-from services.report.report_processor import process_report, report_type_matching
+from services.report.report_builder import ReportBuilder
+from services.report.report_processor import (
+    JSON_PREFIX_SIZE,
+    PROCESSORS,
+    get_processors,
+    leading_bytes,
+    open_json_stream,
+    open_xml_stream,
+    process_report,
+    report_type_matching,
+    sniff_report_type,
+)
 
 xcode_report = b"""/Users/distiller/project/Auth0/A0ChallengeGenerator.m:
    28|       |@implementation A0SHA256ChallengeGenerator
@@ -38,6 +54,10 @@ xcode_report = b"""/Users/distiller/project/Auth0/A0ChallengeGenerator.m:
         ),
         (b"normal file", "txt", b"normal file"),
         (b"1", "txt", b"1"),
+        # JSON does not allow a BOM
+        (b'\xef\xbb\xbf{"value":1}', "txt", None),
+        (b"TN:\nSF:file.c\nDA:1,1\nend_of_record", "txt", None),
+        (b"mode: count\nfile.go:1.1,2.2 1 1", "txt", None),
     ],
 )
 def test_report_type_matching(input: bytes, expected_type: str, expected_content):
@@ -53,6 +73,50 @@ def test_report_type_matching(input: bytes, expected_type: str, expected_content
         assert content == expected_content
 
 
+@pytest.mark.parametrize(
+    "input,expected_type",
+    [
+        (b"", None),
+        (b"   \n\t", None),
+        (b"{}", "json"),
+        (b'\n  [{"name": "a"}]', "json"),
+        (b'<?xml version="1.0" ?><coverage/>', "xml"),
+        (b'\xef\xbb\xbf\n<?xml version="1.0" ?><coverage/>', "xml"),
+        (b'\xef\xbb\xbf{"value":1}', "txt"),
+        ("<coverage/>".encode("utf-16"), None),
+        (b"TN:\nSF:file.c", "txt"),
+        (b"mode: atomic", "txt"),
+        (b"        -:    0:Source:file.c", "txt"),
+    ],
+)
+def test_sniff_report_type(input: bytes, expected_type: str | None):
+    assert sniff_report_type(leading_bytes(input)) == expected_type
+
+
+def test_report_type_matching_text_is_not_parsed(mocker):
+    orjson_loads = mocker.patch("services.report.report_processor.orjson.loads")
+    xml_fromstring = mocker.patch("services.report.report_processor.etree.fromstring")
+    report = ParsedUploadedReportFile(
+        filename="lcov.info", file_contents=b"SF:file.c\nDA:1,1\nend_of_record"
+    )
+
+    content, detected_type = report_type_matching(report, "SF:file.c")
+
+    assert detected_type == "txt"
+    assert content == report.contents
+    assert not orjson_loads.called
+    assert not xml_fromstring.called
+
+
+def test_get_processors_prefers_signatures():
+    processors = get_processors("txt", b"mode: count")
+    assert isinstance(processors[0], GoProcessor)
+    assert len(processors) == len(PROCESSORS["txt"])
+
+    processors = get_processors("txt", b"something else")
+    assert [type(p) for p in processors] == PROCESSORS["txt"]
+
+
 def test_empty_json():
     raw_report = ParsedUploadedReportFile(filename="name", file_contents=b"{}")
     report = process_report(raw_report, None)
@@ -61,3 +125,155 @@ def test_empty_json():
     raw_report = ParsedUploadedReportFile(filename="name", file_contents=b"[]")
     report = process_report(raw_report, None)
     assert report is None
+
+
+cobertura_report = b"""<?xml version="1.0" ?>
+<coverage timestamp="0">
+    <sources><source>/repo</source></sources>
+    <packages><package name=""><classes>
+        <class filename="a.py"><lines><line hits="1" number="1"/></lines></class>
+        <class filename="b.py"><lines><line hits="0" number="2"/></lines></class>
+    </classes></package></packages>
+</coverage>
+"""
+
+
+@pytest.mark.parametrize(
+    "filename,content,streams",
+    [
+        ("coverage.xml", cobertura_report, True),
+        ("coverage.plist", cobertura_report, False),
+        ("coverage.json", b'{"coverage": {}}', False),
+        ("coverage.xml", b'<coverage><assembly name="x"/></coverage>', False),
+        ("coverage.xml", b"<CoverageSession><Modules/></CoverageSession>", False),
+        ("coverage.xml", b"<coverage />", False),
+    ],
+)
+def test_open_xml_stream(filename: str, content: bytes, streams: bool):
+    report = ParsedUploadedReportFile(filename=filename, file_contents=content)
+    stream = open_xml_stream(report, "")
+
+    if not streams:
+        assert stream is None
+        return
+    processor, root, elements = stream
+    assert isinstance(processor, CoberturaProcessor)
+    assert root.tag == "coverage"
+    assert [element.tag for element in elements] == ["source", "class", "class"]
+
+
+def test_process_report_streams_large_xml(mocker, mock_configuration):
+    def process(threshold: int):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"xml_streaming_threshold": threshold}}}
+        )
+        report_builder = ReportBuilder(
+            path_fixer=lambda path, bases_to_try=None: path,
+            ignored_lines={},
+            sessionid=0,
+            current_yaml={"codecov": {"max_report_age": None}},
+        )
+        report = ParsedUploadedReportFile(
+            filename="coverage.xml", file_contents=cobertura_report
+        )
+        return process_report(report, report_builder)
+
+    tree_report = process(threshold=len(cobertura_report) + 1)
+
+    report_type_matching = mocker.patch(
+        "services.report.report_processor.report_type_matching"
+    )
+    streamed_report = process(threshold=len(cobertura_report))
+
+    assert not report_type_matching.called
+    assert streamed_report.files == tree_report.files == ["a.py", "b.py"]
+    assert streamed_report.totals == tree_report.totals
+
+
+node_report = b"""{
+    "a.js": {"statementMap": {"0": {"start": {"line": 1}}}, "s": {"0": 1}},
+    "b.js": {"statementMap": {"0": {"start": {"line": 2}}}, "s": {"0": 0}}
+}"""
+
+
+@pytest.mark.parametrize(
+    "filename,content,expected_processor",
+    [
+        ("coverage.json", node_report, NodeProcessor),
+        (
+            "coverage.json",
+            b'{"meta": {"show_contexts": true}, "files": {}}',
+            PyCoverageProcessor,
+        ),
+        ("coverage.plist", node_report, None),
+        ("coverage.json", b'{"source_files": [{"name": "a.rb"}]}', None),
+        ("coverage.json", b'[{"name": "a.cls"}]', None),
+        ("coverage.json", b"{}", None),
+        ("coverage.json", b'{"a.js": {', None),
+        ("coverage.txt", b"SF:a.c\nend_of_record", None),
+    ],
+)
+def test_open_json_stream(filename: str, content: bytes, expected_processor):
+    report = ParsedUploadedReportFile(filename=filename, file_contents=content)
+    stream = open_json_stream(report, "")
+
+    if expected_processor is None:
+        assert stream is None
+        return
+    processor, document = stream
+    assert isinstance(processor, expected_processor)
+    assert [key for key, _value in document.items()] == list(
+        orjson.loads(content).keys()
+    )
+
+
+def test_process_report_streams_large_json(mocker, mock_configuration):
+    def process(threshold: int):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"json_streaming_threshold": threshold}}}
+        )
+        report_builder = ReportBuilder(
+            path_fixer=lambda path: path,
+            ignored_lines={},
+            sessionid=0,
+            current_yaml={},
+        )
+        report = ParsedUploadedReportFile(
+            filename="coverage.json", file_contents=node_report
+        )
+        return process_report(report, report_builder)
+
+    tree_report = process(threshold=len(node_report) + 1)
+
+    report_type_matching = mocker.patch(
+        "services.report.report_processor.report_type_matching"
+    )
+    streamed_report = process(threshold=len(node_report))
+
+    assert not report_type_matching.called
+    assert streamed_report.files == tree_report.files == ["a.js", "b.js"]
+    assert streamed_report.totals == tree_report.totals
+
+
+def test_process_report_json_stream_falls_back(mocker, mock_configuration):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"json_streaming_threshold": 0}}}
+    )
+    report_builder = ReportBuilder(
+        path_fixer=lambda path: path,
+        ignored_lines={},
+        sessionid=0,
+        current_yaml={},
+    )
+    # the prefix looks like a node report, but the rest of the document does not
+    content = node_report[:-2] + b" " * JSON_PREFIX_SIZE + b',\n    "c.js": 1\n}'
+    report = ParsedUploadedReportFile(filename="coverage.json", file_contents=content)
+    processor, _document = open_json_stream(report, "")
+    assert isinstance(processor, NodeProcessor)
+
+    full_type_matching = mocker.patch(
+        "services.report.report_processor.report_type_matching",
+        wraps=report_type_matching,
+    )
+    assert process_report(report, report_builder) is None
+    assert full_type_matching.called
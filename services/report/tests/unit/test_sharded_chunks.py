@@ -0,0 +1,171 @@
+import pytest
+from shared.reports.reportfile import ReportFile
+from shared.reports.resources import Report
+from shared.reports.types import LineSession, ReportLine
+from shared.storage.exceptions import FileNotInStorageError
+from shared.utils.sessions import Session
+
+from database.tests.factories import RepositoryFactory
+from services.archive import ArchiveService
+from services.report.sharded_chunks import (
+    INDEX_KEY,
+    ShardedChunks,
+    join_chunks,
+    split_chunks,
+    sum_file_totals,
+)
+
+
+def _create_file(name: str, coverage: list[int]) -> ReportFile:
+    _file = ReportFile(name)
+    for ln, hits in enumerate(coverage, start=1):
+        _file.append(
+            ln, ReportLine.create(coverage=hits, sessions=[LineSession(0, hits)])
+        )
+    return _file
+
+
+def _create_report(files: dict[str, list[int]]) -> Report:
+    report = Report()
+    report.add_session(Session(flags=["unit"]))
+    for name, coverage in files.items():
+        report.append(_create_file(name, coverage))
+    return report
+
+
+def _load_full_report(sharded_chunks: ShardedChunks) -> Report:
+    report = sharded_chunks.empty_report()
+    sharded_chunks.load_files(report)
+    return report
+
+
+def _file_coverage(report: Report) -> dict[str, list]:
+    return {
+        _file.name: [line.coverage for _ln, line in _file.lines] for _file in report
+    }
+
+
+def test_split_join_chunks():
+    chunks = join_chunks('{"labels_index": {}}', ["[1]", "", "[1]\n[0]"])
+
+    assert split_chunks(chunks) == ('{"labels_index": {}}', ["[1]", "", "[1]\n[0]"])
+    assert split_chunks(join_chunks("{}", [])) == ("{}", [])
+    assert split_chunks("[1]") == ("{}", ["[1]"])
+
+
+def test_sum_file_totals():
+    totals = sum_file_totals(
+        [[0, 4, 3, 1, 0, "75.00000", 1, 0, 0, 0, 0, 0, 0], None], sessions=2
+    )
+
+    assert (totals.files, totals.lines, totals.hits, totals.misses) == (2, 4, 3, 1)
+    assert totals.branches == 1
+    assert totals.sessions == 2
+    assert totals.coverage == "75.00000"
+
+    assert sum_file_totals([], sessions=0).coverage is None
+
+
+def test_sharded_chunks_lazy_loading(dbsession, mock_configuration, mock_storage):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"sharded_chunks": {"shard_size": 2}}}}
+    )
+    repository = RepositoryFactory()
+    dbsession.add(repository)
+    dbsession.flush()
+    archive_service = ArchiveService(repository)
+
+    report = _create_report(
+        {"a.py": [1, 0], "b.py": [1], "c.py": [0, 0], "d.py": [1, 1], "e.py": [1]}
+    )
+    sharded_chunks = ShardedChunks(archive_service, "abc", None)
+    report_json, totals, written_shard_sizes, removed_shards = sharded_chunks.save(
+        report
+    )
+
+    assert [shard["files"] for shard in report_json[INDEX_KEY]["shards"]] == [
+        ["a.py", "b.py"],
+        ["c.py", "d.py"],
+        ["e.py"],
+    ]
+    assert (totals.files, totals.lines, totals.hits) == (5, 8, 5)
+    assert len(written_shard_sizes) == 3
+    assert removed_shards == []
+
+    sharded_chunks = ShardedChunks.from_report_json(
+        archive_service, "abc", None, report_json
+    )
+    loaded_report = Report.from_chunks(
+        chunks=sharded_chunks.read_chunks(),
+        files=report_json["files"],
+        sessions=report_json["sessions"],
+    )
+    assert _file_coverage(loaded_report) == _file_coverage(report)
+
+    # only the shards of touched files are loaded
+    partial_report = sharded_chunks.empty_report()
+    assert list(partial_report.sessions) == [0]
+    sharded_chunks.load_files(partial_report, ["d.py", "new.py"])
+    assert sorted(partial_report.files) == ["c.py", "d.py"]
+
+    # only the changed shards are written
+    shard_paths = [
+        archive_service.get_chunks_shard_path("abc", shard_id) for shard_id in range(3)
+    ]
+    untouched = {path: archive_service.read_file(path) for path in shard_paths}
+    partial_report.append(_create_file("new.py", [1, 1, 1]))
+    report_json, totals, written_shard_sizes, removed_shards = sharded_chunks.save(
+        partial_report
+    )
+
+    assert [shard["files"] for shard in report_json[INDEX_KEY]["shards"]] == [
+        ["a.py", "b.py"],
+        ["c.py", "d.py"],
+        ["e.py"],
+        ["new.py"],
+    ]
+    assert (totals.files, totals.lines, totals.hits) == (6, 11, 8)
+    assert len(written_shard_sizes) == 1
+    assert removed_shards == []
+    assert {path: archive_service.read_file(path) for path in shard_paths} == untouched
+
+    sharded_chunks = ShardedChunks.from_report_json(
+        archive_service, "abc", None, report_json
+    )
+    assert _file_coverage(_load_full_report(sharded_chunks)) == {
+        **_file_coverage(report),
+        "new.py": [1, 1, 1],
+    }
+
+
+def test_sharded_chunks_removed_shards(dbsession, mock_configuration, mock_storage):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"sharded_chunks": {"shard_size": 1}}}}
+    )
+    repository = RepositoryFactory()
+    dbsession.add(repository)
+    dbsession.flush()
+    archive_service = ArchiveService(repository)
+
+    report = _create_report({"a.py": [1, 0], "b.py": [1]})
+    sharded_chunks = ShardedChunks(archive_service, "abc", None)
+    report_json, _totals, _sizes, _removed = sharded_chunks.save(report)
+
+    sharded_chunks = ShardedChunks.from_report_json(
+        archive_service, "abc", None, report_json
+    )
+    _load_full_report(sharded_chunks)
+    # all the shards are loaded, but "b.py" was removed from the report
+    report = _create_report({"a.py": [1, 0]})
+    report_json, totals, _sizes, removed_shards = sharded_chunks.save(report)
+
+    assert [shard["files"] for shard in report_json[INDEX_KEY]["shards"]] == [["a.py"]]
+    assert totals.files == 1
+    assert [shard.files for shard in removed_shards] == [["b.py"]]
+
+    # the removed shard is only deleted once the new `report_json` is persisted
+    removed_path = archive_service.get_chunks_shard_path("abc", removed_shards[0].id)
+    assert archive_service.read_file(removed_path)
+    sharded_chunks.delete_shards(removed_shards)
+    with pytest.raises(FileNotInStorageError):
+        archive_service.read_file(removed_path)
@@ -0,0 +1,45 @@
+import gzip
+
+import orjson
+import pytest
+from shared.reports.reportfile import ReportFile
+from shared.reports.resources import Report
+from shared.reports.types import LineSession, ReportLine
+from shared.utils.sessions import Session
+
+from services.archive import gzip_to_file
+from services.report.streaming import StreamingReportSerializer
+
+
+def _create_report(file_count: int) -> Report:
+    report = Report()
+    report.add_session(Session(flags=["unit"]))
+    for i in range(file_count):
+        _file = ReportFile(f"file_{i}.py")
+        for ln in range(1, i + 2):
+            hits = ln % 2
+            _file.append(
+                ln, ReportLine.create(coverage=hits, sessions=[LineSession(0, hits)])
+            )
+        report.append(_file)
+    return report
+
+
+@pytest.mark.parametrize("file_count", [0, 1, 5, 6, 7])
+def test_streaming_serialize(file_count):
+    report = _create_report(file_count)
+    report_json, chunks, _totals = report.serialize()
+
+    serializer = StreamingReportSerializer(report, batch_size=3)
+    streamed_chunks = b"".join(serializer.chunks())
+
+    assert streamed_chunks == chunks
+    assert serializer.size == len(chunks)
+    assert orjson.loads(serializer.report_json()) == orjson.loads(report_json)
+
+
+def test_gzip_to_file():
+    pieces = [b"first", b"", b"second" * 1000]
+
+    with gzip_to_file(pieces) as compressed:
+        assert gzip.decompress(compressed.read()) == b"".join(pieces)
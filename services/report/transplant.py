@@ -2,6 +2,7 @@ from shared.django_apps.core.models import Commit
 from shared.django_apps.reports.models import CommitReport, ReportType
 
 from services.archive import ArchiveService
+from services.report.sharded_chunks import INDEX_KEY, ShardedChunks
 
 
 def transplant_commit_report(repo_id: int, from_sha: str, to_sha: str):
@@ -21,10 +22,21 @@ def transplant_commit_report(repo_id: int, from_sha: str, to_sha: str):
 
     archive_service = ArchiveService(from_commit.repository)
 
-    chunks = archive_service.read_chunks(from_commit.commitid)
     report_json = from_commit.report
     totals = from_commit.totals
 
+    sharded_chunks = ShardedChunks.from_report_json(
+        archive_service, from_commit.commitid, None, report_json
+    )
+    if sharded_chunks is not None:
+        # the copy is stored in the regular (non-sharded) layout
+        chunks = sharded_chunks.read_chunks()
+        report_json = {
+            key: value for key, value in report_json.items() if key != INDEX_KEY
+        }
+    else:
+        chunks = archive_service.read_chunks(from_commit.commitid)
+
     archive_service.write_chunks(to_commit.commitid, chunks)
 
     to_commit.report = report_json
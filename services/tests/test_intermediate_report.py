@@ -0,0 +1,234 @@
+import pytest
+from shared.reports.reportfile import ReportFile
+from shared.reports.resources import Report
+from shared.reports.types import CoverageDatapoint, LineSession, ReportLine
+from shared.utils.sessions import Session
+
+from services.processing.columnar_report import decode_report, encode_report
+from services.processing.compression import (
+    DICTIONARY_RETRY_INTERVAL,
+    clear_dictionary_cache,
+    compress,
+    compress_stream,
+    decompress,
+    load_dictionary,
+    save_dictionary,
+    train_dictionary,
+)
+from services.processing.intermediate import (
+    cleanup_intermediate_reports,
+    load_intermediate_reports,
+    load_processing_results,
+    save_intermediate_report,
+    save_processing_result,
+)
+
+
+def _create_report() -> Report:
+    report = Report()
+    report.add_session(Session(flags=["unit"]))
+
+    first_file = ReportFile("file_1.py")
+    first_file.append(1, ReportLine.create(coverage=1, sessions=[LineSession(0, 1)]))
+    first_file.append(2, ReportLine.create(coverage=0, sessions=[LineSession(0, 0)]))
+    first_file.append(
+        3,
+        ReportLine.create(
+            coverage=1, type="m", sessions=[LineSession(0, 1)], complexity=0
+        ),
+    )
+    first_file.append(
+        4,
+        ReportLine.create(
+            coverage="1/2",
+            type="b",
+            sessions=[LineSession(0, "1/2", branches=["1"])],
+        ),
+    )
+    report.append(first_file)
+
+    second_file = ReportFile("file_2.go")
+    second_file.append(
+        10,
+        ReportLine.create(
+            coverage=True,
+            sessions=[LineSession(0, True, partials=[[0, 4, 1], [5, None, 0]])],
+            datapoints=[
+                CoverageDatapoint(
+                    sessionid=0, coverage=True, coverage_type=None, label_ids=[1]
+                )
+            ],
+        ),
+    )
+    second_file.append(
+        11, ReportLine.create(coverage=5, sessions=[LineSession(0, 5)], datapoints=[])
+    )
+    report.append(second_file)
+
+    return report
+
+
+def _serialized(report: Report) -> tuple:
+    report_json, chunks, _totals = report.serialize(with_totals=False)
+    return report_json, chunks
+
+
+def test_columnar_report_roundtrip():
+    report = _create_report()
+
+    decoded = decode_report(encode_report(report))
+
+    assert _serialized(decoded) == _serialized(report)
+
+
+def test_columnar_report_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_report(b"not a columnar report")
+
+    with pytest.raises(ValueError):
+        decode_report(encode_report(_create_report())[:-10])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_intermediate_report_roundtrip(mock_configuration, columnar):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"columnar_intermediate_reports": columnar}}}
+    )
+    report = _create_report()
+
+    assert save_intermediate_report(1, report) > 0
+    [intermediate_report] = load_intermediate_reports([1])
+    cleanup_intermediate_reports([1])
+
+    assert intermediate_report.upload_id == 1
+    assert _serialized(intermediate_report.report) == _serialized(report)
+
+
+def _train_dictionary() -> int:
+    samples = [
+        _serialized(_create_report())[1] + f"\n[{i}, null, [[0, {i}]]]".encode()
+        for i in range(500)
+    ]
+    return save_dictionary(train_dictionary(samples, dict_size=4 * 1024))
+
+
+def test_compression_with_dictionary(mock_configuration, mock_storage):
+    clear_dictionary_cache()
+    dict_id = _train_dictionary()
+    data = _serialized(_create_report())[1]
+
+    compressed, used_dictionary = compress("chunks", data)
+    assert not used_dictionary
+    assert decompress(compressed) == data
+
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"zstd_dictionaries": {"chunks": dict_id}}}}
+    )
+    compressed_with_dictionary, used_dictionary = compress("chunks", data)
+    assert used_dictionary
+    assert len(compressed_with_dictionary) < len(compressed)
+
+    # the dictionary is found through the id in the frame header,
+    # even once it is not configured anymore
+    mock_configuration.set_params({"setup": {"upload_processing": {}}})
+    assert decompress(compressed_with_dictionary) == data
+
+
+def test_compression_with_missing_dictionary(mock_configuration, mock_storage):
+    clear_dictionary_cache()
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"zstd_dictionaries": {"chunks": 1234}}}}
+    )
+    data = _serialized(_create_report())[1]
+
+    compressed, used_dictionary = compress("chunks", data)
+
+    assert not used_dictionary
+    assert decompress(compressed) == data
+
+
+def test_missing_dictionary_is_retried_later(mocker, mock_configuration, mock_storage):
+    clear_dictionary_cache()
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"zstd_dictionaries": {"chunks": 1234}}}}
+    )
+    load_dictionary_spy = mocker.patch(
+        "services.processing.compression.load_dictionary", wraps=load_dictionary
+    )
+    monotonic = mocker.patch("time.monotonic", return_value=1000.0)
+    data = _serialized(_create_report())[1]
+
+    assert not compress("chunks", data)[1]
+    assert not compress("chunks", data)[1]
+    # the failure is remembered for a while
+    assert load_dictionary_spy.call_count == 1
+
+    monotonic.return_value += DICTIONARY_RETRY_INTERVAL
+    assert not compress("chunks", data)[1]
+    assert load_dictionary_spy.call_count == 2
+
+
+def test_compress_stream(mock_configuration, mock_storage):
+    clear_dictionary_cache()
+    dict_id = _train_dictionary()
+    data = _serialized(_create_report())[1]
+    pieces = [data[:10], b"", data[10:]]
+
+    compressed, used_dictionary = compress_stream("chunks", pieces)
+    assert not used_dictionary
+    assert decompress(compressed) == data
+
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"zstd_dictionaries": {"chunks": dict_id}}}}
+    )
+    compressed, used_dictionary = compress_stream("chunks", pieces)
+    assert used_dictionary
+    assert decompress(compressed) == data
+
+
+def test_intermediate_report_streaming_roundtrip(mock_configuration):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"streaming_serialize": True}}}
+    )
+    report = _create_report()
+
+    assert save_intermediate_report(1, report) > 0
+    [intermediate_report] = load_intermediate_reports([1])
+    cleanup_intermediate_reports([1])
+
+    assert _serialized(intermediate_report.report) == _serialized(report)
+
+
+def test_processing_results_roundtrip():
+    result = {"upload_id": 2, "arguments": {"flags": ["unit"]}, "successful": True}
+    save_processing_result(2, result)
+
+    assert load_processing_results([1, 2]) == [result]
+
+    cleanup_intermediate_reports([2])
+    assert load_processing_results([2]) == []
+
+
+@pytest.mark.parametrize("threads", [0, 1, 4])
+def test_load_intermediate_reports_in_order(mock_configuration, threads):
+    mock_configuration.set_params(
+        {
+            "setup": {
+                "upload_processing": {"intermediate_report_decode_threads": threads}
+            }
+        }
+    )
+    report = _create_report()
+    for upload_id in [1, 2, 3]:
+        save_intermediate_report(upload_id, report)
+
+    intermediate_reports = load_intermediate_reports([3, 4, 1, 2])
+    cleanup_intermediate_reports([1, 2, 3])
+
+    # the reports are decoded lazily
+    assert not isinstance(intermediate_reports, list)
+    intermediate_reports = list(intermediate_reports)
+    assert [ir.upload_id for ir in intermediate_reports] == [3, 4, 1, 2]
+    assert intermediate_reports[1].report.is_empty()
+    for ir in [intermediate_reports[0], *intermediate_reports[2:]]:
+        assert _serialized(ir.report) == _serialized(report)
@@ -2,6 +2,7 @@ from uuid import uuid4
 
 from services.processing.state import (
     ProcessingState,
+    UploadNumbers,
     should_perform_merge,
     should_trigger_postprocessing,
 )
@@ -69,3 +70,60 @@ def test_batch_merging_many_uploads():
     state.mark_uploads_as_merged(merging)
 
     assert should_trigger_postprocessing(state.get_upload_numbers())
+
+
+def test_processed_uploads():
+    state = ProcessingState(1234, uuid4().hex)
+    state.mark_uploads_as_processing([1, 2, 3])
+
+    state.mark_upload_as_processed(1)
+    state.mark_upload_as_processed(2)
+    assert state.get_processed_uploads() == {1, 2}
+
+    state.mark_uploads_as_merged([1])
+    assert state.get_processed_uploads() == {2}
+
+
+def test_batch_merging_by_size(mock_configuration):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"merge_memory_budget": 1000}}}
+    )
+    state = ProcessingState(1234, uuid4().hex)
+    state.mark_uploads_as_processing(list(range(1, 30)))
+
+    # lots of small uploads are merged in one big batch
+    for id in range(1, 26):
+        state.mark_upload_as_processed(id, 10)
+    assert not should_perform_merge(state.get_upload_numbers(with_size=True))
+    assert len(state.get_uploads_for_merging()) == 25
+
+    # huge uploads are merged on their own
+    state.mark_upload_as_processed(26, 900)
+    state.mark_upload_as_processed(27, 1500)
+    assert should_perform_merge(state.get_upload_numbers(with_size=True))
+
+    merging = state.get_uploads_for_merging()
+    assert merging == set(range(1, 26))
+    state.mark_uploads_as_merged(merging)
+
+    assert state.get_uploads_for_merging() == {26}
+    assert state.get_uploads_for_merging(exclude={26}) == {27}
+    state.mark_uploads_as_merged([26, 27])
+
+    assert state.get_upload_numbers(with_size=True).processed_size == 0
+
+
+def test_split_into_merge_batches(mock_configuration):
+    mock_configuration.set_params(
+        {"setup": {"upload_processing": {"merge_memory_budget": 1000}}}
+    )
+    state = ProcessingState(1234, uuid4().hex)
+    state.mark_uploads_as_processing([1, 2, 3, 4, 5])
+    for id, size in [(1, 400), (2, 400), (3, 1500), (4, 300)]:
+        state.mark_upload_as_processed(id, size)
+    # without a recorded size, an upload is assumed to be a tenth of the budget
+    state.mark_upload_as_processed(5)
+
+    assert state.split_into_merge_batches([1, 2, 3, 4, 5]) == [[1, 2], [3], [4, 5]]
+    assert state.split_into_merge_batches([]) == []
+    assert state.get_upload_numbers() == UploadNumbers(0, 5)
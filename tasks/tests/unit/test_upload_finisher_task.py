@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from unittest.mock import ANY
 
@@ -5,6 +6,7 @@ import pytest
 from celery.exceptions import Retry
 from redis.exceptions import LockError
 from shared.celery_config import timeseries_save_commit_measurements_task_name
+from shared.reports.resources import Report
 from shared.torngit.exceptions import TorngitObjectNotFoundError
 from shared.yaml import UserYaml
 
@@ -17,6 +19,7 @@ from helpers.checkpoint_logger.flows import UploadFlow
 from helpers.exceptions import RepositoryWithoutValidBotError
 from helpers.log_context import LogContext, set_log_context
 from services.processing.merging import get_joined_flag, update_uploads
+from services.processing.state import ProcessingState, UploadNumbers
 from services.processing.types import MergeResult, ProcessingResult
 from services.timeseries import MeasurementName
 from tasks.upload_finisher import (
@@ -24,6 +27,7 @@ from tasks.upload_finisher import (
     ShouldCallNotifyResult,
     UploadFinisherTask,
     load_commit_diff,
+    perform_report_merging,
 )
 
 here = Path(__file__)
@@ -89,7 +93,7 @@ def test_mark_uploads_as_failed(dbsession):
         },
     ]
 
-    update_uploads(dbsession, UserYaml({}), results, [], MergeResult({}, set()))
+    update_uploads(dbsession, UserYaml({}), results, MergeResult({}, set()))
     dbsession.expire_all()
 
     assert upload_1.state == "error"
@@ -694,3 +698,140 @@ class TestUploadFinisherTask(object):
                 commitid=commit.commitid,
                 commit_yaml={},
             )
+
+    @pytest.mark.django_db()
+    def test_direct_merge_skips_merged_uploads(
+        self, dbsession, mocker, mock_redis, mock_configuration
+    ):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"direct_merge": True}}}
+        )
+        mocker.patch.object(
+            ProcessingState, "get_processed_uploads", return_value=set()
+        )
+        perform_report_merging = mocker.patch(
+            "tasks.upload_finisher.perform_report_merging"
+        )
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+
+        _start_upload_flow(mocker)
+        result = UploadFinisherTask().run_impl(
+            dbsession,
+            [{"upload_id": 0, "successful": True, "arguments": {}}],
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+        )
+
+        # the upload was already merged by the finisher of another batch
+        assert result is None
+        perform_report_merging.assert_not_called()
+
+    @pytest.mark.django_db()
+    def test_direct_merge_merges_uploads_of_other_batches(
+        self, dbsession, mocker, mock_redis, mock_configuration
+    ):
+        mock_configuration.set_params(
+            {"setup": {"upload_processing": {"direct_merge": True}}}
+        )
+        mocker.patch("tasks.upload_finisher.load_commit_diff", return_value=None)
+        mocker.patch("tasks.upload_finisher.load_intermediate_reports", return_value=[])
+        update_uploads = mocker.patch("tasks.upload_finisher.update_uploads")
+        cleanup = mocker.patch("tasks.upload_finisher.cleanup_intermediate_reports")
+        mocker.patch.object(
+            ReportService, "get_existing_report_for_commit", return_value=None
+        )
+        save_report = mocker.patch.object(ReportService, "save_report")
+
+        # upload 3 was processed by an older worker, without a stored result
+        stored_results = {
+            1: {"upload_id": 1, "successful": True, "arguments": {}},
+            2: {"upload_id": 2, "successful": True, "arguments": {}},
+        }
+        load_processing_results = mocker.patch(
+            "tasks.upload_finisher.load_processing_results",
+            side_effect=lambda upload_ids: [
+                stored_results[id] for id in upload_ids if id in stored_results
+            ],
+        )
+        mocker.patch.object(
+            ProcessingState, "get_processed_uploads", return_value={0, 1, 2, 3}
+        )
+        mocker.patch.object(
+            ProcessingState,
+            "split_into_merge_batches",
+            side_effect=lambda upload_ids: [upload_ids],
+        )
+        pending_batches = iter([{2, 3}, {1}, set()])
+        get_uploads_for_merging = mocker.patch.object(
+            ProcessingState,
+            "get_uploads_for_merging",
+            side_effect=lambda exclude: next(pending_batches) - exclude,
+        )
+        mark_uploads_as_merged = mocker.patch.object(
+            ProcessingState, "mark_uploads_as_merged"
+        )
+        mocker.patch.object(
+            ProcessingState, "get_upload_numbers", return_value=UploadNumbers(0, 1)
+        )
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+
+        _start_upload_flow(mocker)
+        own_result = {"upload_id": 0, "successful": True, "arguments": {}}
+        UploadFinisherTask().run_impl(
+            dbsession,
+            [own_result],
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+        )
+
+        # the upload without a stored result does not end the merge loop early,
+        # and is not asked for again
+        assert get_uploads_for_merging.call_count == 3
+        assert get_uploads_for_merging.call_args_list[1].kwargs == {
+            "exclude": {0, 2, 3}
+        }
+        load_processing_results.assert_any_call([2, 3])
+        assert [call.args[2] for call in update_uploads.call_args_list] == [
+            [own_result],
+            [stored_results[2]],
+            [stored_results[1]],
+        ]
+        mark_uploads_as_merged.assert_called_once_with([0, 2, 1])
+        cleanup.assert_called_once_with([0, 2, 1])
+        save_report.assert_called_once()
+
+    @pytest.mark.django_db()
+    def test_direct_merge_stops_at_deadline(self, dbsession, mocker, mock_redis):
+        mocker.patch("tasks.upload_finisher.load_intermediate_reports", return_value=[])
+        mocker.patch("tasks.upload_finisher.update_uploads")
+        mocker.patch.object(
+            ProcessingState,
+            "split_into_merge_batches",
+            side_effect=lambda upload_ids: [upload_ids],
+        )
+        get_uploads_for_merging = mocker.patch.object(
+            ProcessingState, "get_uploads_for_merging", return_value={1}
+        )
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+
+        own_result = {"upload_id": 0, "successful": True, "arguments": {}}
+        _report, merged_results = perform_report_merging(
+            Report(),
+            UserYaml({}),
+            commit,
+            [own_result],
+            ProcessingState(commit.repoid, commit.commitid),
+            direct_merge=True,
+            deadline=time.monotonic(),
+        )
+
+        assert merged_results == [own_result]
+        get_uploads_for_merging.assert_not_called()
@@ -1,6 +1,8 @@
 import logging
 import random
 import re
+import time
+from collections.abc import Callable, Iterable
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 
@@ -15,6 +17,7 @@ from shared.celery_config import (
     timeseries_save_commit_measurements_task_name,
     upload_finisher_task_name,
 )
+from shared.config import get_config
 from shared.helpers.cache import cache
 from shared.helpers.redis import get_redis_connection
 from shared.reports.resources import Report
@@ -35,11 +38,13 @@ from services.comparison import get_or_create_comparison
 from services.processing.intermediate import (
     cleanup_intermediate_reports,
     load_intermediate_reports,
+    load_processing_results,
 )
 from services.processing.merging import merge_reports, update_uploads
 from services.processing.state import ProcessingState, should_trigger_postprocessing
 from services.processing.types import ProcessingResult
 from services.report import ReportService
+from services.report.sharded_chunks import is_sharded_chunks_enabled
 from services.repository import get_repo_provider_service
 from services.timeseries import repository_datasets_query
 from services.yaml import read_yaml_field
@@ -50,6 +55,13 @@ log = logging.getLogger(__name__)
 
 regexp_ci_skip = re.compile(r"\[(ci|skip| |-){3,}\]")
 
+# The maximum number of uploads merged by a single finisher in "direct merge" mode.
+DIRECT_MERGE_MAX_UPLOADS = 100
+
+# The fraction of the task time limit after which a finisher in "direct merge" mode
+# stops picking up more uploads, leaving enough time to save the "master report".
+DIRECT_MERGE_TIME_FRACTION = 0.5
+
 
 class ShouldCallNotifyResult(Enum):
     DO_NOT_NOTIFY = "do_not_notify"
@@ -94,6 +106,12 @@ class UploadFinisherTask(BaseCodecovTask, name=upload_finisher_task_name):
 
         repoid = int(repoid)
         commit_yaml = UserYaml(commit_yaml)
+        merge_deadline = None
+        if self.hard_time_limit_task:
+            merge_deadline = (
+                time.monotonic()
+                + self.hard_time_limit_task * DIRECT_MERGE_TIME_FRACTION
+            )
 
         commit = (
             db_session.query(Commit)
@@ -107,13 +125,47 @@ class UploadFinisherTask(BaseCodecovTask, name=upload_finisher_task_name):
 
         upload_ids = [upload["upload_id"] for upload in processing_results]
         diff = load_commit_diff(commit, self.name)
+        direct_merge = is_direct_merge_enabled()
 
         try:
             with get_report_lock(repoid, commitid, self.hard_time_limit_task):
+                if direct_merge:
+                    # the uploads might have been merged by the finisher of another batch
+                    processed_uploads = state.get_processed_uploads()
+                    processing_results = [
+                        upload
+                        for upload in processing_results
+                        if upload["upload_id"] in processed_uploads
+                    ]
+                    if not processing_results:
+                        log.info("All uploads were already merged")
+                        UploadFlow.log(UploadFlow.PROCESSING_COMPLETE)
+                        UploadFlow.log(UploadFlow.SKIPPING_NOTIFICATION)
+                        return
+
                 report_service = ReportService(commit_yaml)
-                report = perform_report_merging(
-                    report_service, commit_yaml, commit, processing_results
+                sharded_chunks = None
+                if is_sharded_chunks_enabled():
+                    master_report, sharded_chunks = (
+                        report_service.get_existing_sharded_report_for_commit(
+                            commit, report_code
+                        )
+                    )
+                else:
+                    master_report = report_service.get_existing_report_for_commit(
+                        commit
+                    )
+                report, processing_results = perform_report_merging(
+                    master_report or Report(),
+                    commit_yaml,
+                    commit,
+                    processing_results,
+                    state,
+                    direct_merge,
+                    sharded_chunks.load_files if sharded_chunks else None,
+                    merge_deadline,
                 )
+                upload_ids = [upload["upload_id"] for upload in processing_results]
 
                 log.info(
                     "Saving combined report",
@@ -121,8 +173,12 @@ class UploadFinisherTask(BaseCodecovTask, name=upload_finisher_task_name):
                 )
 
                 if diff:
+                    if sharded_chunks is not None:
+                        sharded_chunks.load_files(report, diff["files"].keys())
                     report.apply_diff(diff)
-                report_service.save_report(commit, report, report_code)
+                report_service.save_report(
+                    commit, report, report_code, sharded_chunks=sharded_chunks
+                )
 
                 db_session.commit()
                 state.mark_uploads_as_merged(upload_ids)
@@ -387,34 +443,109 @@ def get_report_lock(repoid: int, commitid: str, hard_time_limit: int) -> Lock:
     )
 
 
+def is_direct_merge_enabled() -> bool:
+    return get_config("setup", "upload_processing", "direct_merge", default=False)
+
+
 @sentry_sdk.trace
 def perform_report_merging(
-    report_service: ReportService,
+    master_report: Report,
     commit_yaml: UserYaml,
     commit: Commit,
     processing_results: list[ProcessingResult],
-) -> Report:
-    master_report = report_service.get_existing_report_for_commit(commit)
-    if master_report is None:
-        master_report = Report()
+    state: ProcessingState,
+    direct_merge: bool = False,
+    load_files: Callable[[Report, Iterable[str] | None], None] | None = None,
+    deadline: float | None = None,
+) -> tuple[Report, list[ProcessingResult]]:
+    """
+    Merges the uploads of `processing_results` into the "master report".
+
+    The uploads are merged in rounds sized by the recorded sizes of their
+    "intermediate report"s, so that only a bounded amount of them is loaded at once.
+
+    In "direct merge" mode, this then keeps merging all the other uploads of
+    the commit which finished processing in the meantime into the same
+    in-memory "master report", so it only has to be loaded and saved once.
+    No more uploads are picked up after the `deadline` (as in `time.monotonic`).
+    Uploads without a stored `ProcessingResult` (processed by older workers)
+    are skipped, and left to be merged by the finisher of their own batch.
+
+    With `load_files`, the "master report" is only partially loaded, and files
+    are loaded into it as they are being merged into (see `merge_reports`).
 
+    Returns the merged report, and the results of all the merged uploads.
+    """
+    merged_results: list[ProcessingResult] = []
+    results_by_id = {upload["upload_id"]: upload for upload in processing_results}
+    for batch in state.split_into_merge_batches(list(results_by_id)):
+        batch_results = [results_by_id[upload_id] for upload_id in batch]
+        master_report = merge_processing_results(
+            commit_yaml, commit, master_report, batch_results, load_files
+        )
+        merged_results.extend(batch_results)
+
+    skipped_upload_ids: set[int] = set()
+    while direct_merge:
+        remaining = DIRECT_MERGE_MAX_UPLOADS - len(merged_results)
+        if remaining <= 0:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            log.info(
+                "Stopping direct merge, as the time limit is approaching",
+                extra={"merged_uploads": len(merged_results)},
+            )
+            break
+        merged_upload_ids = {upload["upload_id"] for upload in merged_results}
+        pending_upload_ids = sorted(
+            state.get_uploads_for_merging(
+                exclude=merged_upload_ids | skipped_upload_ids
+            )
+        )[:remaining]
+        if not pending_upload_ids:
+            break
+        processing_results = load_processing_results(pending_upload_ids)
+
+        missing_upload_ids = set(pending_upload_ids) - {
+            upload["upload_id"] for upload in processing_results
+        }
+        if missing_upload_ids:
+            log.info(
+                "Skipping uploads without a stored processing result",
+                extra={"upload_ids": sorted(missing_upload_ids)},
+            )
+            skipped_upload_ids |= missing_upload_ids
+        if not processing_results:
+            continue
+
+        master_report = merge_processing_results(
+            commit_yaml, commit, master_report, processing_results, load_files
+        )
+        merged_results.extend(processing_results)
+
+    return master_report, merged_results
+
+
+def merge_processing_results(
+    commit_yaml: UserYaml,
+    commit: Commit,
+    master_report: Report,
+    processing_results: list[ProcessingResult],
+    load_files: Callable[[Report, Iterable[str] | None], None] | None = None,
+) -> Report:
     upload_ids = [
         upload["upload_id"] for upload in processing_results if upload["successful"]
     ]
     intermediate_reports = load_intermediate_reports(upload_ids)
 
     master_report, merge_result = merge_reports(
-        commit_yaml, master_report, intermediate_reports
+        commit_yaml, master_report, intermediate_reports, load_files
     )
 
     # Update the `Upload` in the database with the final session_id
     # (aka `order_number`) and other statuses
     update_uploads(
-        commit.get_db_session(),
-        commit_yaml,
-        processing_results,
-        intermediate_reports,
-        merge_result,
+        commit.get_db_session(), commit_yaml, processing_results, merge_result
     )
 
     return master_report